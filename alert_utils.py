@@ -0,0 +1,50 @@
+# alert_utils.py
+"""
+Alertas do painel de ações urgentes, calculados de forma vetorizada.
+"""
+import pandas as pd
+from metrics_utils import medido
+
+
+def _anos_completos(data_inicio, hoje):
+    """Anos completos entre `data_inicio` e `hoje` (equivalente a relativedelta(hoje, data_inicio).years)."""
+    hoje = pd.Timestamp(hoje)
+    ainda_nao_fez_aniversario = (data_inicio.dt.month > hoje.month) | (
+            (data_inicio.dt.month == hoje.month) & (data_inicio.dt.day > hoje.day))
+    return hoje.year - data_inicio.dt.year - ainda_nao_fez_aniversario.astype(int)
+
+
+def somar_anos(datas, anos):
+    """Soma `anos` (escalar ou Series) às datas; 29/02 vira 28/02 em anos não bissextos."""
+    ano = datas.dt.year + anos
+    mes = datas.dt.month
+    primeiro_dia = pd.to_datetime(pd.DataFrame({'year': ano, 'month': mes, 'day': 1}), errors='coerce')
+    dia = datas.dt.day.clip(upper=primeiro_dia.dt.days_in_month)
+    return primeiro_dia + pd.to_timedelta(dia - 1, unit='D')
+
+
+def proximo_aniversario(data_inicio, hoje):
+    """
+    Próximo aniversário de cada data de início, estritamente depois de `hoje`.
+    Contratos que ainda não começaram têm o primeiro aniversário um ano após o início.
+    """
+    return somar_anos(data_inicio, _anos_completos(data_inicio, hoje).clip(lower=0) + 1)
+
+
+@medido("calculo.contratos_a_vencer")
+def contratos_a_vencer(df_contratos, hoje, dias=60):
+    """Contratos ativos cuja data de fim cai nos próximos `dias`, com a coluna Dias_Restantes."""
+    limite = hoje + pd.Timedelta(days=dias)
+    a_vencer = df_contratos[(df_contratos['Data_Fim'] > hoje) & (df_contratos['Data_Fim'] <= limite) & (
+            df_contratos['Status_Contrato'] == 'Ativo')].copy()
+    a_vencer['Dias_Restantes'] = (a_vencer['Data_Fim'] - hoje).dt.days
+    return a_vencer
+
+
+@medido("calculo.proximos_reajustes")
+def proximos_reajustes(df_contratos_ativos, hoje, dias=30):
+    """Contratos ativos que completam aniversário (data de reajuste) nos próximos `dias`."""
+    com_inicio = df_contratos_ativos[df_contratos_ativos['Data_Inicio'].notna()]
+    aniversario = proximo_aniversario(com_inicio['Data_Inicio'], hoje)
+    no_periodo = (aniversario > hoje) & (aniversario <= hoje + pd.Timedelta(days=dias))
+    return com_inicio[no_periodo].assign(Proximo_Reajuste=aniversario[no_periodo])
@@ -0,0 +1,119 @@
+# arrears_utils.py
+"""
+Inadimplência sobre todo o histórico: cada contrato é expandido em suas cobranças mensais
+(uma por mês, do início ao fim do contrato, com vencimento no Dia_Vencimento) e a grade
+contrato x mês é comparada com os recebimentos válidos por mês de referência.
+O que falta receber de cada cobrança vencida é classificado em faixas de atraso.
+Valores em centavos.
+"""
+import numpy as np
+import pandas as pd
+from receivables_utils import dimensoes
+from readjustment_utils import historico_reajustes
+from metrics_utils import medido
+
+FAIXAS = ['0–30', '31–60', '61–90', '90+']
+LIMITES_FAIXAS = [-np.inf, 30, 60, 90, np.inf]
+COLUNAS_COBRANCA = ['ID_Contrato', 'Mes_Referencia', 'Vencimento', 'Esperado', 'Pago', 'Em_Aberto',
+                    'Dias_Atraso', 'Faixa']
+
+
+# --- GRADE DE MESES ---
+def _mes(datas):
+    """Datas -> número do mês (ano * 12 + mês - 1), para montar a grade com inteiros."""
+    return (datas.dt.year * 12 + datas.dt.month - 1).to_numpy()
+
+
+def _vencimentos(meses, dias):
+    """Data de vencimento de cada mês; dias maiores que o mês (ex.: 31) caem no último dia."""
+    inicio = (meses - 1970 * 12).astype('datetime64[M]')
+    dias_no_mes = ((inicio + 1).astype('datetime64[D]') - inicio.astype('datetime64[D]')).astype(int)
+    return inicio.astype('datetime64[D]') + (np.clip(dias, 1, dias_no_mes) - 1).astype('timedelta64[D]')
+
+
+def cobrancas(df_contratos, hoje):
+    """
+    Cobranças já vencidas de cada contrato: do primeiro vencimento a partir de Data_Inicio até o
+    último antes de hoje. Contratos ativos continuam gerando cobranças depois de Data_Fim; os
+    encerrados/renovados param em Data_Fim. O valor esperado é o aluguel vigente em cada mês: o
+    Valor_Aluguel_Base atual a partir do último reajuste registrado nas observações e, antes dele,
+    o valor anterior de cada reajuste (readjustment_utils.historico_reajustes).
+    """
+    hoje = pd.Timestamp(hoje).normalize()
+    contratos = df_contratos[df_contratos['Data_Inicio'].notna() & (df_contratos['Valor_Aluguel_Base'] > 0)]
+    ativo = (contratos['Status_Contrato'] == 'Ativo').to_numpy()
+    fim = contratos['Data_Fim'].where(~ativo, hoje).clip(upper=hoje)
+    contratos, fim, ativo = contratos[fim.notna()], fim[fim.notna()], ativo[fim.notna().to_numpy()]
+
+    primeiro, ultimo = _mes(contratos['Data_Inicio']), _mes(fim)
+    quantidade = np.clip(ultimo - primeiro + 1, 0, None)
+    linha = np.repeat(np.arange(len(contratos)), quantidade)
+    meses = primeiro[linha] + np.arange(quantidade.sum()) - np.repeat(np.cumsum(quantidade) - quantidade, quantidade)
+    vencimento = _vencimentos(meses, contratos['Dia_Vencimento'].to_numpy(dtype='int64')[linha])
+
+    inicio = contratos['Data_Inicio'].to_numpy(dtype='datetime64[D]')[linha]
+    limite = fim.to_numpy(dtype='datetime64[D]')[linha]
+    devida = ((vencimento >= inicio) & (vencimento < np.datetime64(hoje.date()))
+              & (ativo[linha] | (vencimento <= limite)))
+    grade = pd.DataFrame({'ID_Contrato': contratos['ID_Contrato'].astype(str).to_numpy()[linha][devida],
+                          'Mes': meses[devida].astype('int64'), 'Vencimento': vencimento[devida],
+                          'Esperado': contratos['Valor_Aluguel_Base'].to_numpy(dtype='int64')[linha][devida]})
+    return _aluguel_vigente(grade, historico_reajustes(contratos))
+
+
+def _aluguel_vigente(grade, historico):
+    """Meses anteriores a um reajuste cobram o valor de antes dele (o do primeiro reajuste seguinte)."""
+    if historico.empty or grade.empty:
+        return grade
+    grade = grade.sort_values('Mes', kind='stable')
+    seguinte = pd.merge_asof(grade, historico[['ID_Contrato', 'Mes', 'Anterior']].sort_values('Mes', kind='stable'),
+                             on='Mes', by='ID_Contrato', direction='forward', allow_exact_matches=False)
+    seguinte.index = grade.index
+    grade['Esperado'] = seguinte['Anterior'].fillna(grade['Esperado']).astype('int64')
+    return grade.sort_index()
+
+
+def _pago_por_mes(recebimentos):
+    """Recebimentos válidos por (ID_Contrato, mês de referência), com o mês como inteiro."""
+    unicos = pd.Series(recebimentos['Mes_Referencia'].unique())
+    mes = pd.Series(_mes(pd.to_datetime(unicos, format='%m/%Y', errors='coerce')), index=unicos)
+    pago = pd.DataFrame({'ID_Contrato': recebimentos['ID_Contrato'].astype(str).to_numpy(),
+                         'Mes': recebimentos['Mes_Referencia'].map(mes).to_numpy(),
+                         'Pago': recebimentos['Valor_Recebido'].to_numpy()})
+    pago = pago.dropna(subset=['Mes']).astype({'Mes': 'int64'})
+    return pago.groupby(['ID_Contrato', 'Mes'], as_index=False)['Pago'].sum()
+
+
+# --- INADIMPLÊNCIA ---
+@medido("calculo.cobrancas_em_aberto")
+def cobrancas_em_aberto(df_contratos, recebimentos, hoje):
+    """
+    Cobranças vencidas com saldo em aberto (esperado menos o recebido no mês de referência),
+    com os dias de atraso e a faixa. Pagamentos a mais em um mês não abatem outros meses.
+    """
+    grade = cobrancas(df_contratos, hoje)
+    grade = grade.merge(_pago_por_mes(recebimentos), on=['ID_Contrato', 'Mes'], how='left')
+    grade['Pago'] = grade['Pago'].fillna(0).astype('int64')
+    grade['Em_Aberto'] = (grade['Esperado'] - grade['Pago']).clip(lower=0)
+    grade = grade[grade['Em_Aberto'] > 0].reset_index(drop=True)
+    grade['Mes_Referencia'] = ((grade['Mes'] % 12 + 1).astype(str).str.zfill(2) + '/'
+                               + (grade['Mes'] // 12).astype(str))
+    grade['Dias_Atraso'] = (pd.Timestamp(hoje).normalize() - grade['Vencimento']).dt.days
+    grade['Faixa'] = pd.cut(grade['Dias_Atraso'], LIMITES_FAIXAS, labels=FAIXAS)
+    return grade[COLUNAS_COBRANCA]
+
+
+@medido("calculo.aging")
+def aging(em_aberto, df_contratos, df_imoveis, por='ID_Contrato'):
+    """
+    Saldo em aberto por faixa de atraso, agrupado por contrato, gestor ('Gestor_Responsavel')
+    ou grupo ('Grupo'), com o total, a quantidade de cobranças e o maior atraso em dias.
+    """
+    tabela = em_aberto.merge(dimensoes(df_contratos, df_imoveis), on='ID_Contrato', how='left')
+    tabela[por] = tabela[por].astype(object).where(tabela[por].notna(), '(sem cadastro)')
+    faixas = tabela.pivot_table(index=por, columns='Faixa', values='Em_Aberto', aggfunc='sum', fill_value=0,
+                                observed=False).reindex(columns=FAIXAS, fill_value=0)
+    faixas.columns = list(FAIXAS)
+    faixas['Total'] = faixas.sum(axis=1)
+    outros = tabela.groupby(por).agg(Cobrancas=('Em_Aberto', 'size'), Maior_Atraso=('Dias_Atraso', 'max'))
+    return faixas.join(outros).sort_values('Total', ascending=False).reset_index()
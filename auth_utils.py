@@ -1,44 +1,134 @@
-# auth_utils.py
-import streamlit as st
-import streamlit_authenticator as stauth
-
-
-def page_guard():
-    """
-    Função "guardiã" que centraliza toda a lógica de segurança.
-    """
-    try:
-        # Constrói o dicionário de credenciais manualmente a partir dos Secrets
-        credentials = {'usernames': {}}
-        for username, user_info in st.secrets['credentials']['usernames'].items():
-            credentials['usernames'][username] = {
-                'email': user_info['email'],
-                'name': user_info['name'],
-                'password': user_info['password']
-            }
-
-        cookie = dict(st.secrets['cookie'])
-
-        authenticator = stauth.Authenticate(
-            credentials,
-            cookie['name'],
-            cookie['key'],
-            cookie['expiry_days']
-        )
-
-        # Verifica se o usuário está logado
-        if not st.session_state.get("authentication_status"):
-            st.warning("Você precisa fazer login para acessar esta página.")
-            st.stop()
-
-        # Mostra o nome do usuário e o botão de logout na barra lateral
-        st.sidebar.title(f"Bem-vindo, *{st.session_state['name']}* 👋")
-        authenticator.logout(location='sidebar')
-
-    except KeyError:
-        st.error(
-            "A configuração de autenticação (Secrets) não foi encontrada ou está incompleta. Por favor, faça login novamente.")
-        st.stop()
-    except Exception as e:
-        st.error(f"Ocorreu um erro inesperado durante a autenticação: {e}")
-        st.stop()
\ No newline at end of file
+# auth_utils.py
+import os
+import copy
+import sys
+import threading
+import streamlit as st
+import streamlit_authenticator as stauth
+import ui_utils
+import metrics_utils
+
+
+# Chaves de sessão que o streamlit_authenticator usa; inicializadas em toda sessão nova
+CHAVES_SESSAO = ['name', 'authentication_status', 'username', 'email', 'roles', 'logout']
+CHAVE_AUTENTICADOR = '_autenticador'
+
+_credenciais = None
+_lock_credenciais = threading.Lock()
+
+
+# --- AUTENTICADOR ---
+def get_authenticator():
+    """
+    Autenticador da sessão. Cada sessão tem o seu: o streamlit_authenticator guarda no objeto o
+    token e os cookies lidos do navegador, e compartilhá-lo faria uma sessão entrar como outra.
+    A parte cara (hash das senhas) é feita uma única vez por processo em carregar_credenciais().
+    Não usa st.cache_resource porque o construtor renderiza o componente de cookies (um widget).
+    """
+    if CHAVE_AUTENTICADOR not in st.session_state:
+        credenciais, cookie = carregar_credenciais()
+        st.session_state[CHAVE_AUTENTICADOR] = stauth.Authenticate(
+            copy.deepcopy(credenciais),
+            cookie['name'],
+            cookie['key'],
+            cookie['expiry_days'],
+            auto_hash=False
+        )
+    return st.session_state[CHAVE_AUTENTICADOR]
+
+
+def carregar_credenciais():
+    """
+    Credenciais dos Secrets com as senhas já em hash (bcrypt) e a configuração do cookie, uma vez
+    por processo. Cada sessão recebe uma cópia: o autenticador altera o dicionário ao fazer login.
+    """
+    global _credenciais
+    with _lock_credenciais:
+        if _credenciais is None:
+            _credenciais = _ler_credenciais()
+        return _credenciais
+
+
+def _ler_credenciais():
+    # Constrói o dicionário de credenciais manualmente a partir dos Secrets
+    credentials = {'usernames': {}}
+    for username, user_info in st.secrets['credentials']['usernames'].items():
+        senha = user_info['password']
+        credentials['usernames'][username] = {
+            'email': user_info['email'],
+            'name': user_info['name'],
+            'password': senha if stauth.Hasher.is_hash(senha) else stauth.Hasher.hash(senha)
+        }
+
+    return credentials, dict(st.secrets['cookie'])
+
+
+def preparar_sessao():
+    """Retorna o autenticador da sessão, com as chaves de sessão que ele espera já criadas."""
+    authenticator = get_authenticator()
+    for chave in CHAVES_SESSAO:
+        st.session_state.setdefault(chave, None)
+    return authenticator
+
+
+def _sessao_valida(authenticator):
+    """
+    Caminho rápido: a sessão já autenticada só é conferida contra a lista de usuários, sem ler
+    nem decodificar o cookie. Sessões sem login tentam o cookie de reautenticação (caminho lento).
+    """
+    if st.session_state.get("authentication_status"):
+        metrics_utils.contar("auth.sessao")
+        return st.session_state.get('username') in st.secrets['credentials']['usernames']
+    metrics_utils.contar("auth.cookie")
+    authenticator.login(location='unrendered')
+    return bool(st.session_state.get("authentication_status"))
+
+
+def page_guard():
+    """
+    Função "guardiã" que centraliza toda a lógica de segurança.
+    """
+    # Abre o registro de desempenho desta execução da página; se a execução anterior
+    # não chegou ao fim (st.stop, erro), ela é fechada aqui
+    anterior = st.session_state.get('_execucao_metricas')
+    if anterior is not None:
+        metrics_utils.finalizar_execucao(anterior, interrompida=True)
+    pagina = os.path.splitext(os.path.basename(sys._getframe(1).f_globals.get('__file__', 'app')))[0]
+    st.session_state['_execucao_metricas'] = metrics_utils.iniciar_execucao(pagina)
+
+    try:
+        with metrics_utils.span("auth.page_guard"):
+            authenticator = preparar_sessao()
+            autenticado = _sessao_valida(authenticator)
+
+        # Verifica se o usuário está logado
+        if not autenticado:
+            st.warning("Você precisa fazer login para acessar esta página.")
+            st.stop()
+
+        # Mostra o nome do usuário e o botão de logout na barra lateral
+        st.sidebar.title(f"Bem-vindo, *{st.session_state['name']}* 👋")
+        authenticator.logout(location='sidebar')
+
+    except KeyError:
+        st.error(
+            "A configuração de autenticação (Secrets) não foi encontrada ou está incompleta. Por favor, faça login novamente.")
+        st.stop()
+    except Exception as e:
+        st.error(f"Ocorreu um erro inesperado durante a autenticação: {e}")
+        st.stop()
+
+    # Fora do try: um problema no journal de escritas não deve bloquear o acesso
+    ui_utils.status_escritas()
+
+
+def admin_guard():
+    """
+    Restringe a página aos administradores: usuários listados em `admins` nos Secrets.
+    Deve ser chamada depois de page_guard().
+    """
+    admins = list(st.secrets.get('admins', []))
+    if st.session_state.get('username') not in admins:
+        st.error("Acesso restrito aos administradores. Peça para incluir seu usuário na lista `admins` dos Secrets.")
+        metrics_utils.finalizar_execucao()
+        st.stop()
@@ -0,0 +1,220 @@
+# benchmark.py
+"""
+Benchmark das páginas com carteiras sintéticas, sem acesso à rede.
+Cada página é executada com o AppTest do Streamlit sobre uma planilha falsa em memória
+(ou sobre o backend SQLite), primeiro com os caches vazios (rodada "fria") e depois com
+os caches prontos (rodada "quente"). O tempo de cada execução é dividido nas fases:
+  load    - sincronização com a fonte dos dados (planilha -> snapshot local)
+  parse   - leitura do snapshot/banco e conversão de tipos
+  compute - cálculos do painel (alertas, recebimentos, filtros e paginação)
+  render  - o restante da execução da página (montagem dos elementos do Streamlit)
+Os resultados são impressos e, opcionalmente, gravados em JSON Lines (um objeto por execução).
+
+Uso:
+    python benchmark.py --imoveis 100 1000 10000 --saida bench.jsonl
+    python benchmark.py --imoveis 5000 --paginas 1_Visão_Geral --backend sqlite --latencia 0.2
+    python benchmark.py --imoveis 5000 --paginas 1_Visão_Geral --planilhas 4 --latencia 0.5
+"""
+import os
+import json
+import time
+import shutil
+import inspect
+import argparse
+import tempfile
+import platform
+import functools
+import importlib
+import subprocess
+from datetime import datetime
+
+PASTA_APP = os.path.dirname(os.path.abspath(__file__))
+# O snapshot e o journal do benchmark ficam em uma pasta temporária, nunca na do app
+os.environ.setdefault("SNAPSHOT_DIR", tempfile.mkdtemp(prefix="benchmark_snapshot_"))
+
+import numpy as np
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+import synthetic_utils
+
+PAGINAS_PADRAO = ["1_Visão_Geral", "5_Histórico_Financeiro"]
+
+# Funções cronometradas em cada fase ('*' = todas as funções públicas do módulo).
+# O tempo é exclusivo: o que uma função gasta dentro de outra cronometrada conta só para a interna.
+FASES = {
+    'load': [('data_utils', 'sincronizar')],
+    'parse': [('schema_utils', 'tipar'), ('snapshot_utils', 'ler_snapshot'), ('snapshot_utils', 'ler_coluna'),
+              ('storage_utils', 'ArmazenamentoSQLite.ler')],
+    'compute': [('data_utils', 'load_recebimentos'), ('data_utils', 'consultar_lancamentos'),
+                ('alert_utils', '*'), ('arrears_utils', '*'), ('projection_utils', '*'), ('receivables_utils', '*'),
+                ('search_utils', '*'), ('statement_utils', '*'),
+                ('ui_utils', 'paginar')],
+}
+
+
+# --- CRONOMETRAGEM POR FASE ---
+class Cronometro:
+    def __init__(self):
+        self.tempos = dict.fromkeys(FASES, 0.0)
+        self._pilha = []
+        self._originais = []
+
+    def _envolver(self, funcao, fase):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            self._pilha.append(0.0)
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                total = time.perf_counter() - inicio
+                self.tempos[fase] += total - self._pilha.pop()
+                if self._pilha:
+                    self._pilha[-1] += total
+        return envolvida
+
+    def instrumentar(self):
+        for fase, alvos in FASES.items():
+            for nome_modulo, nome in alvos:
+                modulo = importlib.import_module(nome_modulo)
+                if nome == '*':
+                    nomes = [n for n, f in inspect.getmembers(modulo, inspect.isfunction)
+                             if not n.startswith('_') and f.__module__ == nome_modulo]
+                    dono_nomes = [(modulo, n) for n in nomes]
+                else:
+                    *caminho, atributo = nome.split('.')
+                    dono = functools.reduce(getattr, caminho, modulo)
+                    dono_nomes = [(dono, atributo)]
+                for dono, atributo in dono_nomes:
+                    original = getattr(dono, atributo)
+                    self._originais.append((dono, atributo, original))
+                    setattr(dono, atributo, self._envolver(original, fase))
+
+    def restaurar(self):
+        for dono, atributo, original in reversed(self._originais):
+            setattr(dono, atributo, original)
+        self._originais = []
+
+
+# --- PREPARAÇÃO DOS DADOS ---
+def preparar_fonte(carteira, backend, latencia, n_planilhas=1):
+    """
+    Instala as planilhas falsas (ou grava o banco SQLite) e zera caches, snapshot e journal.
+    Com `n_planilhas` > 1, cada aba é dividida em partes contíguas, uma por planilha da carteira.
+    Retorna a lista de planilhas falsas.
+    """
+    import data_utils
+    import storage_utils
+
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    shutil.rmtree(os.environ["SNAPSHOT_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["SNAPSHOT_DIR"], exist_ok=True)
+
+    partes = [{nome: df.iloc[linhas] for (nome, df), linhas in zip(carteira.items(), indices)}
+              for indices in zip(*[np.array_split(np.arange(len(df)), n_planilhas) for df in carteira.values()])]
+    planilhas = {f"Benchmark {i + 1}": synthetic_utils.PlanilhaFalsa(synthetic_utils.para_valores(parte),
+                                                                    latencia=latencia)
+                 for i, parte in enumerate(partes)}
+    data_utils.get_spreadsheet = lambda titulo=None: planilhas.get(titulo, next(iter(planilhas.values())))
+    data_utils.get_worksheet = lambda nome, titulo=None: data_utils.get_spreadsheet(titulo).worksheet(nome)
+    if n_planilhas > 1:
+        os.environ["STORAGE_PLANILHAS"] = ";".join(planilhas)
+    else:
+        os.environ.pop("STORAGE_PLANILHAS", None)
+    if backend == "sqlite":
+        os.environ["STORAGE_BACKEND"] = "sqlite"
+        os.environ["STORAGE_SQLITE_PATH"] = os.path.join(os.environ["SNAPSHOT_DIR"], "benchmark.sqlite3")
+        banco = storage_utils.ArmazenamentoSQLite(os.environ["STORAGE_SQLITE_PATH"])
+        for nome, df in carteira.items():
+            banco.substituir(nome, df.values.tolist())
+    else:
+        os.environ["STORAGE_BACKEND"] = "sheets"
+    return list(planilhas.values())
+
+
+# --- EXECUÇÃO DAS PÁGINAS ---
+def executar_pagina(caminho, timeout):
+    """Executa a página uma vez com um usuário autenticado; retorna (segundos, exceções)."""
+    app = AppTest.from_file(caminho, default_timeout=timeout)
+    app.secrets['credentials'] = {'usernames': {'benchmark': {'email': 'benchmark@exemplo.com',
+                                                              'name': 'Benchmark', 'password': 'x'}}}
+    app.secrets['cookie'] = {'name': 'benchmark', 'key': 'benchmark', 'expiry_days': 1}
+    app.session_state['authentication_status'] = True
+    app.session_state['name'] = 'Benchmark'
+    app.session_state['username'] = 'benchmark'
+    inicio = time.perf_counter()
+    app.run()
+    return time.perf_counter() - inicio, [str(e.message) for e in app.exception]
+
+
+def medir(caminho, rodada, planilhas, timeout):
+    import data_utils
+    cronometro = Cronometro()
+    cronometro.instrumentar()
+    chamadas_antes = sum(planilha.chamadas for planilha in planilhas)
+    try:
+        total, excecoes = executar_pagina(caminho, timeout)
+    finally:
+        cronometro.restaurar()
+    fases = {fase: round(segundos, 4) for fase, segundos in cronometro.tempos.items()}
+    fases['render'] = round(max(0.0, total - sum(cronometro.tempos.values())), 4)
+    return {'rodada': rodada, 'total_s': round(total, 4), 'fases': fases,
+            'chamadas_api': sum(planilha.chamadas for planilha in planilhas) - chamadas_antes,
+            'backend': data_utils.get_armazenamento().nome, 'excecoes': excecoes}
+
+
+def _versao_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PASTA_APP, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das páginas com carteiras sintéticas.")
+    parser.add_argument('--imoveis', type=int, nargs='+', default=[100, 1000], help="tamanhos da carteira")
+    parser.add_argument('--meses', type=int, default=24, help="meses de histórico de lançamentos")
+    parser.add_argument('--paginas', nargs='+', default=PAGINAS_PADRAO, help="páginas (nome do arquivo em pages/)")
+    parser.add_argument('--backend', choices=['sheets', 'sqlite'], default='sheets')
+    parser.add_argument('--latencia', type=float, default=0.0, help="segundos simulados por chamada à API")
+    parser.add_argument('--planilhas', type=int, default=1, help="planilhas em que a carteira é dividida")
+    parser.add_argument('--repeticoes', type=int, default=1, help="execuções com o cache quente")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--saida', help="arquivo JSON Lines para acrescentar os resultados")
+    args = parser.parse_args()
+
+    # Importa antes as bibliotecas das páginas, para que o custo de importação não entre na primeira medida
+    for modulo in ("data_utils", "alert_utils", "ui_utils", "plotly.express"):
+        importlib.import_module(modulo)
+
+    base = {'data': datetime.now().isoformat(timespec='seconds'), 'commit': _versao_codigo(),
+            'python': platform.python_version(), 'latencia_s': args.latencia, 'planilhas': args.planilhas}
+    saida = open(args.saida, 'a', encoding='utf-8') if args.saida else None
+    try:
+        for n_imoveis in args.imoveis:
+            inicio = time.perf_counter()
+            carteira = synthetic_utils.gerar_carteira(n_imoveis, meses_historico=args.meses, semente=args.semente)
+            tamanho = {'imoveis': n_imoveis, 'contratos': len(carteira['Contratos']),
+                       'lancamentos': len(carteira['Lancamentos_Financeiros']),
+                       'geracao_s': round(time.perf_counter() - inicio, 4)}
+            for pagina in args.paginas:
+                caminho = os.path.join(PASTA_APP, "pages", pagina if pagina.endswith(".py") else f"{pagina}.py")
+                planilhas = preparar_fonte(carteira, args.backend, args.latencia, args.planilhas)
+                rodadas = ['fria'] + ['quente'] * args.repeticoes
+                for rodada in rodadas:
+                    resultado = {**base, **tamanho, 'pagina': pagina, **medir(caminho, rodada, planilhas, args.timeout)}
+                    linha = json.dumps(resultado, ensure_ascii=False)
+                    print(linha, flush=True)
+                    if saida:
+                        saida.write(linha + "\n")
+                        saida.flush()
+    finally:
+        if saida:
+            saida.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,768 @@
+# data_utils.py
+import time
+import os
+import re
+import json
+import threading
+from bisect import bisect_right
+from functools import partial
+from itertools import accumulate
+import streamlit as st
+import gspread
+import numpy as np
+import pandas as pd
+from gspread.utils import a1_range_to_grid_range, a1_to_rowcol, fill_gaps, rowcol_to_a1
+import schema_utils
+import snapshot_utils
+import storage_utils
+import sequence_utils
+import journal_utils
+import receivables_utils
+import readjustment_utils
+import projection_utils
+import search_utils
+import statement_utils
+from metrics_utils import contar, medido, span
+
+SPREADSHEET_NAME = "Controle de Aluguéis"
+WORKSHEETS = ["Imoveis", "Contratos", "Lancamentos_Financeiros", "Gestores"]
+
+# Coluna de ID de cada aba, usada no índice ID -> linha da planilha
+CHAVE_POR_ABA = {"Imoveis": "ID_Imovel", "Contratos": "ID_Contrato", "Lancamentos_Financeiros": "ID_Lancamento"}
+# Abas editadas por formulário: o cache guarda a versão (hash do conteúdo) de cada linha
+ABAS_VERSIONADAS = ("Imoveis", "Contratos")
+# Combinações de parâmetros guardadas por seção de página (memorizar)
+MAX_RESULTADOS_POR_SECAO = 32
+
+
+# --- CONEXÃO COM A PLANILHA (USANDO SECRETS) ---
+@st.cache_resource
+def get_client():
+    """Cliente gspread único por processo, compartilhado por todas as páginas."""
+    return gspread.service_account_from_dict(st.secrets["gcp_service_account"])
+
+
+@st.cache_resource
+def get_spreadsheet(titulo=SPREADSHEET_NAME):
+    return get_client().open(titulo)
+
+
+@st.cache_resource
+def get_worksheet(worksheet_name, titulo=SPREADSHEET_NAME):
+    return get_spreadsheet(titulo).worksheet(worksheet_name)
+
+
+# --- BACKEND DE ARMAZENAMENTO ---
+@st.cache_resource
+def get_armazenamento():
+    """
+    Backend de armazenamento escolhido na seção [storage] dos Secrets (ou na variável de
+    ambiente STORAGE_BACKEND): "sheets" (padrão, Google Sheets) ou "sqlite" (banco local).
+    Uma carteira dividida em várias planilhas é configurada com a lista `planilhas` da mesma seção
+    (ou STORAGE_PLANILHAS, separadas por ";"); as linhas novas vão para a última planilha da lista.
+    """
+    backend = os.environ.get("STORAGE_BACKEND")
+    config = {} if backend else st.secrets.get("storage", {})
+    backend = backend or config.get("backend", "sheets")
+    if backend == "sqlite":
+        caminho = os.environ.get("STORAGE_SQLITE_PATH",
+                                 config.get("sqlite_path", os.path.join(snapshot_utils.SNAPSHOT_DIR, "dados.sqlite3")))
+        return storage_utils.ArmazenamentoSQLite(caminho)
+    if backend != "sheets":
+        raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
+    planilhas = os.environ.get("STORAGE_PLANILHAS")
+    planilhas = planilhas.split(";") if planilhas else list(config.get("planilhas", [SPREADSHEET_NAME]))
+    planilhas = [titulo.strip() for titulo in planilhas if titulo.strip()] or [SPREADSHEET_NAME]
+    if len(planilhas) == 1:
+        return storage_utils.ArmazenamentoPlanilha(partial(get_spreadsheet, planilhas[0]),
+                                                   partial(get_worksheet, titulo=planilhas[0]))
+    # Cada planilha da carteira tem o próprio snapshot local
+    return storage_utils.ArmazenamentoFragmentado({
+        titulo: storage_utils.ArmazenamentoPlanilha(
+            partial(get_spreadsheet, titulo), partial(get_worksheet, titulo=titulo),
+            diretorio=snapshot_utils.diretorio_planilha(titulo))
+        for titulo in planilhas})
+
+
+def sincronizar(nomes=None):
+    """Sincroniza as abas com a fonte dos dados (no Google Sheets, em uma única requisição em lote)."""
+    get_armazenamento().sincronizar(list(nomes or WORKSHEETS))
+
+
+# --- CACHE VERSIONADO POR ABA ---
+TTL_CACHE = 600  # segundos
+
+
+@st.cache_resource
+def _cache_abas():
+    """
+    DataFrames tipados de cada aba, compartilhados pelas sessões do processo.
+    Cada aba tem uma versão própria: uma escrita invalida (ou atualiza) apenas a aba que alterou.
+    """
+    return {'abas': {}, 'versoes': {nome: 0 for nome in WORKSHEETS}, 'lock': threading.Lock()}
+
+
+def versao_aba(worksheet_name):
+    """Versão atual da aba no cache; muda a cada escrita, invalidação ou recarga da aba."""
+    return _cache_abas()['versoes'].get(worksheet_name, 0)
+
+
+def invalidar_abas(nomes):
+    """Marca como vencidas apenas as abas informadas; a próxima leitura as sincroniza de novo."""
+    cache = _cache_abas()
+    with cache['lock']:
+        for nome in nomes:
+            cache['versoes'][nome] = cache['versoes'].get(nome, 0) + 1
+
+
+def _indexar(worksheet_name, df, primeira_linha=2):
+    """Índice ID -> número da linha na planilha (cabeçalho na linha 1); IDs repetidos ficam com a primeira linha."""
+    chave = CHAVE_POR_ABA.get(worksheet_name)
+    if chave not in df.columns:
+        return {}
+    linhas = pd.Series(range(primeira_linha, primeira_linha + len(df)), index=df[chave].astype(str))
+    linhas = linhas[~linhas.index.duplicated()]
+    return dict(zip(linhas.index, linhas.tolist()))
+
+
+def _versoes_linhas(df):
+    """Versão de cada linha: hash do texto das células, como lido da fonte."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _anexar_linhas(worksheet_name, entrada, linhas):
+    """Acrescenta linhas (como enviadas à planilha) à entrada do cache: DataFrame, índice, fragmentos e versões."""
+    colunas = list(entrada['df'].columns)
+    texto = [["" if valor is None else str(valor) for valor in linha] for linha in linhas]
+    novas = pd.DataFrame([linha[:len(colunas)] for linha in fill_gaps(texto, cols=len(colunas))],
+                         columns=colunas, dtype=object)
+    if entrada['versoes_linhas'] is not None:
+        entrada['versoes_linhas'] = np.concatenate([entrada['versoes_linhas'], _versoes_linhas(novas)])
+    novas = schema_utils.tipar(worksheet_name, novas)
+    for id_registro, linha in _indexar(worksheet_name, novas, len(entrada['df']) + 2).items():
+        entrada['indice'].setdefault(id_registro, linha)
+    # As linhas novas vão para a última planilha da carteira
+    planilha, quantidade = entrada['fragmentos'][-1]
+    entrada['fragmentos'][-1] = (planilha, quantidade + len(novas))
+    entrada['df'] = schema_utils.concatenar(worksheet_name, entrada['df'], novas)
+
+
+def _acrescentar_no_cache(worksheet_name, linhas):
+    """
+    Acrescenta as linhas novas ao DataFrame em cache da aba, sem descartá-lo.
+    Se a aba ainda não está em cache (ou já venceu), não há o que atualizar: a recarga
+    inclui as linhas que ainda estiverem no journal.
+    """
+    cache = _cache_abas()
+    with cache['lock']:
+        entrada = cache['abas'].get(worksheet_name)
+        if entrada is None or entrada['versao'] != cache['versoes'][worksheet_name] or entrada['df'].columns.empty:
+            return
+        _anexar_linhas(worksheet_name, entrada, linhas)
+        cache['versoes'][worksheet_name] += 1
+        entrada['versao'] = cache['versoes'][worksheet_name]
+
+
+def _atualizar_no_cache(worksheet_name, valores_por_registro):
+    """
+    Grava no DataFrame em cache da aba os valores enviados ao journal ({ID: {coluna: valor}}), para
+    que as páginas já os exibam antes do envio. Se a aba ainda não está em cache (ou já venceu), não
+    há o que atualizar.
+    """
+    cache = _cache_abas()
+    with cache['lock']:
+        entrada = cache['abas'].get(worksheet_name)
+        if entrada is None or entrada['versao'] != cache['versoes'][worksheet_name]:
+            return
+        df = entrada['df'].copy()
+        for coluna in dict.fromkeys(coluna for valores in valores_por_registro.values() for coluna in valores):
+            alterados = {id_registro: valores[coluna] for id_registro, valores in valores_por_registro.items()
+                         if coluna in valores and id_registro in entrada['indice']}
+            if not alterados or coluna not in df.columns:
+                continue
+            texto = pd.DataFrame({coluna: ["" if valor is None else str(valor) for valor in alterados.values()]},
+                                 dtype=object)
+            novos = schema_utils.tipar(worksheet_name, texto)[coluna]
+            if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+                df[coluna] = df[coluna].cat.add_categories(novos.cat.categories.difference(df[coluna].cat.categories))
+            posicoes = [entrada['indice'][id_registro] - 2 for id_registro in alterados]
+            df.iloc[posicoes, df.columns.get_loc(coluna)] = novos.to_numpy()
+        cache['versoes'][worksheet_name] += 1
+        entrada['df'] = df
+        entrada['versao'] = cache['versoes'][worksheet_name]
+
+
+def _carregar_vencidas(cache, nomes):
+    """
+    Sincroniza e recarrega (com o lock do cache já adquirido) as abas vencidas: sem cache,
+    fora do TTL ou com versão nova. Todas são lidas juntas, em uma única requisição em lote.
+    """
+    agora = time.time()
+    vencidas = [nome for nome in nomes
+                if nome not in cache['abas'] or cache['abas'][nome]['versao'] != cache['versoes'][nome]
+                or agora - cache['abas'][nome]['carregado_em'] > TTL_CACHE]
+    if len(vencidas) < len(nomes):
+        contar("cache.acerto", len(nomes) - len(vencidas))
+    if not vencidas:
+        return
+    contar("cache.falta", len(vencidas))
+    aviso = None
+    try:
+        with span("dados.sincronizar"):
+            sincronizar(vencidas)
+    except storage_utils.SincronizacaoParcial as e:
+        aviso = (f"{len(e.falhas)} planilha(s) da carteira não sincronizada(s); exibindo a última cópia local "
+                 f"delas. Detalhes: {e}")
+    except Exception as e:
+        aviso = f"Não foi possível sincronizar com a planilha; exibindo a última cópia local. Detalhes: {e}"
+    armazenamento = get_armazenamento()
+    for nome in vencidas:
+        if nome in cache['abas'] and cache['abas'][nome]['versao'] == cache['versoes'][nome]:
+            # Recarga por TTL: a planilha pode ter mudado sem passar pelo app
+            cache['versoes'][nome] += 1
+        with span(f"dados.montar_dataframe.{nome}"):
+            if armazenamento.fragmentado:
+                partes = armazenamento.ler_fragmentos(nome)
+                fragmentos = [(planilha, len(parte)) for planilha, parte in partes]
+                df = storage_utils.unir([parte for _, parte in partes])
+            else:
+                df = armazenamento.ler(nome)
+                fragmentos = [("", len(df))]
+            versoes_linhas = _versoes_linhas(df) if nome in ABAS_VERSIONADAS else None
+            df = schema_utils.tipar(nome, df)
+        # fragmentos: (planilha, quantidade de linhas) de cada parte da aba, na ordem do DataFrame
+        entrada = {'df': df, 'indice': _indexar(nome, df), 'fragmentos': fragmentos,
+                   'versoes_linhas': versoes_linhas, 'aviso': aviso,
+                   'versao': cache['versoes'][nome], 'carregado_em': agora}
+        if not armazenamento.escrita_direta and not df.columns.empty:
+            # Inclusões ainda no journal não estão na planilha: continuam visíveis depois da recarga
+            pendentes = journal_utils.linhas_nao_enviadas(nome, ("", fragmentos[-1][0]))
+            if pendentes:
+                _anexar_linhas(nome, entrada, pendentes)
+        cache['abas'][nome] = entrada
+
+
+def _obter(nomes):
+    """Retorna (dados, avisos) das abas pedidas, recarregando apenas as vencidas."""
+    cache = _cache_abas()
+    with cache['lock']:
+        _carregar_vencidas(cache, nomes)
+        dados = {nome: cache['abas'][nome]['df'].copy() for nome in nomes}
+        for nome in nomes:
+            # Versão da aba de que o DataFrame foi copiado (versoes_carregadas)
+            dados[nome].attrs['versao_aba'] = cache['abas'][nome]['versao']
+            # Partes da aba em cada planilha da carteira, para localizar as linhas (reconciliation_utils)
+            dados[nome].attrs['fragmentos'] = list(cache['abas'][nome]['fragmentos'])
+        avisos = dict.fromkeys(cache['abas'][nome]['aviso'] for nome in nomes if cache['abas'][nome]['aviso'])
+    return dados, list(avisos)
+
+
+# --- CARREGAMENTO DOS DADOS ---
+def load_all():
+    """
+    Carrega todas as abas a partir do cache por aba; as abas vencidas são sincronizadas com a
+    planilha em uma única requisição em lote.
+    """
+    return _load(WORKSHEETS)
+
+
+def load_data(worksheet_name):
+    """Retorna o DataFrame de uma aba, sincronizando apenas essa aba quando necessário."""
+    return _load([worksheet_name]).get(worksheet_name, pd.DataFrame())
+
+
+def versoes_carregadas(dados):
+    """Versão de cada aba carregada por load_all/load_data (None se o DataFrame não veio do cache)."""
+    return {nome: df.attrs.get('versao_aba') for nome, df in dados.items()}
+
+
+def _load(nomes):
+    try:
+        dados, avisos = _obter(nomes)
+    except Exception as e:
+        st.error(f"Erro ao carregar os dados da planilha: {e}")
+        return {nome: pd.DataFrame() for nome in nomes}
+    for aviso in avisos:
+        st.warning(aviso)
+    return dados
+
+
+# --- TABELA MATERIALIZADA DE RECEBIMENTOS ---
+@st.cache_resource
+def _recebimentos_materializados():
+    return {'estado': None, 'lock': threading.Lock()}
+
+
+@medido("calculo.recebimentos")
+def load_recebimentos(df_financeiro):
+    """
+    Retorna a tabela materializada de recebimentos válidos por contrato, mês de referência e mês
+    de pagamento. A tabela é mantida por processo e atualizada incrementalmente com os lançamentos
+    novos e os cancelamentos do histórico recebido. Em backends SQL, a agregação é feita pelo banco.
+    """
+    if df_financeiro.empty:
+        return pd.DataFrame(columns=receivables_utils.COLUNAS_CHAVE + receivables_utils.COLUNAS_VALOR)
+    armazenamento = get_armazenamento()
+    if armazenamento.suporta_sql:
+        # A agregação é feita pelo próprio banco
+        return armazenamento.consultar(receivables_utils.CONSULTA_SQL)
+    materializado = _recebimentos_materializados()
+    with materializado['lock']:
+        materializado['estado'] = receivables_utils.atualizar(materializado['estado'], df_financeiro)
+        return materializado['estado']['tabela'].reset_index()
+
+
+# --- PROJEÇÃO DE FLUXO DE CAIXA ---
+@st.cache_resource
+def _projecoes():
+    return {'entradas': {}, 'lock': threading.Lock()}
+
+
+def load_projecao(df_contratos, hoje, meses=12, renovar=False):
+    """
+    Cobranças previstas (projection_utils.projetar_fluxo) mantidas por processo. Só são recalculadas
+    quando muda a versão dos contratos recebidos (a da aba de que foram carregados), o dia, o
+    horizonte ou o arquivo de índices. Projeções de contratos de uma versão anterior da aba não
+    são guardadas.
+    """
+    versao = df_contratos.attrs.get('versao_aba')
+    chave = (versao, pd.Timestamp(hoje).date(), meses, renovar, readjustment_utils.versao_indices())
+    projecoes = _projecoes()
+    with projecoes['lock']:
+        if chave in projecoes['entradas']:
+            return projecoes['entradas'][chave]
+        contar("cache.projecao.falta")
+        fluxo = projection_utils.projetar_fluxo(df_contratos, hoje, meses, readjustment_utils.carregar_indices(),
+                                                renovar)
+        if versao is not None and versao == versao_aba("Contratos"):
+            # Descarta as projeções de versões anteriores
+            projecoes['entradas'] = {k: v for k, v in projecoes['entradas'].items() if k[:2] == chave[:2]}
+            projecoes['entradas'][chave] = fluxo
+        return fluxo
+
+
+# --- BUSCA ---
+@st.cache_resource
+def _indices_busca():
+    return {'chave': None, 'indices': None, 'lock': threading.Lock()}
+
+
+def load_busca():
+    """
+    Índices de busca de contratos e imóveis (search_utils), mantidos por processo e reconstruídos
+    apenas quando muda a versão da aba de contratos ou de imóveis.
+    """
+    busca = _indices_busca()
+    with busca['lock']:
+        if busca['chave'] != (versao_aba("Contratos"), versao_aba("Imoveis")):
+            contar("cache.busca.falta")
+            dados = _load(["Contratos", "Imoveis"])
+            busca['indices'] = search_utils.construir_indices(dados["Contratos"], dados["Imoveis"])
+            # Versões das abas de que os dados foram carregados (a carga pode tê-las recarregado)
+            versoes = versoes_carregadas(dados)
+            busca['chave'] = (versoes["Contratos"], versoes["Imoveis"])
+        return busca['indices']
+
+
+# --- RESULTADOS DAS SEÇÕES DAS PÁGINAS ---
+@st.cache_resource
+def _resultados():
+    return {'secoes': {}, 'lock': threading.Lock()}
+
+
+def memorizar(secao, abas, parametros, calcular, versoes=None):
+    """
+    Resultado de `calcular()` (tabelas e gráficos de uma seção de página) mantido por processo para
+    os parâmetros informados e as versões das abas de que depende. `versoes` são as versões
+    (versoes_carregadas) dos DataFrames que `calcular()` usa; sem elas, calcular() carrega os dados
+    e valem as versões lidas antes do cálculo. O resultado só é guardado se essas versões ainda
+    forem as atuais ao fim do cálculo; quando alguma aba muda de versão, os resultados anteriores
+    da seção são descartados. O resultado é compartilhado entre sessões e não deve ser alterado.
+    """
+    if versoes is None:
+        versoes = {aba: versao_aba(aba) for aba in abas}
+    versoes = tuple(versoes.get(aba) for aba in abas)
+    resultados = _resultados()
+    with resultados['lock']:
+        entrada = resultados['secoes'].get(secao)
+        if entrada is not None and entrada['versoes'] == versoes and parametros in entrada['valores']:
+            contar("cache.secao.acerto")
+            return entrada['valores'][parametros]
+    contar("cache.secao.falta")
+    valor = calcular()
+    with resultados['lock']:
+        # Dados de uma versão anterior (ou alterados durante o cálculo) não são guardados
+        if versoes != tuple(versao_aba(aba) for aba in abas):
+            return valor
+        entrada = resultados['secoes'].get(secao)
+        if entrada is None or entrada['versoes'] != versoes:
+            entrada = resultados['secoes'][secao] = {'versoes': versoes, 'valores': {}}
+        if len(entrada['valores']) >= MAX_RESULTADOS_POR_SECAO:
+            entrada['valores'].pop(next(iter(entrada['valores'])))
+        entrada['valores'][parametros] = valor
+    return valor
+
+
+# --- ESCRITA NA PLANILHA (WRITE-BEHIND) ---
+def _executar_escrita(aba, tipo, dados, planilha=""):
+    get_armazenamento().escrever(aba, tipo, dados, planilha)
+
+
+def _apos_envio(abas):
+    """
+    Chamado depois que o journal grava na planilha. As abas que receberam só inclusões já foram
+    atualizadas no cache por `append_rows` (e as recargas incluem as que ainda estão no journal);
+    as que tiveram ranges alterados são invalidadas.
+    """
+    invalidar_abas([aba for aba, tipos in abas.items() if 'update' in tipos])
+
+
+@st.cache_resource
+def iniciar_descarregador():
+    """Inicia, uma vez por processo, a thread que envia à planilha as escritas do journal."""
+    descarregador = journal_utils.Descarregador(_executar_escrita, ao_enviar=_apos_envio)
+    descarregador.start()
+    return descarregador
+
+
+def append_rows(worksheet_name, linhas, descricao=""):
+    """
+    Registra no journal a inclusão de linhas no fim da aba; o envio acontece em segundo plano
+    (backends com escrita direta, como o SQLite, gravam na hora).
+    As linhas já entram no DataFrame em cache da aba, sem recarregá-la.
+    """
+    if get_armazenamento().escrita_direta:
+        _executar_escrita(worksheet_name, 'append', linhas)
+        _acrescentar_no_cache(worksheet_name, linhas)
+        return
+    # Linhas novas vão para a última planilha da carteira; registrá-la mantém o bloqueio por planilha
+    journal_utils.registrar(worksheet_name, 'append', linhas, descricao, _fragmentos(worksheet_name)[-1][0])
+    _acrescentar_no_cache(worksheet_name, linhas)
+    iniciar_descarregador().acordar.set()
+
+
+def _fragmentos(worksheet_name):
+    cache = _cache_abas()
+    with cache['lock']:
+        entrada = cache['abas'].get(worksheet_name)
+        return list(entrada['fragmentos']) if entrada else [("", 0)]
+
+
+def _planilha_da_linha(fragmentos, linha):
+    """(planilha, linhas das planilhas anteriores) de uma linha da aba unificada."""
+    anteriores = [0] + list(accumulate(quantidade for _, quantidade in fragmentos))
+    # Linhas depois da última parte conhecida foram acrescentadas à última planilha
+    i = min(bisect_right(anteriores, linha - 2) - 1, len(fragmentos) - 1)
+    return fragmentos[i][0], anteriores[i]
+
+
+def _rotear(worksheet_name, atualizacoes):
+    """
+    Separa as atualizações (com as linhas da aba unificada em cache) pela planilha de cada linha,
+    já com o número da linha dentro dela. Retorna {planilha: atualizações}; com uma única planilha,
+    as atualizações não mudam.
+    """
+    fragmentos = _fragmentos(worksheet_name)
+    if len(fragmentos) == 1:
+        return {fragmentos[0][0]: atualizacoes}
+    por_planilha = {}
+    for atualizacao in atualizacoes:
+        planilha, deslocamento = _planilha_da_linha(fragmentos, a1_to_rowcol(atualizacao['range'].split(':')[0])[0])
+        intervalo = re.sub(r'\d+', lambda m: str(int(m.group()) - deslocamento), atualizacao['range'])
+        por_planilha.setdefault(planilha, []).append({**atualizacao, 'range': intervalo})
+    return por_planilha
+
+
+def update_ranges(worksheet_name, atualizacoes, descricao=""):
+    """
+    Registra no journal a atualização de ranges da aba (lista de {'range': 'A2:H2', 'values': [[...]]});
+    o envio acontece em segundo plano, em uma única chamada `batch_update` junto com as vizinhas.
+    Em carteiras com várias planilhas, cada range vai para a planilha da sua linha.
+    """
+    if get_armazenamento().escrita_direta:
+        _executar_escrita(worksheet_name, 'update', atualizacoes)
+        invalidar_abas([worksheet_name])
+        return
+    for planilha, parte in _rotear(worksheet_name, atualizacoes).items():
+        journal_utils.registrar(worksheet_name, 'update', parte, descricao, planilha)
+    iniciar_descarregador().acordar.set()
+
+
+def localizar_linhas(worksheet_name, ids_registros, colunas=()):
+    """
+    Localiza registros pelo índice ID -> linha da aba em cache, sem buscas na planilha.
+    Retorna ({ID: número da linha} dos IDs encontrados, {coluna: número da coluna}).
+    """
+    cache = _cache_abas()
+    with cache['lock']:
+        _carregar_vencidas(cache, [worksheet_name])
+        entrada = cache['abas'][worksheet_name]
+        linhas = {i: entrada['indice'][i] for i in dict.fromkeys(map(str, ids_registros)) if i in entrada['indice']}
+        posicoes = {coluna: entrada['df'].columns.get_loc(coluna) + 1 for coluna in colunas}
+    return linhas, posicoes
+
+
+def versao_registro(worksheet_name, id_registro):
+    """
+    Registro como está no cache, para abrir um formulário de edição: {'versao': hash da linha,
+    'valores': {coluna: valor tipado}}. Deve ser guardado e passado a `update_record`. None se o ID não existe.
+    """
+    cache = _cache_abas()
+    with cache['lock']:
+        _carregar_vencidas(cache, [worksheet_name])
+        entrada = cache['abas'][worksheet_name]
+        linha = entrada['indice'].get(str(id_registro))
+        if linha is None:
+            return None
+        versoes = entrada['versoes_linhas']
+        return {'versao': versoes[linha - 2] if versoes is not None else None,
+                'valores': entrada['df'].iloc[linha - 2].to_dict()}
+
+
+def _iguais(a, b):
+    return (pd.isna(a) and pd.isna(b)) if pd.isna(a) or pd.isna(b) else a == b
+
+
+@st.cache_resource
+def _lock_registros():
+    """Serializa as escritas condicionais do processo: releitura, comparação e registro no journal."""
+    return threading.Lock()
+
+
+def _com_escritas_pendentes(worksheet_name, id_registro, texto, linha, planilha=""):
+    """
+    Texto da linha (lido da fonte) como ficará depois do envio das escritas ainda no journal: a
+    inclusão pendente do registro, se a linha ainda não chegou à planilha, e as atualizações
+    pendentes dessa linha, na ordem. Sem journal (escrita direta), o texto não muda.
+    """
+    if get_armazenamento().escrita_direta:
+        return texto
+    colunas = storage_utils.ESQUEMA[worksheet_name]
+    if texto is None:
+        chave = colunas.index(CHAVE_POR_ABA[worksheet_name])
+        incluidas = [linha_nova for linha_nova in journal_utils.linhas_nao_enviadas(worksheet_name, ("", planilha))
+                     if len(linha_nova) > chave and str(linha_nova[chave]) == str(id_registro)]
+        if not incluidas:
+            return None
+        texto = incluidas[0]
+    texto = (["" if valor is None else str(valor) for valor in texto] + [""] * len(colunas))[:len(colunas)]
+    for atualizacao in journal_utils.atualizacoes_nao_enviadas(worksheet_name, planilha):
+        grade = a1_range_to_grid_range(atualizacao['range'])
+        primeira_linha = grade.get('startRowIndex', 0) + 1
+        primeira_coluna = grade.get('startColumnIndex', 0)
+        for i, valores in enumerate(atualizacao['values']):
+            if primeira_linha + i == linha:
+                for j, valor in enumerate(valores[:len(colunas) - primeira_coluna]):
+                    texto[primeira_coluna + j] = "" if valor is None else str(valor)
+    return texto
+
+
+def update_record(worksheet_name, id_registro, valores, base, descricao=""):
+    """
+    Escrita condicional de um registro ({coluna: valor}) aberto em `base` (de `versao_registro`).
+    Relê só a linha do registro na fonte, com as escritas dela ainda no journal aplicadas: se a
+    versão mudou, compara célula a célula com a base.
+    Grava apenas as células que o usuário alterou; as alteradas por outra pessoa são preservadas e,
+    se as duas edições mudaram a mesma célula para valores diferentes, nada é gravado.
+    Retorna {'status': 'gravado' | 'sem_alteracoes' | 'conflito' | 'nao_encontrado', 'colunas': [...],
+    'preservadas': [...], 'conflitos': {coluna: (valor digitado, valor atual)}, 'base': nova base do
+    registro depois da gravação}.
+    """
+    resultado = {'status': 'nao_encontrado', 'colunas': [], 'preservadas': [], 'conflitos': {}, 'base': base}
+    cache = _cache_abas()
+    with cache['lock']:
+        _carregar_vencidas(cache, [worksheet_name])
+        entrada = cache['abas'][worksheet_name]
+        linha = entrada['indice'].get(str(id_registro))
+        colunas = list(entrada['df'].columns)
+    if linha is None:
+        return resultado
+
+    with _lock_registros():
+        return _gravar_registro(worksheet_name, id_registro, valores, base, descricao, resultado, linha, colunas)
+
+
+def _gravar_registro(worksheet_name, id_registro, valores, base, descricao, resultado, linha, colunas):
+    planilha, deslocamento = _planilha_da_linha(_fragmentos(worksheet_name), linha)
+    with span("dados.reler_linha"):
+        texto = get_armazenamento().ler_linha(worksheet_name, linha - deslocamento, planilha)
+    # Escritas ainda no journal entram na comparação: duas edições antes do envio não se sobrepõem
+    texto = _com_escritas_pendentes(worksheet_name, id_registro, texto, linha - deslocamento, planilha)
+    if texto is None:
+        # A linha não existe mais na fonte (registro removido fora do app)
+        invalidar_abas([worksheet_name])
+        return resultado
+    atual_texto = pd.DataFrame([(list(texto) + [""] * len(colunas))[:len(colunas)]], columns=colunas, dtype=object)
+    if atual_texto[CHAVE_POR_ABA[worksheet_name]].iloc[0] != str(id_registro):
+        # A planilha foi reorganizada (linhas removidas ou movidas): o índice em cache não vale mais
+        invalidar_abas([worksheet_name])
+        resultado['status'] = 'conflito'
+        return resultado
+    novo_texto = atual_texto.assign(**{coluna: str(valor) for coluna, valor in valores.items()})
+    atual = schema_utils.tipar(worksheet_name, atual_texto).iloc[0]
+    novo = schema_utils.tipar(worksheet_name, novo_texto).iloc[0]
+
+    minhas = [coluna for coluna in valores if not _iguais(novo[coluna], base['valores'][coluna])]
+    outras = []
+    if _versoes_linhas(atual_texto)[0] != base['versao']:
+        contar("escrita.versao_alterada")
+        outras = [coluna for coluna in colunas if not _iguais(atual[coluna], base['valores'][coluna])]
+    resultado['conflitos'] = {coluna: (valores[coluna], atual[coluna]) for coluna in minhas
+                              if coluna in outras and not _iguais(novo[coluna], atual[coluna])}
+    if resultado['conflitos']:
+        contar("escrita.conflito")
+        invalidar_abas([worksheet_name])
+        resultado['status'] = 'conflito'
+        return resultado
+
+    resultado['colunas'] = [coluna for coluna in minhas if not _iguais(novo[coluna], atual[coluna])]
+    resultado['preservadas'] = [coluna for coluna in outras if coluna not in minhas]
+    gravado = atual_texto.assign(**{coluna: novo_texto[coluna] for coluna in resultado['colunas']})
+    resultado['base'] = {'versao': _versoes_linhas(gravado)[0],
+                         'valores': schema_utils.tipar(worksheet_name, gravado).iloc[0].to_dict()}
+    if not resultado['colunas']:
+        resultado['status'] = 'sem_alteracoes'
+        return resultado
+    update_ranges(worksheet_name, [{'range': rowcol_to_a1(linha, colunas.index(coluna) + 1),
+                                    'values': [[valores[coluna]]]} for coluna in resultado['colunas']], descricao)
+    resultado['status'] = 'gravado'
+    return resultado
+
+
+def confirmar_linhas(worksheet_name, linhas):
+    """
+    Confere na fonte o ID de cada linha localizada pelo índice em cache ({ID: número da linha}),
+    lendo só as células de ID dessas linhas, em lote por planilha (ids_por_linha). As inclusões
+    ainda no journal contam como linhas seguintes às que a planilha já tem; o fim da planilha é
+    conferido nas duas células em volta dele. Retorna só as confirmadas; se alguma não confere
+    (linhas removidas ou movidas fora do app), a aba é invalidada.
+    """
+    if not linhas:
+        return {}
+    armazenamento = get_armazenamento()
+    chave = CHAVE_POR_ABA[worksheet_name]
+    fragmentos = _fragmentos(worksheet_name)
+    por_planilha = {}
+    for id_registro, linha in linhas.items():
+        planilha, deslocamento = _planilha_da_linha(fragmentos, linha)
+        por_planilha.setdefault(planilha, {})[id_registro] = linha - deslocamento
+    confirmadas = {}
+    for planilha, locais in por_planilha.items():
+        conferir = set(locais.values())
+        pendentes, ultima = [], None
+        if not armazenamento.escrita_direta and planilha == fragmentos[-1][0]:
+            # Linhas novas vão para a última planilha; no cache, as do journal vêm depois das que ela já tem
+            pendentes = journal_utils.linhas_nao_enviadas(worksheet_name, ("", planilha))
+            ultima = fragmentos[-1][1] + 1 - len(pendentes)
+            if pendentes and ultima >= 1:
+                conferir |= {ultima, ultima + 1}
+        with span("dados.conferir_ids"):
+            ids = armazenamento.ids_por_linha(worksheet_name, chave, conferir, planilha)
+        if pendentes and ultima >= 1 and ids.get(ultima, "") != "" and ids.get(ultima + 1, "") == "":
+            # A planilha termina onde o cache espera: as inclusões do journal entram logo depois
+            posicao = storage_utils.ESQUEMA[worksheet_name].index(chave)
+            for deslocamento, linha in enumerate(pendentes, start=1):
+                ids[ultima + deslocamento] = linha[posicao] if len(linha) > posicao else ""
+        confirmadas.update({id_registro: linhas[id_registro] for id_registro, local in locais.items()
+                            if str(ids.get(local, "")) == id_registro})
+    if len(confirmadas) < len(linhas):
+        contar("escrita.linha_nao_confere", len(linhas) - len(confirmadas))
+        invalidar_abas([worksheet_name])
+    return confirmadas
+
+
+def update_values(worksheet_name, valores_por_registro, descricao=""):
+    """
+    Altera colunas de vários registros, com valores próprios para cada um ({ID: {coluna: valor}}),
+    em uma única chamada `batch_update` (via journal). Antes, confere na fonte o ID de cada linha
+    (confirmar_linhas). Os novos valores já entram no DataFrame em cache da aba, sem recarregá-la.
+    Retorna a lista de IDs não encontrados ou cuja linha não conferiu; esses registros não são alterados.
+    """
+    valores_por_registro = {str(id_registro): valores for id_registro, valores in valores_por_registro.items()}
+    colunas = list(dict.fromkeys(coluna for valores in valores_por_registro.values() for coluna in valores))
+    linhas, posicoes = localizar_linhas(worksheet_name, list(valores_por_registro), colunas)
+    linhas = confirmar_linhas(worksheet_name, linhas)
+    atualizacoes = [{'range': rowcol_to_a1(linhas[id_registro], posicoes[coluna]), 'values': [[valor]]}
+                    for id_registro, valores in valores_por_registro.items() if id_registro in linhas
+                    for coluna, valor in valores.items()]
+    if atualizacoes:
+        update_ranges(worksheet_name, atualizacoes, descricao)
+        _atualizar_no_cache(worksheet_name, {id_registro: valores for id_registro, valores
+                                             in valores_por_registro.items() if id_registro in linhas})
+    return [id_registro for id_registro in valores_por_registro if id_registro not in linhas]
+
+
+def update_cells(worksheet_name, ids_registros, valores_por_coluna, descricao=""):
+    """
+    Altera as colunas informadas ({nome da coluna: valor}) de um ou mais registros, com os mesmos
+    valores para todos, em uma única chamada `batch_update` (via journal). Retorna os IDs não
+    encontrados ou cuja linha não conferiu (update_values).
+    """
+    return update_values(worksheet_name, {id_registro: valores_por_coluna for id_registro in map(str, ids_registros)},
+                         descricao)
+
+
+def cancelar_lancamentos(ids_lancamentos):
+    """
+    Marca vários lançamentos como "Cancelado" com uma única chamada `batch_update` (via journal).
+    O status só é gravado nas linhas em que o ID_Lancamento foi conferido na fonte (confirmar_linhas).
+    Retorna a lista de IDs não encontrados ou não conferidos, que não foram cancelados.
+    """
+    ids_lancamentos = list(dict.fromkeys(map(str, ids_lancamentos)))
+    return update_cells("Lancamentos_Financeiros", ids_lancamentos, {'Status_Lancamento': "Cancelado"},
+                        descricao=f"Cancelamento de {len(ids_lancamentos)} lançamento(s)")
+
+
+def reservar_ids_lancamento(quantidade=1):
+    """
+    Reserva IDs exclusivos para novos lançamentos sem baixar o histórico financeiro.
+    A cada reserva, a sequência parte de pelo menos o maior ID presente nos dados locais (cópia
+    local e cache), o que cobre linhas incluídas fora do app ou por outro servidor.
+    """
+    def maior_id_existente():
+        ids = pd.to_numeric(get_armazenamento().ler_coluna("Lancamentos_Financeiros", 'ID_Lancamento'),
+                            errors='coerce')
+        maior = max(ids.max() if ids.notna().any() else 0, len(ids))
+        entrada = _cache_abas()['abas'].get("Lancamentos_Financeiros")
+        if entrada is not None and 'ID_Lancamento' in entrada['df'].columns:
+            # O cache já inclui as linhas acrescentadas que ainda não chegaram à cópia local
+            em_cache = pd.to_numeric(entrada['df']['ID_Lancamento'], errors='coerce')
+            if em_cache.notna().any():
+                maior = max(maior, em_cache.max())
+        return maior
+
+    return sequence_utils.reservar_ids("ID_Lancamento", quantidade, maior_existente=maior_id_existente)
+
+
+def ids_atuais(worksheet_name, coluna):
+    """Valores atuais de uma coluna lidos direto da fonte, sem cache (ex.: checagem de ID duplicado)."""
+    return get_armazenamento().ids_atuais(worksheet_name, coluna)
+
+
+@medido("calculo.consultar_lancamentos")
+def consultar_lancamentos(ids_contratos=None, data_inicial=None, data_final=None):
+    """
+    Lançamentos dos contratos informados e, opcionalmente, com pagamento entre as datas.
+    Em backends SQL o filtro é executado pelo banco; nos demais, sobre o DataFrame em cache.
+    """
+    armazenamento = get_armazenamento()
+    if armazenamento.suporta_sql:
+        colunas = ", ".join(f'"{coluna}"' for coluna in storage_utils.ESQUEMA["Lancamentos_Financeiros"])
+        condicoes, parametros = [], []
+        if ids_contratos is not None:
+            condicoes.append("ID_Contrato IN (SELECT value FROM json_each(?))")
+            parametros.append(json.dumps([str(i) for i in ids_contratos]))
+        if data_inicial is not None and data_final is not None:
+            condicoes.append("Data_Pagamento BETWEEN ? AND ?")
+            parametros += [data_inicial.strftime('%Y-%m-%d'), data_final.strftime('%Y-%m-%d')]
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        df = armazenamento.consultar(
+            f'SELECT {colunas} FROM "Lancamentos_Financeiros" {where} ORDER BY {storage_utils.COLUNA_LINHA}',
+            parametros)
+        return schema_utils.tipar("Lancamentos_Financeiros", df.fillna(""))
+
+    # Os avisos de sincronização já são exibidos pelo load_all/load_data da página
+    df = _obter(["Lancamentos_Financeiros"])[0]["Lancamentos_Financeiros"]
+    if df.empty:
+        return df
+    return statement_utils.filtrar_lancamentos(df, ids_contratos, data_inicial, data_final)
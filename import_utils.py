@@ -0,0 +1,133 @@
+# import_utils.py
+"""
+Leitura de extratos bancários (CSV ou OFX) e conciliação dos créditos com os contratos ativos.
+"""
+import io
+import re
+import unicodedata
+import pandas as pd
+from metrics_utils import medido
+
+# Nomes aceitos para cada coluna do CSV (comparados sem acentos e em minúsculas)
+COLUNAS_CSV = {
+    'Data': ['data', 'date', 'data lancamento', 'data_lancamento', 'dt'],
+    'Valor': ['valor', 'amount', 'value', 'valor (r$)', 'credito'],
+    'Descricao': ['descricao', 'historico', 'memo', 'description', 'lancamento', 'detalhes'],
+    'Referencia': ['referencia', 'documento', 'id', 'fitid', 'identificador'],
+}
+
+
+def normalizar_texto(serie):
+    """Maiúsculas, sem acentos e com espaços simples: usado para comparar nomes e descrições."""
+    return (serie.fillna('').astype(str)
+            .map(lambda t: unicodedata.normalize('NFKD', t).encode('ascii', 'ignore').decode('ascii'))
+            .str.upper().str.replace(r'\s+', ' ', regex=True).str.strip())
+
+
+def _valor_brasileiro(serie):
+    """Converte valores como '1.234,56' ou '1234.56' para float."""
+    texto = serie.astype(str).str.replace(r'[R$\s]', '', regex=True)
+    formato_br = texto.str.contains(',', regex=False)
+    texto = texto.where(~formato_br, texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    return pd.to_numeric(texto, errors='coerce')
+
+
+def ler_csv(conteudo):
+    """Lê um extrato CSV (separador detectado automaticamente) no formato padronizado do extrato."""
+    if isinstance(conteudo, bytes):
+        conteudo = conteudo.decode('utf-8-sig', errors='replace')
+    bruto = pd.read_csv(io.StringIO(conteudo), sep=None, engine='python', dtype=str)
+    nomes = dict(zip(normalizar_texto(pd.Series(bruto.columns)).str.lower(), bruto.columns))
+    extrato = pd.DataFrame(index=bruto.index)
+    for coluna, candidatos in COLUNAS_CSV.items():
+        origem = next((nomes[c] for c in candidatos if c in nomes), None)
+        extrato[coluna] = bruto[origem] if origem is not None else ''
+    extrato[['Descricao', 'Referencia']] = extrato[['Descricao', 'Referencia']].fillna('')
+    extrato['Data'] = pd.to_datetime(extrato['Data'], errors='coerce', dayfirst=True)
+    extrato['Valor'] = _valor_brasileiro(extrato['Valor'])
+    return extrato
+
+
+def ler_ofx(conteudo):
+    """Lê as transações (<STMTTRN>) de um arquivo OFX, nas versões SGML ou XML."""
+    if isinstance(conteudo, bytes):
+        conteudo = conteudo.decode('latin-1')
+    transacoes = []
+    for bloco in re.findall(r'<STMTTRN>(.*?)</STMTTRN>', conteudo, flags=re.S | re.I):
+        campos = dict((k.upper(), v.strip()) for k, v in re.findall(r'<(\w+)>([^<\r\n]*)', bloco))
+        transacoes.append({
+            'Data': campos.get('DTPOSTED', '')[:8],
+            'Valor': campos.get('TRNAMT', ''),
+            'Descricao': ' '.join(filter(None, [campos.get('NAME', ''), campos.get('MEMO', '')])),
+            'Referencia': campos.get('FITID', ''),
+        })
+    extrato = pd.DataFrame(transacoes, columns=['Data', 'Valor', 'Descricao', 'Referencia'])
+    extrato['Data'] = pd.to_datetime(extrato['Data'], format='%Y%m%d', errors='coerce')
+    extrato['Valor'] = _valor_brasileiro(extrato['Valor'])
+    return extrato
+
+
+@medido("calculo.ler_extrato")
+def ler_extrato(nome_arquivo, conteudo):
+    """Escolhe o leitor pela extensão do arquivo e mantém apenas os créditos."""
+    extrato = ler_ofx(conteudo) if nome_arquivo.lower().endswith('.ofx') else ler_csv(conteudo)
+    return extrato[extrato['Valor'] > 0].reset_index(drop=True)
+
+
+def _casar_por_texto(descricoes, chaves, ids):
+    """
+    Procura, em uma única passada por expressão regular, qual das `chaves` aparece em cada descrição.
+    Chaves repetidas (ex.: dois locatários com o mesmo nome) ficam com o ID vazio.
+    """
+    mapa = pd.Series(ids.values, index=chaves.values)
+    mapa = mapa[(mapa.index != '') & ~mapa.index.duplicated(keep=False)]
+    if mapa.empty:
+        return pd.Series('', index=descricoes.index)
+    ordenadas = sorted(mapa.index, key=len, reverse=True)
+    padrao = r'\b(' + '|'.join(map(re.escape, ordenadas)) + r')\b'
+    encontrada = descricoes.str.extract(padrao, expand=False)
+    return encontrada.map(mapa).fillna('')
+
+
+@medido("calculo.conciliar")
+def conciliar(extrato, df_contratos_ativos, df_financeiro_valido):
+    """
+    Associa cada crédito do extrato a um contrato ativo, nesta ordem de prioridade:
+    ID do contrato citado na descrição/referência, nome do locatário e valor do aluguel (quando único).
+    Em seguida valida todas as linhas de uma vez e preenche a coluna Status ("OK" ou o motivo da recusa).
+    """
+    resultado = extrato.copy()
+    texto = normalizar_texto(resultado['Descricao'] + ' ' + resultado['Referencia'])
+    contratos = df_contratos_ativos[['ID_Contrato', 'Nome_Locatario', 'Valor_Aluguel_Base']].copy()
+
+    por_referencia = _casar_por_texto(texto, normalizar_texto(contratos['ID_Contrato']), contratos['ID_Contrato'])
+    por_nome = _casar_por_texto(texto, normalizar_texto(contratos['Nome_Locatario']), contratos['ID_Contrato'])
+    centavos = contratos['Valor_Aluguel_Base']  # já em centavos (schema_utils)
+    valor_unico = contratos[~centavos.duplicated(keep=False) & (centavos > 0)]
+    mapa_valor = pd.Series(valor_unico['ID_Contrato'].values, index=centavos[valor_unico.index].values)
+    por_valor = (resultado['Valor'] * 100).round().map(mapa_valor).fillna('')
+
+    resultado['ID_Contrato'] = por_referencia.where(por_referencia != '', por_nome.where(por_nome != '', por_valor))
+    resultado['Criterio'] = 'Valor'
+    resultado.loc[por_nome != '', 'Criterio'] = 'Nome'
+    resultado.loc[por_referencia != '', 'Criterio'] = 'Referência'
+    resultado.loc[resultado['ID_Contrato'] == '', 'Criterio'] = ''
+    resultado['Mes_Referencia'] = resultado['Data'].dt.strftime('%m/%Y')
+
+    # --- VALIDAÇÃO VETORIZADA ---
+    chave = resultado['ID_Contrato'] + '|' + resultado['Mes_Referencia'].fillna('')
+    ja_lancados = set(df_financeiro_valido['ID_Contrato'].astype(str) + '|' + df_financeiro_valido['Mes_Referencia'])
+    resultado['Status'] = 'OK'
+    resultado.loc[chave.duplicated(keep='first'), 'Status'] = 'Duplicado no extrato'
+    resultado.loc[chave.isin(ja_lancados), 'Status'] = 'Já lançado no mês'
+    resultado.loc[resultado['Data'].isna(), 'Status'] = 'Data inválida'
+    resultado.loc[resultado['Valor'].isna() | (resultado['Valor'] <= 0), 'Status'] = 'Valor inválido'
+    resultado.loc[resultado['ID_Contrato'] == '', 'Status'] = 'Contrato não identificado'
+    return resultado
+
+
+def montar_linhas(conciliados, ids, forma_pagamento):
+    """Monta as linhas da aba Lancamentos_Financeiros para os créditos aceitos, na ordem das colunas da planilha."""
+    return [[id_lancamento, row.ID_Contrato, row.Mes_Referencia, row.Data.strftime("%Y-%m-%d"), float(row.Valor),
+             0.0, float(row.Valor), forma_pagamento, "Pago", "Válido"]
+            for id_lancamento, row in zip(ids, conciliados.itertuples(index=False))]
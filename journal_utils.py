@@ -0,0 +1,230 @@
+# journal_utils.py
+"""
+Journal local (SQLite) das escritas na planilha.
+As páginas registram a escrita e retornam na hora; um descarregador em segundo plano
+envia as escritas em ordem, juntando as consecutivas da mesma aba em uma única chamada,
+com novas tentativas e espera crescente em caso de erro. Uma escrita que falha de vez bloqueia
+as seguintes da mesma aba e planilha até ser reenviada ou descartada.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import closing
+from filelock import FileLock, Timeout
+from snapshot_utils import SNAPSHOT_DIR
+
+ARQUIVO_JOURNAL = os.path.join(SNAPSHOT_DIR, "journal.sqlite3")
+MAX_TENTATIVAS = 5
+ESPERA_BASE = 2  # segundos; dobra a cada nova tentativa
+DIAS_HISTORICO = 7  # escritas já enviadas são apagadas depois deste prazo
+
+TIPOS = ('append', 'update')
+
+
+def _conectar():
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    conexao = sqlite3.connect(ARQUIVO_JOURNAL, timeout=30, isolation_level=None)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("""
+        CREATE TABLE IF NOT EXISTS escritas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            aba TEXT NOT NULL,
+            planilha TEXT NOT NULL DEFAULT '',
+            tipo TEXT NOT NULL,
+            dados TEXT NOT NULL,
+            descricao TEXT,
+            status TEXT NOT NULL DEFAULT 'pendente',
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            proxima_tentativa REAL NOT NULL DEFAULT 0,
+            erro TEXT,
+            criado_em REAL NOT NULL,
+            enviado_em REAL
+        )""")
+    if 'planilha' not in {coluna[1] for coluna in conexao.execute("PRAGMA table_info(escritas)")}:
+        # Journals criados antes das carteiras em várias planilhas
+        conexao.execute("ALTER TABLE escritas ADD COLUMN planilha TEXT NOT NULL DEFAULT ''")
+    return conexao
+
+
+def _para_json(valor):
+    """Converte tipos do numpy/pandas e datas para valores aceitos pela API."""
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return str(valor)
+
+
+# --- REGISTRO E CONSULTA ---
+def registrar(aba, tipo, dados, descricao="", planilha=""):
+    """
+    Registra uma escrita e retorna seu ID no journal.
+    tipo 'append': `dados` é a lista de linhas; tipo 'update': lista de {'range': ..., 'values': ...}.
+    `planilha` identifica a planilha de destino em carteiras divididas em várias planilhas.
+    """
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de escrita desconhecido: {tipo}")
+    with closing(_conectar()) as conexao:
+        cursor = conexao.execute(
+            "INSERT INTO escritas (aba, planilha, tipo, dados, descricao, criado_em) VALUES (?, ?, ?, ?, ?, ?)",
+            (aba, planilha, tipo, json.dumps(dados, default=_para_json, ensure_ascii=False), descricao, time.time()))
+        return cursor.lastrowid
+
+
+def resumo():
+    """Quantidade de escritas por status ('pendente', 'enviada', 'falhou')."""
+    with closing(_conectar()) as conexao:
+        return dict(conexao.execute("SELECT status, COUNT(*) FROM escritas GROUP BY status").fetchall())
+
+
+def listar(status=('pendente', 'falhou'), limite=50):
+    """Escritas com os status informados, das mais antigas para as mais novas."""
+    marcadores = ", ".join("?" * len(status))
+    with closing(_conectar()) as conexao:
+        conexao.row_factory = sqlite3.Row
+        linhas = conexao.execute(
+            f"SELECT id, aba, tipo, descricao, status, tentativas, erro, criado_em FROM escritas "
+            f"WHERE status IN ({marcadores}) ORDER BY id LIMIT ?", (*status, limite)).fetchall()
+    return [dict(linha) for linha in linhas]
+
+
+def linhas_nao_enviadas(aba, planilhas=("",)):
+    """
+    Linhas das inclusões na aba ainda não enviadas (pendentes ou que falharam), na ordem em que
+    foram registradas: ao serem enviadas, entram depois das linhas que a planilha já tem.
+    """
+    marcadores = ", ".join("?" * len(planilhas))
+    with closing(_conectar()) as conexao:
+        registros = conexao.execute(
+            f"SELECT dados FROM escritas WHERE aba = ? AND tipo = 'append' AND status IN ('pendente', 'falhou') "
+            f"AND planilha IN ({marcadores}) ORDER BY id", (aba, *planilhas)).fetchall()
+    return [linha for (dados,) in registros for linha in json.loads(dados)]
+
+
+def atualizacoes_nao_enviadas(aba, planilha=""):
+    """Atualizações de ranges da aba na planilha ainda não enviadas, na ordem em que foram registradas."""
+    with closing(_conectar()) as conexao:
+        registros = conexao.execute(
+            "SELECT dados FROM escritas WHERE aba = ? AND tipo = 'update' AND status IN ('pendente', 'falhou') "
+            "AND planilha = ? ORDER BY id", (aba, planilha)).fetchall()
+    return [atualizacao for (dados,) in registros for atualizacao in json.loads(dados)]
+
+
+def bloqueios():
+    """(aba, planilha) com escritas que falharam: as escritas seguintes nelas esperam a falha ser resolvida."""
+    with closing(_conectar()) as conexao:
+        return set(conexao.execute("SELECT DISTINCT aba, planilha FROM escritas WHERE status = 'falhou'").fetchall())
+
+
+def reenviar_falhas():
+    """Devolve à fila as escritas que falharam, zerando as tentativas."""
+    with closing(_conectar()) as conexao:
+        conexao.execute("UPDATE escritas SET status = 'pendente', tentativas = 0, proxima_tentativa = 0 "
+                        "WHERE status = 'falhou'")
+
+
+def descartar_falhas():
+    """
+    Descarta as escritas que falharam, liberando as seguintes das mesmas abas.
+    Retorna as abas afetadas, cujos dados em cache precisam ser relidos da planilha.
+    """
+    with closing(_conectar()) as conexao:
+        abas = {aba for (aba,) in conexao.execute("SELECT DISTINCT aba FROM escritas WHERE status = 'falhou'")}
+        conexao.execute("UPDATE escritas SET status = 'descartada' WHERE status = 'falhou'")
+    return abas
+
+
+# --- ENVIO ---
+def _agrupar(linhas):
+    """Junta escritas consecutivas da mesma aba, planilha e tipo, preservando a ordem."""
+    grupos = []
+    for linha in linhas:
+        if grupos and all(grupos[-1][chave] == linha[chave] for chave in ('aba', 'planilha', 'tipo')):
+            grupo = grupos[-1]
+        else:
+            grupo = {'aba': linha['aba'], 'planilha': linha['planilha'], 'tipo': linha['tipo'], 'ids': [],
+                     'dados': [], 'tentativas': 0, 'proxima_tentativa': 0}
+            grupos.append(grupo)
+        grupo['ids'].append(linha['id'])
+        grupo['dados'].extend(json.loads(linha['dados']))
+        grupo['tentativas'] = max(grupo['tentativas'], linha['tentativas'])
+        grupo['proxima_tentativa'] = max(grupo['proxima_tentativa'], linha['proxima_tentativa'])
+    return grupos
+
+
+def descarregar(executar, limite=500):
+    """
+    Envia as escritas pendentes, na ordem em que foram registradas, chamando
+    `executar(aba, tipo, dados, planilha)` uma vez por grupo de escritas consecutivas da mesma aba.
+    Um grupo com erro interrompe o envio (nada passa à frente dele) até a próxima tentativa;
+    após MAX_TENTATIVAS ele é marcado como 'falhou' e a fila segue só para as outras abas e
+    planilhas: as escritas seguintes da mesma aba e planilha ficam retidas (nem entram na leitura
+    da fila) até a falha ser reenviada ou descartada, pois podem depender dela (ex.: atualização
+    de uma linha incluída pelo grupo que falhou).
+    Retorna {'enviadas': n, 'abas': {aba: tipos de escrita enviados}}.
+    """
+    resultado = {'enviadas': 0, 'abas': {}}
+    try:
+        # Garante um único descarregador por vez, mesmo com vários processos no servidor
+        lock = FileLock(f"{ARQUIVO_JOURNAL}.lock", timeout=0)
+        lock.acquire()
+    except Timeout:
+        return resultado
+    try:
+        with closing(_conectar()) as conexao:
+            conexao.row_factory = sqlite3.Row
+            pendentes = conexao.execute(
+                "SELECT * FROM escritas AS e WHERE status = 'pendente' AND NOT EXISTS ("
+                "SELECT 1 FROM escritas AS f WHERE f.status = 'falhou' AND f.aba = e.aba AND f.planilha = e.planilha) "
+                "ORDER BY id LIMIT ?", (limite,)).fetchall()
+            for grupo in _agrupar(pendentes):
+                agora = time.time()
+                if grupo['proxima_tentativa'] > agora:
+                    break
+                marcadores = ", ".join("?" * len(grupo['ids']))
+                try:
+                    executar(grupo['aba'], grupo['tipo'], grupo['dados'], grupo['planilha'])
+                except Exception as e:
+                    tentativas = grupo['tentativas'] + 1
+                    status = 'falhou' if tentativas >= MAX_TENTATIVAS else 'pendente'
+                    conexao.execute(
+                        f"UPDATE escritas SET status = ?, tentativas = ?, proxima_tentativa = ?, erro = ? "
+                        f"WHERE id IN ({marcadores})",
+                        (status, tentativas, agora + ESPERA_BASE * 2 ** tentativas, str(e), *grupo['ids']))
+                    break
+                conexao.execute(f"UPDATE escritas SET status = 'enviada', enviado_em = ?, erro = NULL "
+                                f"WHERE id IN ({marcadores})", (time.time(), *grupo['ids']))
+                resultado['enviadas'] += len(grupo['ids'])
+                resultado['abas'].setdefault(grupo['aba'], set()).add(grupo['tipo'])
+            limite_historico = time.time() - DIAS_HISTORICO * 86400
+            conexao.execute("DELETE FROM escritas WHERE (status = 'enviada' AND enviado_em < ?) "
+                            "OR (status = 'descartada' AND criado_em < ?)", (limite_historico, limite_historico))
+    finally:
+        lock.release()
+    return resultado
+
+
+class Descarregador(threading.Thread):
+    """
+    Thread que descarrega o journal periodicamente, ou assim que `acordar` é sinalizado.
+    `ao_enviar(abas)` é chamado depois de cada envio bem-sucedido, com os tipos de escrita por aba.
+    """
+
+    def __init__(self, executar, ao_enviar=None, intervalo=5.0):
+        super().__init__(name="descarregador-journal", daemon=True)
+        self.executar = executar
+        self.ao_enviar = ao_enviar
+        self.intervalo = intervalo
+        self.acordar = threading.Event()
+
+    def run(self):
+        while True:
+            self.acordar.wait(self.intervalo)
+            self.acordar.clear()
+            try:
+                resultado = descarregar(self.executar)
+                if resultado['enviadas'] and self.ao_enviar:
+                    self.ao_enviar(resultado['abas'])
+            except Exception:
+                # Erros de envio já ficam registrados no journal; aqui só se evita que a thread morra
+                continue
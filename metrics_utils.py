@@ -0,0 +1,180 @@
+# metrics_utils.py
+"""
+Rastreamento leve de desempenho: spans (trechos cronometrados) agrupados por execução de
+página, contadores (chamadas à API, acertos e faltas de cache) e uso da cota da API do Sheets.
+Os dados ficam em memória no processo; cada execução finalizada também é acrescentada ao
+arquivo local de métricas (JSON Lines), que guarda só os registros mais recentes.
+"""
+import os
+import json
+import time
+import threading
+import functools
+from collections import Counter, deque
+from contextlib import contextmanager
+from filelock import FileLock
+from snapshot_utils import SNAPSHOT_DIR
+
+ARQUIVO_METRICAS = os.path.join(SNAPSHOT_DIR, "metricas.jsonl")
+MAX_EXECUCOES = 200
+MAX_AMOSTRAS_POR_SPAN = 500
+# O arquivo de métricas é reduzido aos últimos MAX_REGISTROS_ARQUIVO registros ao passar do tamanho máximo
+MAX_REGISTROS_ARQUIVO = 2000
+TAMANHO_MAXIMO_ARQUIVO = 5 * 1024 * 1024  # bytes
+# Limites padrão da API do Google Sheets, por minuto e por usuário da conta de serviço
+LIMITE_LEITURAS_POR_MINUTO = 60
+LIMITE_ESCRITAS_POR_MINUTO = 60
+
+_lock = threading.Lock()
+_local = threading.local()
+_execucoes = deque(maxlen=MAX_EXECUCOES)
+_amostras = {}
+_contadores = Counter()
+_chamadas_api = deque(maxlen=10000)
+
+
+# --- EXECUÇÕES DE PÁGINA ---
+def iniciar_execucao(pagina):
+    """Abre o registro de uma execução (rerun) de página na thread atual e o retorna."""
+    execucao = {'pagina': pagina, 'inicio': time.time(), 'duracao': None, 'spans': [], 'contadores': Counter(),
+                '_relogio': time.perf_counter(), '_pilha': []}
+    _local.execucao = execucao
+    return execucao
+
+
+def execucao_atual():
+    """Execução de página em andamento na thread atual, ou None."""
+    execucao = getattr(_local, 'execucao', None)
+    return execucao if execucao is not None and execucao['duracao'] is None else None
+
+
+def finalizar_execucao(execucao=None, interrompida=False):
+    """
+    Fecha a execução (por padrão, a da thread atual), guarda-a entre as recentes e a
+    acrescenta ao arquivo de métricas. Execuções já finalizadas são ignoradas.
+    """
+    execucao = execucao or getattr(_local, 'execucao', None)
+    if execucao is None or execucao['duracao'] is not None:
+        return
+    if interrompida:
+        # Sem o fim explícito (st.stop, erro), a execução vai até o fim do último span
+        fim = max((s['inicio'] + s['duracao'] for s in execucao['spans']), default=0.0)
+    else:
+        fim = time.perf_counter() - execucao['_relogio']
+    execucao['duracao'] = fim
+    execucao['interrompida'] = interrompida
+    if getattr(_local, 'execucao', None) is execucao:
+        _local.execucao = None
+    registro = {chave: valor for chave, valor in execucao.items() if not chave.startswith('_')}
+    with _lock:
+        _execucoes.append(registro)
+    _gravar(registro)
+
+
+def _gravar(registro):
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        with open(ARQUIVO_METRICAS, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+            tamanho = f.tell()
+        if tamanho > TAMANHO_MAXIMO_ARQUIVO:
+            _reduzir_arquivo()
+    except OSError:
+        # As métricas nunca devem interromper o app
+        pass
+
+
+def _reduzir_arquivo():
+    """Mantém no arquivo só os últimos MAX_REGISTROS_ARQUIVO registros (troca atômica do arquivo)."""
+    with FileLock(f"{ARQUIVO_METRICAS}.lock"):
+        if os.path.getsize(ARQUIVO_METRICAS) <= TAMANHO_MAXIMO_ARQUIVO:
+            # Outro processo já reduziu o arquivo
+            return
+        with open(ARQUIVO_METRICAS, encoding="utf-8") as f:
+            recentes = deque(f, maxlen=MAX_REGISTROS_ARQUIVO)
+        tmp = f"{ARQUIVO_METRICAS}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(recentes)
+        os.replace(tmp, ARQUIVO_METRICAS)
+
+
+# --- SPANS E CONTADORES ---
+@contextmanager
+def span(nome):
+    """Cronometra o bloco; o span entra na execução da página atual (se houver) e nas estatísticas."""
+    execucao = getattr(_local, 'execucao', None)
+    inicio = time.perf_counter()
+    if execucao is not None:
+        execucao['_pilha'].append(nome)
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        if execucao is not None:
+            execucao['_pilha'].pop()
+            execucao['spans'].append({'nome': nome, 'inicio': inicio - execucao['_relogio'], 'duracao': duracao,
+                                      'nivel': len(execucao['_pilha'])})
+        with _lock:
+            _amostras.setdefault(nome, deque(maxlen=MAX_AMOSTRAS_POR_SPAN)).append(duracao)
+
+
+def medido(nome):
+    """Decorador: cronometra cada chamada da função como um span."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with span(nome):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def contar(nome, quantidade=1):
+    """Incrementa um contador do processo (e o da execução de página atual)."""
+    with _lock:
+        _contadores[nome] += quantidade
+    execucao = getattr(_local, 'execucao', None)
+    if execucao is not None:
+        execucao['contadores'][nome] += quantidade
+
+
+def registrar_chamada_api(tipo):
+    """Conta uma chamada à API do Sheets ('leitura' ou 'escrita') para os contadores e a cota."""
+    contar(f"api.{tipo}")
+    with _lock:
+        _chamadas_api.append((time.time(), tipo))
+
+
+# --- CONSULTAS PARA A PÁGINA DE DESEMPENHO ---
+def execucoes_recentes():
+    with _lock:
+        return list(_execucoes)
+
+
+def contadores():
+    with _lock:
+        return dict(_contadores)
+
+
+def estatisticas_spans():
+    """Quantidade, média, p95 e máximo (em segundos) das amostras recentes de cada span."""
+    with _lock:
+        amostras = {nome: sorted(valores) for nome, valores in _amostras.items()}
+    return [{'span': nome, 'chamadas': len(valores), 'media_s': sum(valores) / len(valores),
+             'p95_s': valores[min(len(valores) - 1, int(len(valores) * 0.95))], 'max_s': valores[-1]}
+            for nome, valores in amostras.items() if valores]
+
+
+def uso_de_cota(janela=60):
+    """Chamadas à API nos últimos `janela` segundos, por tipo, com os limites por minuto."""
+    limite = time.time() - janela
+    with _lock:
+        recentes = Counter(tipo for momento, tipo in _chamadas_api if momento >= limite)
+    return {'leitura': (recentes['leitura'], LIMITE_LEITURAS_POR_MINUTO),
+            'escrita': (recentes['escrita'], LIMITE_ESCRITAS_POR_MINUTO)}
+
+
+def exportar_resumo():
+    """Acrescenta ao arquivo de métricas um resumo com os contadores e as estatísticas dos spans."""
+    _gravar({'resumo': True, 'momento': time.time(), 'contadores': contadores(), 'spans': estatisticas_spans()})
+    return ARQUIVO_METRICAS
@@ -0,0 +1,98 @@
+import os
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from datetime import datetime
+from auth_utils import admin_guard, page_guard
+from metrics_utils import finalizar_execucao
+import metrics_utils
+
+page_guard()
+admin_guard()
+
+
+# --- CONFIGURAÇÃO DA PÁGINA ---
+st.set_page_config(page_title="Desempenho", page_icon="⏱️", layout="wide")
+st.title("⏱️ Desempenho do App")
+st.markdown("---")
+
+
+# --- COTA DA API DO GOOGLE SHEETS ---
+st.header("Uso da Cota da API (último minuto)")
+col_leitura, col_escrita = st.columns(2)
+for coluna, (tipo, (usadas, limite)) in zip([col_leitura, col_escrita], metrics_utils.uso_de_cota().items()):
+    coluna.metric(f"Chamadas de {tipo}", f"{usadas} / {limite}")
+    coluna.progress(min(usadas / limite, 1.0))
+
+# --- CONTADORES ---
+st.header("Contadores do Processo")
+contadores = metrics_utils.contadores()
+acertos, faltas = contadores.get('cache.acerto', 0), contadores.get('cache.falta', 0)
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Leituras na API", contadores.get('api.leitura', 0))
+col2.metric("Escritas na API", contadores.get('api.escrita', 0))
+col3.metric("Acertos / Faltas de cache", f"{acertos} / {faltas}")
+col4.metric("Taxa de acerto do cache", f"{acertos / (acertos + faltas) * 100:.1f}%" if acertos + faltas else "-")
+
+# --- EXECUÇÕES RECENTES ---
+st.header("Execuções Recentes das Páginas")
+execucoes = metrics_utils.execucoes_recentes()
+if execucoes:
+    df_execucoes = pd.DataFrame([{
+        'Página': e['pagina'],
+        'Início': datetime.fromtimestamp(e['inicio']).strftime('%d/%m %H:%M:%S'),
+        'Duração (s)': round(e['duracao'], 3),
+        'Chamadas à API': e['contadores'].get('api.leitura', 0) + e['contadores'].get('api.escrita', 0),
+        'Faltas de cache': e['contadores'].get('cache.falta', 0),
+        'Interrompida': e['interrompida'],
+    } for e in reversed(execucoes)])
+
+    st.subheader("Duração por página")
+    resumo = (df_execucoes.groupby('Página')['Duração (s)']
+              .agg(Execuções='count', Média='mean', P95=lambda d: d.quantile(0.95), Máximo='max').reset_index())
+    st.dataframe(resumo, use_container_width=True, hide_index=True)
+
+    st.subheader("Últimas execuções")
+    st.dataframe(df_execucoes, use_container_width=True, hide_index=True)
+
+    st.subheader("Detalhe de uma execução")
+    escolhida = st.selectbox("Execução", range(len(execucoes)),
+                             format_func=lambda i: f"{df_execucoes.loc[i, 'Início']} - {df_execucoes.loc[i, 'Página']} "
+                                                   f"({df_execucoes.loc[i, 'Duração (s)']} s)")
+    spans = pd.DataFrame(list(reversed(execucoes))[escolhida]['spans'])
+    if not spans.empty:
+        spans['Trecho'] = ['  ' * nivel + nome for nivel, nome in zip(spans['nivel'], spans['nome'])]
+        spans = spans.sort_values('inicio')
+        fig_spans = px.bar(spans, x='duracao', y='Trecho', orientation='h', base='inicio',
+                           labels={'duracao': 'Segundos desde o início da execução', 'Trecho': ''},
+                           title="Linha do tempo dos spans")
+        fig_spans.update_yaxes(autorange='reversed')
+        st.plotly_chart(fig_spans, use_container_width=True)
+    else:
+        st.info("Nenhum span registrado nesta execução.")
+else:
+    st.info("Nenhuma execução registrada desde que o servidor foi iniciado.")
+
+# --- ESTATÍSTICAS POR SPAN ---
+st.header("Estatísticas por Trecho")
+estatisticas = metrics_utils.estatisticas_spans()
+if estatisticas:
+    df_spans = pd.DataFrame(estatisticas).sort_values('p95_s', ascending=False)
+    st.dataframe(df_spans, use_container_width=True, hide_index=True,
+                 column_config={coluna: st.column_config.NumberColumn(format="%.4f")
+                                for coluna in ['media_s', 'p95_s', 'max_s']})
+
+# --- EXPORTAÇÃO ---
+st.header("Exportar Métricas")
+st.caption(f"Cada execução de página é acrescentada ao arquivo local `{metrics_utils.ARQUIVO_METRICAS}` (JSON Lines), "
+           f"que mantém os últimos {metrics_utils.MAX_REGISTROS_ARQUIVO} registros.")
+if st.button("Acrescentar resumo (contadores e estatísticas) ao arquivo"):
+    st.success(f"Resumo gravado em {metrics_utils.exportar_resumo()}.")
+# O arquivo só é lido quando o download é pedido, não a cada execução da página
+if os.path.exists(metrics_utils.ARQUIVO_METRICAS) and st.button("Preparar arquivo de métricas para download"):
+    with open(metrics_utils.ARQUIVO_METRICAS, "rb") as f:
+        st.download_button("Baixar arquivo de métricas", f.read(), file_name="metricas.jsonl",
+                           mime="application/jsonl", on_click="ignore")
+
+# --- MÉTRICAS DE DESEMPENHO ---
+finalizar_execucao()
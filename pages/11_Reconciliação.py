@@ -0,0 +1,53 @@
+import streamlit as st
+import pandas as pd
+from auth_utils import page_guard
+from metrics_utils import finalizar_execucao
+from data_utils import load_all
+from reconciliation_utils import VERIFICACOES, reconciliar, resumo
+
+page_guard()
+
+
+# --- CONFIGURAÇÃO DA PÁGINA ---
+st.set_page_config(page_title="Reconciliação", page_icon="🧮", layout="wide")
+st.title("🧮 Reconciliação dos Dados")
+st.write("Registros de imóveis, contratos e lançamentos que se contradizem, com a linha da planilha "
+         "e a ação sugerida para cada um.")
+st.markdown("---")
+
+# --- CARREGAMENTO DOS DADOS ---
+dados = load_all()
+
+# --- EXIBIÇÃO DA PÁGINA ---
+if not dados["Imoveis"].empty and not dados["Contratos"].empty:
+    relatorio = reconciliar(dados)
+    contagem = resumo(relatorio)
+
+    st.header("Resumo")
+    colunas = st.columns(3)
+    for i, (verificacao, quantidade) in enumerate(contagem.items()):
+        colunas[i % 3].metric(verificacao, quantidade)
+
+    st.markdown("---")
+    if relatorio.empty:
+        st.success("Nenhuma inconsistência encontrada! 🎉")
+    else:
+        st.header(f"{len(relatorio)} Registro(s) a Corrigir")
+        verificacoes = ["Todas"] + [v for v in VERIFICACOES if contagem[v]]
+        verificacao_selecionada = st.selectbox("Filtrar por verificação", verificacoes)
+        df_exibicao = relatorio
+        if not relatorio['Planilha'].astype(bool).any():
+            # Carteira em uma única planilha
+            df_exibicao = relatorio.drop(columns='Planilha')
+        if verificacao_selecionada != "Todas":
+            df_exibicao = df_exibicao[df_exibicao['Verificacao'] == verificacao_selecionada]
+        st.dataframe(df_exibicao, use_container_width=True, hide_index=True,
+                     column_config={'Linha': st.column_config.NumberColumn("Linha na planilha", format="%d")})
+        st.download_button("Baixar relatório (CSV)", relatorio.to_csv(index=False).encode('utf-8-sig'),
+                           file_name=f"reconciliacao_{pd.Timestamp.now():%Y%m%d}.csv", mime="text/csv")
+    st.caption("O mesmo relatório pode ser gerado fora do app: `python reconciliation_utils.py --saida relatorio.csv`.")
+else:
+    st.warning("Não foi possível carregar os dados das abas 'Imoveis' e 'Contratos'.")
+
+# --- MÉTRICAS DE DESEMPENHO ---
+finalizar_execucao()
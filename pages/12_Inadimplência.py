@@ -0,0 +1,80 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from auth_utils import page_guard
+from metrics_utils import finalizar_execucao
+from data_utils import load_all, load_recebimentos
+from arrears_utils import FAIXAS, aging, cobrancas_em_aberto
+from schema_utils import reais
+
+page_guard()
+
+
+# --- CONFIGURAÇÃO DA PÁGINA ---
+st.set_page_config(page_title="Inadimplência", page_icon="📉", layout="wide")
+st.title("📉 Inadimplência")
+st.write("Cobranças mensais vencidas e não pagas em todo o histórico dos contratos, por faixa de atraso.")
+st.markdown("---")
+
+# --- CARREGAMENTO DOS DADOS ---
+dados = load_all()
+df_imoveis = dados["Imoveis"]
+df_contratos = dados["Contratos"]
+
+# --- EXIBIÇÃO DA PÁGINA ---
+if not df_contratos.empty:
+    hoje = datetime.now()
+    em_aberto = cobrancas_em_aberto(df_contratos, load_recebimentos(dados["Lancamentos_Financeiros"]), hoje)
+
+    # --- FILTROS ---
+    st.sidebar.header("Filtros")
+    gestores = ["Todos"] + sorted(df_contratos['Gestor_Responsavel'].astype(str).unique())
+    gestor_selecionado = st.sidebar.selectbox("Filtrar por Gestor", gestores)
+    grupos = ["Todos"] + sorted(df_imoveis['Grupo'].astype(str).unique()) if not df_imoveis.empty else ["Todos"]
+    grupo_selecionado = st.sidebar.selectbox("Filtrar por Grupo", grupos)
+    if gestor_selecionado != "Todos":
+        contratos_do_gestor = df_contratos.loc[df_contratos['Gestor_Responsavel'] == gestor_selecionado, 'ID_Contrato']
+        em_aberto = em_aberto[em_aberto['ID_Contrato'].isin(contratos_do_gestor)]
+    if grupo_selecionado != "Todos":
+        imoveis_do_grupo = df_imoveis.loc[df_imoveis['Grupo'] == grupo_selecionado, 'ID_Imovel']
+        contratos_do_grupo = df_contratos.loc[df_contratos['ID_Imovel'].isin(imoveis_do_grupo), 'ID_Contrato']
+        em_aberto = em_aberto[em_aberto['ID_Contrato'].isin(contratos_do_grupo)]
+
+    # --- RESUMO POR FAIXA ---
+    st.header("Saldo em Aberto por Faixa de Atraso (dias)")
+    por_faixa = em_aberto.groupby('Faixa', observed=False)['Em_Aberto'].sum().reindex(FAIXAS, fill_value=0)
+    colunas = st.columns(len(FAIXAS) + 1)
+    for coluna, (faixa, valor) in zip(colunas, por_faixa.items()):
+        coluna.metric(faixa, f"R$ {reais(valor):,.2f}")
+    colunas[-1].metric("Total", f"R$ {reais(por_faixa.sum()):,.2f}",
+                       f"{em_aberto['ID_Contrato'].nunique()} contrato(s)", delta_color="off")
+
+    if em_aberto.empty:
+        st.success("Nenhuma cobrança em aberto! 🎉")
+    else:
+        formato_valores = {coluna: st.column_config.NumberColumn(f"{coluna} (R$)", format="%.2f")
+                           for coluna in FAIXAS + ['Total', 'Esperado', 'Pago', 'Em_Aberto']}
+        aba_contrato, aba_gestor, aba_grupo, aba_cobrancas = st.tabs(
+            ["Por Contrato", "Por Gestor", "Por Grupo", "Cobranças em Aberto"])
+        for aba, por in [(aba_contrato, 'ID_Contrato'), (aba_gestor, 'Gestor_Responsavel'), (aba_grupo, 'Grupo')]:
+            with aba:
+                tabela = aging(em_aberto, df_contratos, df_imoveis, por=por)
+                if por == 'ID_Contrato':
+                    tabela = pd.merge(df_contratos[['ID_Contrato', 'Nome_Locatario', 'Status_Contrato']], tabela,
+                                      on='ID_Contrato').sort_values('Total', ascending=False)
+                tabela[FAIXAS + ['Total']] = reais(tabela[FAIXAS + ['Total']])
+                st.dataframe(tabela, use_container_width=True, hide_index=True,
+                             column_config={**formato_valores, 'Maior_Atraso': "Maior atraso (dias)"})
+        with aba_cobrancas:
+            cobrancas = em_aberto.sort_values(['Dias_Atraso', 'ID_Contrato'], ascending=[False, True])
+            cobrancas = cobrancas.assign(**{c: reais(cobrancas[c]) for c in ['Esperado', 'Pago', 'Em_Aberto']})
+            st.dataframe(cobrancas, use_container_width=True, hide_index=True,
+                         column_config={**formato_valores,
+                                        'Vencimento': st.column_config.DateColumn(format="DD/MM/YYYY")})
+        st.caption("O valor esperado de cada mês é o aluguel base atual do contrato; pagamentos a mais em um "
+                   "mês não abatem os outros meses.")
+else:
+    st.warning("Nenhum dado de contrato encontrado na planilha.")
+
+# --- MÉTRICAS DE DESEMPENHO ---
+finalizar_execucao()
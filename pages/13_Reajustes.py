@@ -0,0 +1,94 @@
+import os
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from auth_utils import page_guard
+from metrics_utils import finalizar_execucao
+from data_utils import load_data, update_values
+from readjustment_utils import (ARQUIVO_INDICES, carregar_indices, resumo_indices, previa_reajustes,
+                                valores_para_gravar)
+from schema_utils import reais
+
+page_guard()
+
+
+# --- CONFIGURAÇÃO DA PÁGINA ---
+st.set_page_config(page_title="Reajustes", page_icon="📈", layout="wide")
+st.title("📈 Reajuste Anual dos Aluguéis")
+st.write("Prévia dos novos aluguéis dos contratos que fazem aniversário no mês, pelo índice de cada contrato "
+         "acumulado nos 12 meses anteriores, e aplicação de todos de uma vez.")
+st.markdown("---")
+
+# --- TABELA DE ÍNDICES ---
+st.header("Índices")
+indices = carregar_indices()
+if indices.empty:
+    st.info(f"Nenhum arquivo de índices encontrado em `{ARQUIVO_INDICES}`. Envie um CSV abaixo.")
+else:
+    st.dataframe(resumo_indices(indices), use_container_width=True, hide_index=True)
+with st.expander("Atualizar arquivo de índices"):
+    st.caption("CSV com as colunas Indice, Mes e Variacao (variação mensal em %), uma linha por índice e mês. "
+               "Ex.: `IGP-M;01/2025;0,27`. O arquivo enviado substitui o atual.")
+    arquivo = st.file_uploader("Arquivo de índices", type=["csv"])
+    if arquivo is not None and st.button("Salvar índices"):
+        novos = carregar_indices(arquivo)
+        if novos.empty:
+            st.error("Nenhuma linha válida no arquivo enviado.")
+        else:
+            os.makedirs(os.path.dirname(ARQUIVO_INDICES), exist_ok=True)
+            with open(ARQUIVO_INDICES, 'wb') as destino:
+                destino.write(arquivo.getvalue())
+            st.success(f"{len(novos)} variações mensais salvas.")
+            st.rerun()
+
+st.markdown("---")
+
+# --- CARREGAMENTO DOS DADOS ---
+df_contratos = load_data("Contratos")
+
+# --- PRÉVIA DOS REAJUSTES ---
+if not df_contratos.empty:
+    st.header("Prévia")
+    hoje = pd.Timestamp(datetime.now()).to_period('M')
+    meses = [hoje + deslocamento for deslocamento in range(-12, 3)]
+    col1, col2 = st.columns(2)
+    mes = col1.selectbox("Mês de aplicação", meses, index=12, format_func=lambda m: m.strftime('%m/%Y'))
+    permitir_reducao = col2.checkbox("Permitir redução (variação acumulada negativa)", value=False)
+    mes_aplicacao = mes.to_timestamp()
+
+    previa = previa_reajustes(df_contratos, indices, mes_aplicacao, permitir_reducao)
+    if previa.empty:
+        st.info(f"Nenhum contrato ativo faz aniversário em {mes.strftime('%m/%Y')}.")
+    else:
+        prontos = previa[previa['Situacao'] == "Pronto"]
+        colunas = st.columns(3)
+        colunas[0].metric("Contratos no mês", len(previa))
+        colunas[1].metric("Prontos para reajuste", len(prontos))
+        colunas[2].metric("Aumento mensal", f"R$ {reais(prontos['Novo_Valor'].sum() - prontos['Valor_Atual'].sum()):,.2f}")
+
+        df_exibicao = previa.assign(Valor_Atual=reais(previa['Valor_Atual']), Novo_Valor=reais(previa['Novo_Valor']))
+        st.dataframe(df_exibicao, use_container_width=True, hide_index=True, column_config={
+            'Aniversario': st.column_config.DateColumn("Aniversário", format="DD/MM/YYYY"),
+            'Variacao_Acumulada': st.column_config.NumberColumn("Variação acumulada (%)", format="%.2f"),
+            'Valor_Atual': st.column_config.NumberColumn("Valor atual (R$)", format="%.2f"),
+            'Novo_Valor': st.column_config.NumberColumn("Novo valor (R$)", format="%.2f"),
+        })
+
+        # --- APLICAÇÃO ---
+        if not prontos.empty and st.button(f"Aplicar {len(prontos)} reajuste(s)", type="primary"):
+            valores = valores_para_gravar(previa, df_contratos, mes_aplicacao)
+            with st.spinner("Gravando os novos valores..."):
+                nao_encontrados = update_values("Contratos", valores,
+                                                descricao=f"Reajuste de {len(valores)} contrato(s) {mes.strftime('%m/%Y')}")
+            if nao_encontrados:
+                st.error(f"Contrato(s) não encontrado(s) na planilha: {', '.join(nao_encontrados)}")
+            reajustados = len(valores) - len(nao_encontrados)
+            if reajustados > 0:
+                st.success(f"{reajustados} contrato(s) reajustado(s)!")
+        st.caption("O reajuste aplicado fica registrado nas observações do contrato e não é aplicado de novo "
+                   "no mesmo mês.")
+else:
+    st.warning("Nenhum dado de contrato encontrado na planilha.")
+
+# --- MÉTRICAS DE DESEMPENHO ---
+finalizar_execucao()
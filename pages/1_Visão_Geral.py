@@ -1,166 +1,217 @@
-import streamlit as st
-import gspread
-import pandas as pd
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
-import streamlit_authenticator as stauth
-import plotly.express as px
-import re
-from copy import deepcopy
-from auth_utils import page_guard
-
-page_guard()
-
-# --- O CÓDIGO DO SEU DASHBOARD COMEÇA AQUI ---
-st.set_page_config(page_title="Visão Geral", page_icon="🏠", layout="wide")
-
-
-# --- FUNÇÃO DE CACHE PARA CARREGAR DADOS (CORRIGIDA PARA A NUVEM) ---
-@st.cache_data(ttl=600)
-def load_data(worksheet_name):
-    # --- CORREÇÃO ESSENCIAL AQUI ---
-    # Lê as credenciais do Google a partir dos "Secrets" em vez de um arquivo
-    gc = gspread.service_account_from_dict(st.secrets["gcp_service_account"])
-
-    sh = gc.open("Controle de Aluguéis")
-    worksheet = sh.worksheet(worksheet_name)
-    data = worksheet.get_all_values()
-    if not data or len(data) < 2: return pd.DataFrame()
-    headers = data[0]
-    df = pd.DataFrame(data[1:], columns=headers)
-    for col_id in ['ID_Contrato', 'ID_Imovel']:
-        if col_id in df.columns: df[col_id] = df[col_id].astype(str)
-    for col in ['Valor_Aluguel_Base', 'Dia_Vencimento', 'Valor_Total_Pago']:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    for col_date in ['Data_Inicio', 'Data_Fim', 'Data_Pagamento']:
-        if col_date in df.columns:
-            df[col_date] = pd.to_datetime(df[col_date], errors='coerce')
-    return df
-
-
-# --- CARREGAMENTO DOS DADOS ---
-df_imoveis = load_data("Imoveis")
-df_contratos = load_data("Contratos")
-df_financeiro = load_data("Lancamentos_Financeiros")
-
-# --- APLICAÇÃO PRINCIPAL ---
-st.title("🏠 Visão Geral")
-st.markdown("---")
-
-if not df_imoveis.empty and not df_contratos.empty:
-    df_contratos_ativos = df_contratos[df_contratos['Status_Contrato'] == 'Ativo'].copy()
-    df_financeiro_valido = df_financeiro[df_financeiro['Status_Lancamento'] == 'Válido'].copy()
-    hoje = datetime.now()
-    mes_ano_atual = hoje.strftime("%m/%Y")
-
-    st.header("Visão Geral do Portfólio")
-    imoveis_alugados = len(df_imoveis[df_imoveis["Status"] == "Alugado"])
-    total_imoveis = len(df_imoveis)
-    taxa_ocupacao = (imoveis_alugados / total_imoveis * 100) if total_imoveis > 0 else 0
-    st.subheader("Taxa de Ocupação")
-    st.progress(int(taxa_ocupacao))
-    st.write(f"**{imoveis_alugados}** de **{total_imoveis}** imóveis estão alugados ({taxa_ocupacao:.1f}%)")
-
-    st.markdown("<br>", unsafe_allow_html=True)
-    st.subheader(f"Meta de Recebimento para {hoje.strftime('%B/%Y')}")
-    total_esperado = pd.to_numeric(df_contratos_ativos['Valor_Aluguel_Base'], errors='coerce').sum()
-    total_realizado = pd.to_numeric(
-        df_financeiro_valido[df_financeiro_valido['Mes_Referencia'] == mes_ano_atual]['Valor_Total_Pago'],
-        errors='coerce').sum()
-    percentual_atingido = (total_realizado / total_esperado * 100) if total_esperado > 0 else 0
-    st.progress(int(percentual_atingido))
-    texto_html = f"""<p style="font-size: 1.1em;"><strong>Recebido:</strong> R$ {total_realizado:,.2f} de <strong>R$ {total_esperado:,.2f}</strong> ({percentual_atingido:.1f}%)</p>"""
-    st.markdown(texto_html, unsafe_allow_html=True)
-
-    st.markdown("---")
-    st.header("Painel de Ações Urgentes")
-    contratos_ativos_count = len(df_contratos_ativos)
-    if imoveis_alugados != contratos_ativos_count:
-        st.warning(
-            f"""**Atenção: Divergência de dados encontrada!** - **Imóveis marcados como "Alugado":** {imoveis_alugados} - **Contratos com status "Ativo":** {contratos_ativos_count} *É necessário corrigir o status de um imóvel ou contrato para reconciliar os dados.*""")
-    st.subheader("⚠️ Aluguéis em Atraso")
-    df_contratos_ativos['Dia_Vencimento'] = pd.to_numeric(df_contratos_ativos['Dia_Vencimento'], errors='coerce')
-    pagamentos_mes_atual = df_financeiro_valido[df_financeiro_valido['Mes_Referencia'] == mes_ano_atual][
-        'ID_Contrato'].tolist()
-    contratos_em_atraso = [row for index, row in df_contratos_ativos.iterrows() if
-                           hoje.day > row['Dia_Vencimento'] and row['ID_Contrato'] not in pagamentos_mes_atual]
-    if contratos_em_atraso:
-        st.dataframe(
-            pd.DataFrame(contratos_em_atraso)[['ID_Imovel', 'Nome_Locatario', 'Gestor_Responsavel', 'Dia_Vencimento']],
-            use_container_width=True)
-    else:
-        st.success("Nenhum aluguel em atraso! 🎉")
-    st.markdown("---")
-    st.subheader("🔔 Contratos a Vencer")
-    contratos_a_vencer = df_contratos[
-        (df_contratos['Data_Fim'] > hoje) & (df_contratos['Data_Fim'] <= (hoje + pd.Timedelta(days=60))) & (
-                    df_contratos['Status_Contrato'] == 'Ativo')].copy()
-    if not contratos_a_vencer.empty:
-        contratos_a_vencer['Dias_Restantes'] = (contratos_a_vencer['Data_Fim'] - hoje).dt.days
-        st.dataframe(
-            contratos_a_vencer[['ID_Imovel', 'Nome_Locatario', 'Gestor_Responsavel', 'Data_Fim', 'Dias_Restantes']],
-            use_container_width=True)
-    else:
-        st.info("Nenhum contrato vencendo em breve.")
-    st.markdown("---")
-    st.subheader("🔄 Próximos Reajustes")
-    contratos_para_reajuste = []
-    for index, row in df_contratos_ativos.iterrows():
-        anos_de_contrato = relativedelta(hoje, row['Data_Inicio']).years
-        proximo_aniversario = row['Data_Inicio'] + relativedelta(years=anos_de_contrato + 1)
-        if hoje < proximo_aniversario <= (hoje + pd.Timedelta(days=30)): contratos_para_reajuste.append(row)
-    if contratos_para_reajuste:
-        st.dataframe(
-            pd.DataFrame(contratos_para_reajuste)[['ID_Imovel', 'Nome_Locatario', 'Gestor_Responsavel', 'Data_Inicio']],
-            use_container_width=True)
-    else:
-        st.info("Nenhum reajuste previsto.")
-
-    st.markdown("---")
-    st.header("Análises Gráficas")
-    col_graf1, col_graf2 = st.columns(2)
-    with col_graf1:
-        st.subheader("Ocupação por Grupo")
-        df_ocupacao = df_imoveis.groupby(['Grupo', 'Status']).size().unstack(fill_value=0)
-        fig_ocupacao = px.bar(df_ocupacao, barmode='stack', title="Alugados vs. Vagos por Grupo",
-                              labels={'value': 'Qtd. Imóveis'}, color_discrete_map={'Alugado': 'green', 'Vago': 'red'})
-        st.plotly_chart(fig_ocupacao, use_container_width=True)
-    with col_graf2:
-        st.subheader(f"Financeiro por Grupo ({mes_ano_atual})")
-        df_contratos_com_grupo = pd.merge(df_contratos_ativos, df_imoveis[['ID_Imovel', 'Grupo']], on='ID_Imovel',
-                                          how='left')
-        esperado_por_grupo = df_contratos_com_grupo.groupby('Grupo')['Valor_Aluguel_Base'].sum().reset_index()
-        df_financeiro_mes_atual = df_financeiro_valido[df_financeiro_valido['Mes_Referencia'] == mes_ano_atual]
-        df_financeiro_com_grupo = pd.merge(df_financeiro_mes_atual, df_contratos_com_grupo[['ID_Contrato', 'Grupo']],
-                                           on='ID_Contrato', how='left')
-        recebido_por_grupo = df_financeiro_com_grupo.groupby('Grupo')['Valor_Total_Pago'].sum().reset_index()
-        df_performance = pd.merge(esperado_por_grupo, recebido_por_grupo, on='Grupo', how='outer').fillna(0)
-        df_performance['A Receber'] = df_performance['Valor_Aluguel_Base'] - df_performance['Valor_Total_Pago']
-        df_performance.rename(columns={'Valor_Total_Pago': 'Recebido'}, inplace=True)
-        df_plot = df_performance.melt(id_vars='Grupo', value_vars=['Recebido', 'A Receber'], var_name='Status',
-                                      value_name='Valor')
-        fig_performance = px.bar(df_plot, x='Grupo', y='Valor', color='Status', barmode='stack',
-                                 title="Recebido vs. A Receber por Grupo", labels={'Valor': 'Valor (R$)'},
-                                 color_discrete_map={'Recebido': 'royalblue', 'A Receber': 'lightgrey'})
-        st.plotly_chart(fig_performance, use_container_width=True)
-    col_graf3, col_graf4 = st.columns(2)
-    with col_graf3:
-        st.subheader("Receita Mensal (12 Meses)")
-        df_receita = df_financeiro_valido[df_financeiro_valido['Data_Pagamento'] > (hoje - pd.DateOffset(months=12))]
-        df_receita['AnoMes'] = df_receita['Data_Pagamento'].dt.to_period('M').astype(str)
-        receita_mensal = df_receita.groupby('AnoMes')['Valor_Total_Pago'].sum().reset_index().sort_values('AnoMes')
-        fig_receita = px.bar(receita_mensal, x='AnoMes', y='Valor_Total_Pago', title='Total Recebido por Mês',
-                             labels={'AnoMes': 'Mês', 'Valor_Total_Pago': 'Total (R$)'}, text_auto='.2s')
-        st.plotly_chart(fig_receita, use_container_width=True)
-    with col_graf4:
-        st.subheader("Receita Total por Grupo")
-        df_c_c_g = pd.merge(df_contratos, df_imoveis[['ID_Imovel', 'Grupo']], on='ID_Imovel', how='left')
-        df_f_c_g = pd.merge(df_financeiro_valido, df_c_c_g[['ID_Contrato', 'Grupo']], on='ID_Contrato', how='left')
-        receita_por_grupo = df_f_c_g.groupby('Grupo')['Valor_Total_Pago'].sum().reset_index()
-        fig_receita_grupo = px.bar(receita_por_grupo, x='Grupo', y='Valor_Total_Pago',
-                                   title="Receita Histórica Total por Grupo",
-                                   labels={'Valor_Total_Pago': 'Receita Total (R$)'}, text_auto='.2s')
-        st.plotly_chart(fig_receita_grupo, use_container_width=True)
-else:
-    st.warning("Não foi possível carregar os dados das abas 'Imoveis', 'Contratos' ou 'Lancamentos_Financeiros'.")
\ No newline at end of file
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+import streamlit_authenticator as stauth
+import plotly.express as px
+import re
+from copy import deepcopy
+from alert_utils import contratos_a_vencer, proximos_reajustes
+from arrears_utils import FAIXAS, aging, cobrancas_em_aberto
+from auth_utils import page_guard
+from metrics_utils import finalizar_execucao, span
+from data_utils import load_all, load_projecao, load_recebimentos, memorizar, versoes_carregadas
+from projection_utils import FREQUENCIAS, HORIZONTES, agregar_fluxo
+from readjustment_utils import versao_indices
+from receivables_utils import meses_disponiveis, receita_por_grupo, receita_por_mes_pagamento, tabela_do_mes
+from schema_utils import reais
+from ui_utils import fragmento
+
+page_guard()
+
+# --- O CÓDIGO DO SEU DASHBOARD COMEÇA AQUI ---
+st.set_page_config(page_title="Visão Geral", page_icon="🏠", layout="wide")
+
+
+# Abas de que cada seção depende: os resultados memorizados mudam junto com a versão delas
+ABAS_CARTEIRA = ("Imoveis", "Contratos")
+ABAS_RECEBIMENTOS = ("Imoveis", "Contratos", "Lancamentos_Financeiros")
+# Gráficos da seção de recebimentos -> nome do span de métricas
+GRAFICOS = {"Financeiro por Grupo": "grafico.financeiro_por_grupo", "Receita Mensal (12 Meses)": "grafico.receita_mensal",
+            "Ocupação por Grupo": "grafico.ocupacao_por_grupo", "Receita Total por Grupo": "grafico.receita_por_grupo"}
+
+
+# --- SEÇÕES ---
+# Cada seção só é recalculada quando mudam os dados ou os próprios parâmetros; as seções com
+# widgets são fragmentos, e um clique nelas reexecuta apenas o fragmento.
+def acoes_urgentes(df_contratos, df_imoveis, df_recebimentos, hoje, versoes):
+    def calcular():
+        em_aberto = cobrancas_em_aberto(df_contratos, df_recebimentos, hoje)
+        df_em_atraso = None
+        if not em_aberto.empty:
+            df_em_atraso = pd.merge(aging(em_aberto, df_contratos, df_imoveis),
+                                    df_contratos[['ID_Contrato', 'ID_Imovel', 'Nome_Locatario', 'Gestor_Responsavel']],
+                                    on='ID_Contrato', how='left')
+            df_em_atraso[FAIXAS + ['Total']] = reais(df_em_atraso[FAIXAS + ['Total']])
+        df_contratos_ativos = df_contratos[df_contratos['Status_Contrato'] == 'Ativo']
+        return (df_em_atraso, contratos_a_vencer(df_contratos, hoje, dias=60),
+                proximos_reajustes(df_contratos_ativos, hoje, dias=30))
+    return memorizar("visao_geral.acoes_urgentes", ABAS_RECEBIMENTOS, (hoje.date(),), calcular, versoes)
+
+
+def grafico(nome, mes_selecionado, df_mes, df_contratos, df_imoveis, df_recebimentos, versoes):
+    """Figura de um dos GRAFICOS; os que não dependem do mês são memorizados sem ele."""
+    if nome == "Ocupação por Grupo":
+        def calcular():
+            df_ocupacao = df_imoveis.groupby(['Grupo', 'Status'], observed=True).size().unstack(fill_value=0)
+            return px.bar(df_ocupacao, barmode='stack', title="Alugados vs. Vagos por Grupo",
+                          labels={'value': 'Qtd. Imóveis'}, color_discrete_map={'Alugado': 'green', 'Vago': 'red'})
+        return memorizar("visao_geral.ocupacao_por_grupo", ("Imoveis",), (), calcular, versoes)
+    if nome == "Financeiro por Grupo":
+        def calcular():
+            df_performance = df_mes.groupby('Grupo', as_index=False, observed=True)[['Esperado', 'Valor_Recebido']].sum()
+            df_performance[['Esperado', 'Valor_Recebido']] = reais(df_performance[['Esperado', 'Valor_Recebido']])
+            df_performance['A Receber'] = df_performance['Esperado'] - df_performance['Valor_Recebido']
+            df_performance.rename(columns={'Valor_Recebido': 'Recebido'}, inplace=True)
+            df_plot = df_performance.melt(id_vars='Grupo', value_vars=['Recebido', 'A Receber'], var_name='Status',
+                                          value_name='Valor')
+            return px.bar(df_plot, x='Grupo', y='Valor', color='Status', barmode='stack',
+                          title=f"Recebido vs. A Receber por Grupo ({mes_selecionado})", labels={'Valor': 'Valor (R$)'},
+                          color_discrete_map={'Recebido': 'royalblue', 'A Receber': 'lightgrey'})
+        return memorizar("visao_geral.financeiro_por_grupo", ABAS_RECEBIMENTOS, (mes_selecionado,), calcular, versoes)
+    if nome == "Receita Mensal (12 Meses)":
+        def calcular():
+            receita_mensal = receita_por_mes_pagamento(df_recebimentos, mes_selecionado, meses=12)
+            receita_mensal['Valor_Recebido'] = reais(receita_mensal['Valor_Recebido'])
+            return px.bar(receita_mensal, x='AnoMes', y='Valor_Recebido', title='Total Recebido por Mês',
+                          labels={'AnoMes': 'Mês', 'Valor_Recebido': 'Total (R$)'}, text_auto='.2s')
+        return memorizar("visao_geral.receita_mensal", ("Lancamentos_Financeiros",), (mes_selecionado,), calcular, versoes)
+
+    def calcular():
+        df_receita_grupo = receita_por_grupo(df_recebimentos, df_contratos, df_imoveis)
+        df_receita_grupo['Valor_Recebido'] = reais(df_receita_grupo['Valor_Recebido'])
+        return px.bar(df_receita_grupo, x='Grupo', y='Valor_Recebido', title="Receita Histórica Total por Grupo",
+                      labels={'Valor_Recebido': 'Receita Total (R$)'}, text_auto='.2s')
+    return memorizar("visao_geral.receita_por_grupo", ABAS_RECEBIMENTOS, (), calcular, versoes)
+
+
+@fragmento("recebimentos")
+def secao_recebimentos(df_contratos, df_imoveis, df_recebimentos, hoje, versoes):
+    st.header("Recebimentos do Mês")
+    mes_selecionado = st.selectbox("Mês de Referência", meses_disponiveis(df_recebimentos, hoje))
+    data_mes_selecionado = datetime.strptime(mes_selecionado, "%m/%Y")
+    df_mes = memorizar("visao_geral.tabela_do_mes", ABAS_RECEBIMENTOS, (mes_selecionado,),
+                       lambda: tabela_do_mes(df_recebimentos, df_contratos, df_imoveis, mes_selecionado), versoes)
+
+    st.subheader(f"Meta de Recebimento para {data_mes_selecionado.strftime('%B/%Y')}")
+    total_esperado = reais(df_mes['Esperado'].sum())
+    total_realizado = reais(df_mes['Valor_Recebido'].sum())
+    percentual_atingido = (total_realizado / total_esperado * 100) if total_esperado > 0 else 0
+    st.progress(min(int(percentual_atingido), 100))
+    texto_html = f"""<p style="font-size: 1.1em;"><strong>Recebido:</strong> R$ {total_realizado:,.2f} de <strong>R$ {total_esperado:,.2f}</strong> ({percentual_atingido:.1f}%)</p>"""
+    st.markdown(texto_html, unsafe_allow_html=True)
+
+    st.subheader("Análises Gráficas")
+    # Só os gráficos escolhidos são montados
+    escolhidos = st.segmented_control("Gráficos", list(GRAFICOS), selection_mode="multi",
+                                      default=list(GRAFICOS)[:2])
+    colunas = st.columns(2)
+    for posicao, nome in enumerate(nome for nome in GRAFICOS if nome in escolhidos):
+        with colunas[posicao % 2]:
+            with span(GRAFICOS[nome]):
+                st.plotly_chart(grafico(nome, mes_selecionado, df_mes, df_contratos, df_imoveis, df_recebimentos,
+                                        versoes),
+                                use_container_width=True)
+
+
+@fragmento("projecao")
+def secao_projecao(df_contratos, df_imoveis, hoje, versoes):
+    st.header("Projeção de Recebimentos")
+    col_proj1, col_proj2, col_proj3, col_proj4 = st.columns(4)
+    horizonte = col_proj1.selectbox("Horizonte (meses)", HORIZONTES)
+    frequencia = col_proj2.radio("Frequência", list(FREQUENCIAS), format_func=FREQUENCIAS.get, horizontal=True)
+    agrupamentos = {"Total": None, "Grupo": 'Grupo', "Gestor": 'Gestor_Responsavel'}
+    agrupamento = col_proj3.selectbox("Agrupar por", list(agrupamentos))
+    renovar = col_proj4.checkbox("Supor renovação dos contratos que vencem", value=False)
+    # A projeção só é calculada quando pedida
+    if not st.toggle("Exibir a projeção", key="visao_geral_projecao"):
+        st.caption("Ative para calcular as entradas previstas com os parâmetros acima.")
+        return
+
+    def calcular():
+        fluxo = load_projecao(df_contratos, hoje, horizonte, renovar)
+        por = agrupamentos[agrupamento]
+        df_projecao = agregar_fluxo(fluxo, df_contratos, df_imoveis, frequencia, por)
+        df_projecao['Valor'] = reais(df_projecao['Valor'])
+        fig_projecao = px.bar(df_projecao, x='Periodo', y='Valor', color=por,
+                              title=f"Entradas Previstas ({FREQUENCIAS[frequencia]}, {horizonte} meses)",
+                              labels={'Periodo': 'Período', 'Valor': 'Valor (R$)', 'Gestor_Responsavel': 'Gestor'})
+        return fig_projecao, reais(fluxo['Valor'].sum())
+
+    with span("grafico.projecao"):
+        fig_projecao, total_previsto = memorizar(
+            "visao_geral.projecao", ABAS_CARTEIRA,
+            (hoje.date(), horizonte, frequencia, agrupamento, renovar, versao_indices()), calcular, versoes)
+        st.plotly_chart(fig_projecao, use_container_width=True)
+    st.caption(f"Total previsto no horizonte: R$ {total_previsto:,.2f}. Os reajustes futuros usam a "
+               "variação dos últimos 12 meses do índice de cada contrato (arquivo de índices da página Reajustes).")
+
+
+# --- CARREGAMENTO DOS DADOS ---
+dados = load_all()
+df_imoveis = dados["Imoveis"]
+df_contratos = dados["Contratos"]
+df_financeiro = dados["Lancamentos_Financeiros"]
+# Versões das abas carregadas: os resultados memorizados ficam associados aos dados usados
+versoes = versoes_carregadas(dados)
+
+# --- APLICAÇÃO PRINCIPAL ---
+st.title("🏠 Visão Geral")
+st.markdown("---")
+
+if not df_imoveis.empty and not df_contratos.empty:
+    df_recebimentos = load_recebimentos(df_financeiro)
+    hoje = datetime.now()
+
+    st.header("Visão Geral do Portfólio")
+    imoveis_alugados = len(df_imoveis[df_imoveis["Status"] == "Alugado"])
+    total_imoveis = len(df_imoveis)
+    taxa_ocupacao = (imoveis_alugados / total_imoveis * 100) if total_imoveis > 0 else 0
+    st.subheader("Taxa de Ocupação")
+    st.progress(int(taxa_ocupacao))
+    st.write(f"**{imoveis_alugados}** de **{total_imoveis}** imóveis estão alugados ({taxa_ocupacao:.1f}%)")
+
+    st.markdown("---")
+    st.header("Painel de Ações Urgentes")
+    df_em_atraso, df_a_vencer, df_reajustes = acoes_urgentes(df_contratos, df_imoveis, df_recebimentos, hoje, versoes)
+    contratos_ativos_count = int((df_contratos['Status_Contrato'] == 'Ativo').sum())
+    if imoveis_alugados != contratos_ativos_count:
+        st.warning(
+            f"""**Atenção: Divergência de dados encontrada!** - **Imóveis marcados como "Alugado":** {imoveis_alugados} - **Contratos com status "Ativo":** {contratos_ativos_count} *É necessário corrigir o status de um imóvel ou contrato para reconciliar os dados.*""")
+        st.caption("🧮 A página **Reconciliação** lista os imóveis e contratos divergentes, com a ação sugerida para cada um.")
+    st.subheader("⚠️ Aluguéis em Atraso")
+    if df_em_atraso is not None:
+        st.dataframe(
+            df_em_atraso[['ID_Imovel', 'Nome_Locatario', 'Gestor_Responsavel', 'Cobrancas', 'Maior_Atraso', 'Total']],
+            use_container_width=True, hide_index=True,
+            column_config={'Cobrancas': "Meses em aberto", 'Maior_Atraso': "Maior atraso (dias)",
+                           'Total': st.column_config.NumberColumn("Em aberto (R$)", format="%.2f")})
+        st.caption("Saldo em aberto de todo o histórico de cada contrato. A página **Inadimplência** detalha as "
+                   "faixas de atraso por contrato, gestor e grupo.")
+    else:
+        st.success("Nenhum aluguel em atraso! 🎉")
+    st.markdown("---")
+    st.subheader("🔔 Contratos a Vencer")
+    if not df_a_vencer.empty:
+        st.dataframe(
+            df_a_vencer[['ID_Imovel', 'Nome_Locatario', 'Gestor_Responsavel', 'Data_Fim', 'Dias_Restantes']],
+            use_container_width=True)
+    else:
+        st.info("Nenhum contrato vencendo em breve.")
+    st.markdown("---")
+    st.subheader("🔄 Próximos Reajustes")
+    if not df_reajustes.empty:
+        st.dataframe(
+            df_reajustes[['ID_Imovel', 'Nome_Locatario', 'Gestor_Responsavel', 'Data_Inicio']],
+            use_container_width=True)
+    else:
+        st.info("Nenhum reajuste previsto.")
+
+    st.markdown("---")
+    secao_recebimentos(df_contratos, df_imoveis, df_recebimentos, hoje, versoes)
+    st.markdown("---")
+    secao_projecao(df_contratos, df_imoveis, hoje, versoes)
+else:
+    st.warning("Não foi possível carregar os dados das abas 'Imoveis', 'Contratos' ou 'Lancamentos_Financeiros'.")
+
+# --- MÉTRICAS DE DESEMPENHO ---
+finalizar_execucao()
@@ -1,97 +1,118 @@
-import streamlit as st
-import gspread
-import pandas as pd
-from datetime import datetime
-import streamlit_authenticator as stauth
-import re
-from copy import deepcopy
-from auth_utils import page_guard
-
-page_guard()
-
-
-# --- CONFIGURAÇÃO DA PÁGINA ---
-st.set_page_config(page_title="Lançar Pagamento", page_icon="💰")
-st.title("💰 Lançar Novo Pagamento")
-st.markdown("---")
-
-
-# --- CONEXÃO COM A PLANILHA (USANDO SECRETS) ---
-@st.cache_resource
-def get_connection():
-    gc = gspread.service_account_from_dict(st.secrets["gcp_service_account"])
-    return gc.open("Controle de Aluguéis")
-
-
-sh = get_connection()
-contratos_ws = sh.worksheet("Contratos")
-financeiro_ws = sh.worksheet("Lancamentos_Financeiros")
-
-
-# --- CARREGAMENTO DOS DADOS ---
-@st.cache_data(ttl=600)
-def load_contratos():
-    data = contratos_ws.get_all_values()
-    if len(data) < 2: return pd.DataFrame()
-    headers = data[0]
-    df = pd.DataFrame(data[1:], columns=headers)
-    return df
-
-
-df_contratos = load_contratos()
-
-# --- FORMULÁRIO DE LANÇAMENTO ---
-if not df_contratos.empty:
-    contratos_ativos = df_contratos[df_contratos['Status_Contrato'] == 'Ativo']
-    opcoes_contratos = ["Selecione um contrato..."] + [f"{nome} (Imóvel {imovel})" for nome, imovel in
-                                                       zip(contratos_ativos['Nome_Locatario'],
-                                                           contratos_ativos['ID_Imovel'])]
-
-    contrato_selecionado_str = st.selectbox("Para qual contrato você deseja lançar o pagamento?",
-                                            options=opcoes_contratos)
-
-    if contrato_selecionado_str != "Selecione um contrato...":
-        nome_locatario_selecionado = contrato_selecionado_str.split(" (Imóvel ")[0]
-
-        contratos_ativos['Valor_Aluguel_Base'] = pd.to_numeric(contratos_ativos['Valor_Aluguel_Base'],
-                                                               errors='coerce').fillna(0)
-        dados_contrato = contratos_ativos[contratos_ativos['Nome_Locatario'] == nome_locatario_selecionado].iloc[0]
-
-        id_contrato = dados_contrato['ID_Contrato']
-        valor_aluguel_base = dados_contrato['Valor_Aluguel_Base']
-
-        st.info(
-            f"Lançando pagamento para o contrato **{id_contrato}** no valor base de **R$ {valor_aluguel_base:,.2f}**.")
-
-        with st.form("form_lancamento_pagamento", clear_on_submit=True):
-            col1, col2 = st.columns(2)
-            with col1:
-                mes_referencia = st.text_input("Mês de Referência (formato MM/AAAA)",
-                                               value=datetime.now().strftime("%m/%Y"))
-                data_pagamento = st.date_input("Data do Pagamento", value=datetime.now())
-                forma_pagamento = st.selectbox("Forma de Pagamento", ["PIX", "Boleto", "Transferência", "Dinheiro"])
-            with col2:
-                valor_aluguel_pago = st.number_input("Valor do Aluguel Pago", value=float(valor_aluguel_base),
-                                                     step=100.0)
-                multa_juros = st.number_input("Multa / Juros Pagos", value=0.0, step=10.0)
-                valor_total_pago = valor_aluguel_pago + multa_juros
-                st.metric("Valor Total a ser Lançado", f"R$ {valor_total_pago:,.2f}")
-
-            submitted = st.form_submit_button("Lançar Pagamento")
-
-            if submitted:
-                with st.spinner("Lançando..."):
-                    all_values = financeiro_ws.get_all_values()
-                    proximo_id = len(all_values)
-
-                    data_pagamento_str = data_pagamento.strftime("%Y-%m-%d")
-
-                    nova_linha = [proximo_id, id_contrato, mes_referencia, data_pagamento_str, valor_aluguel_pago,
-                                  multa_juros, valor_total_pago, forma_pagamento, "Pago", "Válido"]
-
-                    financeiro_ws.append_row(nova_linha)
-                    st.cache_data.clear()
-                    st.success("Pagamento lançado com sucesso na planilha!")
-                    st.balloons()
-else:
-    st.warning("Não foi possível carregar os dados de contratos para iniciar o lançamento.")
\ No newline at end of file
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+import streamlit_authenticator as stauth
+import re
+from copy import deepcopy
+from auth_utils import page_guard
+from metrics_utils import finalizar_execucao
+from data_utils import append_rows, load_all, load_busca, reservar_ids_lancamento
+from import_utils import conciliar, ler_extrato, montar_linhas
+from schema_utils import reais
+from ui_utils import seletor_busca
+
+page_guard()
+
+
+# --- CONFIGURAÇÃO DA PÁGINA ---
+st.set_page_config(page_title="Lançar Pagamento", page_icon="💰")
+st.title("💰 Lançar Novo Pagamento")
+st.markdown("---")
+
+# --- CARREGAMENTO DOS DADOS ---
+dados = load_all()
+df_contratos = dados["Contratos"]
+df_financeiro = dados["Lancamentos_Financeiros"]
+
+# --- FORMULÁRIO DE LANÇAMENTO ---
+if not df_contratos.empty:
+    contratos_ativos = df_contratos[df_contratos['Status_Contrato'] == 'Ativo']
+    aba_individual, aba_importacao = st.tabs(["Lançamento Individual", "Importar Extrato Bancário"])
+
+    with aba_individual:
+        id_contrato_selecionado = seletor_busca("Para qual contrato você deseja lançar o pagamento?",
+                                                load_busca()['contratos'], key="lancamento_contrato",
+                                                permitidos=contratos_ativos['ID_Contrato'],
+                                                placeholder="Selecione um contrato...")
+
+        if id_contrato_selecionado is not None:
+            dados_contrato = contratos_ativos[contratos_ativos['ID_Contrato'] == id_contrato_selecionado].iloc[0]
+
+            id_contrato = dados_contrato['ID_Contrato']
+            valor_aluguel_base = reais(dados_contrato['Valor_Aluguel_Base'])
+
+            st.info(
+                f"Lançando pagamento para o contrato **{id_contrato}** no valor base de **R$ {valor_aluguel_base:,.2f}**.")
+
+            with st.form("form_lancamento_pagamento", clear_on_submit=True):
+                col1, col2 = st.columns(2)
+                with col1:
+                    mes_referencia = st.text_input("Mês de Referência (formato MM/AAAA)",
+                                                   value=datetime.now().strftime("%m/%Y"))
+                    data_pagamento = st.date_input("Data do Pagamento", value=datetime.now())
+                    forma_pagamento = st.selectbox("Forma de Pagamento", ["PIX", "Boleto", "Transferência", "Dinheiro"])
+                with col2:
+                    valor_aluguel_pago = st.number_input("Valor do Aluguel Pago", value=float(valor_aluguel_base),
+                                                         step=100.0)
+                    multa_juros = st.number_input("Multa / Juros Pagos", value=0.0, step=10.0)
+                    valor_total_pago = valor_aluguel_pago + multa_juros
+                    st.metric("Valor Total a ser Lançado", f"R$ {valor_total_pago:,.2f}")
+
+                submitted = st.form_submit_button("Lançar Pagamento")
+
+                if submitted:
+                    with st.spinner("Lançando..."):
+                        proximo_id = reservar_ids_lancamento()[0]
+
+                        data_pagamento_str = data_pagamento.strftime("%Y-%m-%d")
+
+                        nova_linha = [proximo_id, id_contrato, mes_referencia, data_pagamento_str, valor_aluguel_pago,
+                                      multa_juros, valor_total_pago, forma_pagamento, "Pago", "Válido"]
+
+                        append_rows("Lancamentos_Financeiros", [nova_linha],
+                                    descricao=f"Pagamento {proximo_id} do contrato {id_contrato}")
+                        st.success("Pagamento lançado com sucesso! Ele será gravado na planilha em instantes.")
+                        st.balloons()
+
+    # --- IMPORTAÇÃO EM LOTE (EXTRATO BANCÁRIO) ---
+    with aba_importacao:
+        st.write("Envie o extrato do banco em CSV (colunas Data, Descrição e Valor) ou OFX. Cada crédito é associado "
+                 "a um contrato ativo pelo ID do contrato citado na descrição, pelo nome do locatário ou pelo valor "
+                 "do aluguel, quando este for único.")
+        arquivo_extrato = st.file_uploader("Extrato bancário", type=["csv", "ofx"])
+        forma_pagamento_lote = st.selectbox("Forma de Pagamento dos créditos importados",
+                                            ["PIX", "Boleto", "Transferência", "Dinheiro"], key="forma_pagamento_lote")
+
+        if arquivo_extrato is not None:
+            try:
+                extrato = ler_extrato(arquivo_extrato.name, arquivo_extrato.getvalue())
+            except Exception as e:
+                st.error(f"Não foi possível ler o extrato: {e}")
+                extrato = None
+
+            if extrato is not None and extrato.empty:
+                st.warning("Nenhum crédito encontrado no extrato.")
+            elif extrato is not None:
+                df_financeiro_valido = df_financeiro[df_financeiro['Status_Lancamento'] == 'Válido'] \
+                    if not df_financeiro.empty else pd.DataFrame(columns=['ID_Contrato', 'Mes_Referencia'])
+                conciliados = conciliar(extrato, contratos_ativos, df_financeiro_valido)
+                aceitos = conciliados[conciliados['Status'] == 'OK']
+
+                st.dataframe(conciliados[['Data', 'Descricao', 'Valor', 'ID_Contrato', 'Criterio', 'Mes_Referencia',
+                                          'Status']], use_container_width=True, hide_index=True)
+                st.info(f"**{len(aceitos)}** de **{len(conciliados)}** créditos prontos para lançamento "
+                        f"(R$ {aceitos['Valor'].sum():,.2f}).")
+
+                if st.button(f"Lançar {len(aceitos)} pagamento(s)", disabled=aceitos.empty):
+                    with st.spinner("Lançando..."):
+                        ids = reservar_ids_lancamento(len(aceitos))
+                        append_rows("Lancamentos_Financeiros", montar_linhas(aceitos, ids, forma_pagamento_lote),
+                                    descricao=f"Importação de {len(aceitos)} pagamento(s) do extrato")
+                        st.success(f"{len(aceitos)} pagamento(s) lançado(s) com sucesso! Eles serão gravados na "
+                                   f"planilha em instantes.")
+                        st.balloons()
+else:
+    st.warning("Não foi possível carregar os dados de contratos para iniciar o lançamento.")
+
+# --- MÉTRICAS DE DESEMPENHO ---
+finalizar_execucao()
@@ -0,0 +1,75 @@
+# projection_utils.py
+"""
+Projeção das entradas previstas dos próximos meses: cada contrato ativo é expandido em suas
+cobranças futuras (grade contrato x mês, com vencimento no Dia_Vencimento) até Data_Fim ou até
+o fim do horizonte. Nos aniversários do contrato o aluguel é reajustado pelo fator dos 12 meses
+mais recentes do seu índice (estimativa; sem arquivo de índices, o valor fica constante).
+Valores em centavos.
+"""
+import numpy as np
+import pandas as pd
+from arrears_utils import _mes, _vencimentos
+from readjustment_utils import fatores_recentes, marcador
+from receivables_utils import dimensoes
+from metrics_utils import medido
+
+HORIZONTES = [12, 24, 36]
+FREQUENCIAS = {'M': "Mensal", 'W': "Semanal"}
+COLUNAS_FLUXO = ['ID_Contrato', 'Vencimento', 'Valor', 'Reajustes']
+
+
+def _aniversarios_ate(meses, mes_inicio):
+    """Quantidade de aniversários do contrato (12, 24... meses após o início) até cada mês, inclusive."""
+    return np.maximum((meses - mes_inicio) // 12, 0)
+
+
+@medido("calculo.projetar_fluxo")
+def projetar_fluxo(df_contratos, hoje, meses=12, indices=None, renovar=False):
+    """
+    Cobranças previstas dos contratos ativos de hoje até o fim do horizonte de `meses` meses
+    (incluindo o mês atual). Cada contrato para em Data_Fim, a não ser com `renovar`, que supõe a
+    renovação nas mesmas condições. Reajustes já registrados no mês atual não são contados de novo.
+    """
+    hoje = pd.Timestamp(hoje).normalize()
+    contratos = df_contratos[(df_contratos['Status_Contrato'] == 'Ativo') & df_contratos['Data_Inicio'].notna()
+                             & (df_contratos['Valor_Aluguel_Base'] > 0)]
+    primeiro = hoje.year * 12 + hoje.month - 1
+    linha = np.repeat(np.arange(len(contratos)), meses)
+    grade = primeiro + np.tile(np.arange(meses), len(contratos))
+    vencimento = _vencimentos(grade, contratos['Dia_Vencimento'].to_numpy(dtype='int64')[linha])
+
+    inicio = contratos['Data_Inicio'].to_numpy(dtype='datetime64[D]')[linha]
+    prevista = (vencimento >= np.datetime64(hoje.date())) & (vencimento >= inicio)
+    if not renovar:
+        fim = contratos['Data_Fim'].to_numpy(dtype='datetime64[D]')[linha]
+        prevista &= np.isnat(fim) | (vencimento <= fim)
+
+    # Reajustes entre o mês atual e o mês da cobrança; o do mês atual não conta se já foi aplicado
+    mes_inicio = _mes(contratos['Data_Inicio'])[linha]
+    ja_reajustado = contratos['Observacoes_do_Contrato'].astype(str).str.contains(marcador(hoje), regex=False)
+    reajustes = (_aniversarios_ate(grade, mes_inicio) - _aniversarios_ate(primeiro - 1, mes_inicio)
+                 - (ja_reajustado.to_numpy()[linha] & ((primeiro - mes_inicio) % 12 == 0) & (primeiro > mes_inicio)))
+    if indices is None or indices.empty:
+        fator = np.ones(len(contratos))
+    else:
+        fator = np.maximum(fatores_recentes(indices, contratos['Indice_Reajuste'].astype(str).to_numpy()), 1.0)
+    valor = contratos['Valor_Aluguel_Base'].to_numpy(dtype='int64')[linha] * fator[linha] ** reajustes
+    return pd.DataFrame({'ID_Contrato': contratos['ID_Contrato'].to_numpy()[linha][prevista],
+                         'Vencimento': vencimento[prevista],
+                         'Valor': np.rint(valor[prevista]).astype('int64'),
+                         'Reajustes': reajustes[prevista]})
+
+
+@medido("calculo.agregar_fluxo")
+def agregar_fluxo(fluxo, df_contratos, df_imoveis, frequencia='M', por=None):
+    """
+    Entradas previstas por mês ('M') ou semana ('W', iniciada na segunda-feira), no total ou por
+    'Grupo' / 'Gestor_Responsavel'. Retorna Periodo (data de início), a coluna de agrupamento e Valor.
+    """
+    periodo = fluxo['Vencimento'].dt.to_period('M' if frequencia == 'M' else 'W-SUN').dt.start_time
+    chaves = [periodo.rename('Periodo')]
+    if por is not None:
+        dimensao = dimensoes(df_contratos, df_imoveis).drop_duplicates('ID_Contrato').set_index('ID_Contrato')[por]
+        dimensao = fluxo['ID_Contrato'].map(dimensao).astype(object)
+        chaves.append(dimensao.where(dimensao.notna(), '(sem cadastro)').rename(por))
+    return fluxo.groupby(chaves, observed=True)['Valor'].sum().reset_index()
@@ -0,0 +1,184 @@
+# readjustment_utils.py
+"""
+Reajuste anual dos aluguéis pelos índices (IGP-M, IPCA...) lidos de um arquivo local.
+O arquivo CSV tem uma linha por índice e mês, com a variação mensal em porcentagem:
+
+    Indice;Mes;Variacao
+    IGP-M;01/2024;0,07
+    IPCA;01/2024;0,42
+
+(o separador é detectado; Mes aceita MM/AAAA ou uma data; a variação aceita vírgula ou ponto).
+O fator de cada contrato é o acumulado dos 12 meses anteriores ao mês do aniversário, calculado
+para todos os contratos de uma vez a partir das somas acumuladas dos logaritmos de cada série.
+Valores em centavos.
+"""
+import os
+import re
+import numpy as np
+import pandas as pd
+from alert_utils import somar_anos
+from schema_utils import centavos, reais
+from metrics_utils import medido
+
+ARQUIVO_INDICES = os.environ.get("INDICES_REAJUSTE",
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), "indices_reajuste.csv"))
+MESES_JANELA = 12
+# Registro gravado nas observações por valores_para_gravar (valores com ponto decimal)
+REGISTRO_REAJUSTE = r"\[Reajuste (?P<Mes>\d{2}/\d{4})\][^\[]*?R\$ (?P<Anterior>[\d.]+) -> R\$ (?P<Novo>[\d.]+)"
+COLUNAS_PREVIA = ['ID_Contrato', 'Nome_Locatario', 'Indice_Reajuste', 'Aniversario', 'Janela', 'Variacao_Acumulada',
+                  'Valor_Atual', 'Novo_Valor', 'Situacao']
+
+
+def _normalizar_indice(serie):
+    """'IGP-M', 'igpm' e 'IGP M' viram 'IGPM'."""
+    return serie.astype(str).str.upper().map(lambda nome: re.sub(r'[^A-Z0-9]', '', nome))
+
+
+def _mes(datas):
+    return datas.dt.year * 12 + datas.dt.month - 1
+
+
+def _texto_mes(meses):
+    return (meses % 12 + 1).astype(str).str.zfill(2) + '/' + (meses // 12).astype(str)
+
+
+# --- SÉRIES DOS ÍNDICES ---
+def carregar_indices(origem=ARQUIVO_INDICES):
+    """Lê o arquivo de índices (caminho ou arquivo aberto); retorna Indice, Mes (inteiro) e Variacao (%)."""
+    if isinstance(origem, str) and not os.path.exists(origem):
+        return pd.DataFrame({'Indice': pd.Series(dtype=object), 'Mes': pd.Series(dtype='int64'),
+                             'Variacao': pd.Series(dtype=float)})
+    bruto = pd.read_csv(origem, sep=None, engine='python', dtype=str)
+    bruto.columns = [coluna.strip().capitalize() for coluna in bruto.columns]
+    datas = pd.to_datetime(bruto['Mes'].str.strip(), format='%m/%Y', errors='coerce')
+    datas = datas.fillna(pd.to_datetime(bruto['Mes'], dayfirst=True, errors='coerce', format='mixed'))
+    variacao = bruto['Variacao'].str.strip().str.replace('%', '', regex=False)
+    variacao = variacao.where(~variacao.str.contains(',', regex=False),
+                              variacao.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    indices = pd.DataFrame({'Indice': _normalizar_indice(bruto['Indice']), 'Mes': _mes(datas),
+                            'Variacao': pd.to_numeric(variacao, errors='coerce')}).dropna()
+    return indices.astype({'Mes': 'int64'}).drop_duplicates(['Indice', 'Mes'], keep='last')
+
+
+def versao_indices(caminho=ARQUIVO_INDICES):
+    """Data de modificação do arquivo de índices (None se não existe), para invalidar cálculos em cache."""
+    return os.path.getmtime(caminho) if os.path.exists(caminho) else None
+
+
+def resumo_indices(indices):
+    """Primeiro e último mês disponíveis de cada índice."""
+    resumo = indices.groupby('Indice')['Mes'].agg(['min', 'max', 'size'])
+    return pd.DataFrame({'Indice': resumo.index, 'Primeiro_Mes': _texto_mes(resumo['min']).to_numpy(),
+                         'Ultimo_Mes': _texto_mes(resumo['max']).to_numpy(), 'Meses': resumo['size'].to_numpy()})
+
+
+def _acumulados(indices):
+    """
+    Soma acumulada de log(1 + variação) e contagem de meses por (Indice, Mes). Cada série ganha
+    uma linha zerada no mês anterior ao primeiro, para que janelas no início da série também fechem.
+    """
+    serie = indices.sort_values(['Indice', 'Mes'])
+    serie = serie.assign(Log=np.log1p(serie['Variacao'] / 100))
+    inicio = serie.groupby('Indice', as_index=False)['Mes'].min()
+    inicio = inicio.assign(Mes=inicio['Mes'] - 1, Log=0.0)
+    serie = pd.concat([inicio, serie[['Indice', 'Mes', 'Log']]], ignore_index=True).sort_values(['Indice', 'Mes'])
+    serie['Acumulado'] = serie.groupby('Indice')['Log'].cumsum()
+    serie['Contagem'] = serie.groupby('Indice').cumcount()
+    return serie.set_index(['Indice', 'Mes'])[['Acumulado', 'Contagem']]
+
+
+def fatores(indices, nomes_indices, meses_finais, meses=MESES_JANELA):
+    """
+    Fator acumulado de cada par (índice, mês final) para os `meses` meses que terminam no mês final.
+    Retorna (fatores, completos): janelas com algum mês faltando ficam com fator NaN e completo False.
+    """
+    acumulados = _acumulados(indices)
+    nomes_indices = np.asarray(nomes_indices)
+    fim = acumulados.reindex(pd.MultiIndex.from_arrays([nomes_indices, meses_finais]))
+    inicio = acumulados.reindex(pd.MultiIndex.from_arrays([nomes_indices, meses_finais - meses]))
+    completos = (fim['Contagem'].to_numpy() - inicio['Contagem'].to_numpy()) == meses
+    valores = np.exp(fim['Acumulado'].to_numpy() - inicio['Acumulado'].to_numpy())
+    return np.where(completos, valores, np.nan), completos
+
+
+def fatores_recentes(indices, nomes_indices):
+    """
+    Fator dos 12 meses mais recentes do arquivo para cada índice informado, usado como estimativa dos
+    próximos reajustes. Índices sem série (ou com a janela incompleta) ficam com fator 1.
+    """
+    nomes = _normalizar_indice(pd.Series(nomes_indices, dtype=object)).to_numpy()
+    ultimo_mes = indices.groupby('Indice')['Mes'].max()
+    meses_finais = pd.Series(nomes).map(ultimo_mes).fillna(-1).astype('int64').to_numpy()
+    fator, completos = fatores(indices, nomes, meses_finais)
+    return np.where(completos, fator, 1.0)
+
+
+# --- PRÉVIA E APLICAÇÃO ---
+def marcador(mes_aplicacao):
+    """Texto gravado nas observações do contrato; evita aplicar o mesmo reajuste duas vezes."""
+    return f"[Reajuste {pd.Timestamp(mes_aplicacao):%m/%Y}]"
+
+
+@medido("calculo.previa_reajustes")
+def previa_reajustes(df_contratos, indices, mes_aplicacao, permitir_reducao=False):
+    """
+    Contratos ativos que fazem aniversário no mês de aplicação, com o fator do índice nos 12 meses
+    anteriores e o novo Valor_Aluguel_Base (em centavos). Variações acumuladas negativas só reduzem
+    o aluguel com `permitir_reducao`. A coluna Situacao diz se o reajuste pode ser aplicado ("Pronto").
+    """
+    mes_aplicacao = pd.Timestamp(mes_aplicacao)
+    contratos = df_contratos[(df_contratos['Status_Contrato'] == 'Ativo') & df_contratos['Data_Inicio'].notna()]
+    contratos = contratos[(contratos['Data_Inicio'].dt.month == mes_aplicacao.month)
+                          & (contratos['Data_Inicio'].dt.year < mes_aplicacao.year)]
+    mes_final = np.full(len(contratos), mes_aplicacao.year * 12 + mes_aplicacao.month - 2, dtype='int64')
+    nomes = _normalizar_indice(contratos['Indice_Reajuste']).to_numpy()
+    fator, completos = fatores(indices, nomes, mes_final)
+    if not permitir_reducao:
+        fator = np.where(np.isnan(fator), fator, np.maximum(fator, 1.0))
+    ja_aplicado = contratos['Observacoes_do_Contrato'].astype(str).str.contains(marcador(mes_aplicacao), regex=False)
+    situacao = np.select(
+        [ja_aplicado.to_numpy(), nomes == '', ~np.isin(nomes, indices['Indice'].unique()), ~completos],
+        ["Já reajustado", "Sem índice de reajuste", "Índice sem série no arquivo", "Série incompleta na janela"],
+        default="Pronto")
+    atual = contratos['Valor_Aluguel_Base'].to_numpy(dtype='int64')
+    novo = np.where(situacao == "Pronto", np.rint(atual * np.nan_to_num(fator, nan=1.0)), atual).astype('int64')
+    aniversario = somar_anos(contratos['Data_Inicio'], mes_aplicacao.year - contratos['Data_Inicio'].dt.year)
+    previa = pd.DataFrame({
+        'ID_Contrato': contratos['ID_Contrato'].to_numpy(), 'Nome_Locatario': contratos['Nome_Locatario'].to_numpy(),
+        'Indice_Reajuste': contratos['Indice_Reajuste'].astype(str).to_numpy(),
+        'Aniversario': aniversario.to_numpy(),
+        'Janela': _texto_mes(pd.Series(mes_final - MESES_JANELA + 1)) + ' a ' + _texto_mes(pd.Series(mes_final)),
+        'Variacao_Acumulada': (fator - 1) * 100, 'Valor_Atual': atual, 'Novo_Valor': novo, 'Situacao': situacao,
+    })
+    return previa[COLUNAS_PREVIA]
+
+
+def historico_reajustes(df_contratos):
+    """
+    Reajustes registrados nas observações dos contratos: ID_Contrato, Mes (mês de aplicação, como
+    inteiro), Anterior e Novo (aluguel antes e depois, em centavos), em ordem de contrato e mês.
+    """
+    observacoes = df_contratos.drop_duplicates('ID_Contrato').set_index('ID_Contrato')['Observacoes_do_Contrato']
+    registros = observacoes.astype(str).str.extractall(REGISTRO_REAJUSTE)
+    registros = registros.reset_index(level='match', drop=True).reset_index()
+    historico = pd.DataFrame({'ID_Contrato': registros['ID_Contrato'].astype(str),
+                              'Mes': _mes(pd.to_datetime(registros['Mes'], format='%m/%Y')).astype('int64'),
+                              'Anterior': centavos(registros['Anterior']), 'Novo': centavos(registros['Novo'])})
+    return historico.sort_values(['ID_Contrato', 'Mes'], ignore_index=True)
+
+
+def valores_para_gravar(previa, df_contratos, mes_aplicacao):
+    """
+    {ID_Contrato: {coluna: valor}} dos reajustes prontos: o novo aluguel (em reais, como na planilha)
+    e as observações com o registro do reajuste aplicado.
+    """
+    prontos = previa[previa['Situacao'] == "Pronto"]
+    observacoes = df_contratos.drop_duplicates('ID_Contrato').set_index('ID_Contrato')['Observacoes_do_Contrato']
+    valores = {}
+    for linha in prontos.itertuples(index=False):
+        registro = (f"{marcador(mes_aplicacao)} {linha.Indice_Reajuste} {linha.Variacao_Acumulada:.2f}%: "
+                    f"R$ {reais(linha.Valor_Atual):.2f} -> R$ {reais(linha.Novo_Valor):.2f}")
+        anteriores = str(observacoes.get(linha.ID_Contrato, '')).strip()
+        valores[linha.ID_Contrato] = {'Valor_Aluguel_Base': reais(linha.Novo_Valor),
+                                      'Observacoes_do_Contrato': f"{anteriores} {registro}".strip()}
+    return valores
@@ -0,0 +1,151 @@
+# receivables_utils.py
+"""
+Tabela materializada de recebimentos (esperado x recebido por contrato, grupo e mês).
+Os lançamentos válidos são agregados uma única vez e, a cada recarga do histórico,
+apenas os lançamentos novos e as mudanças de status são aplicados à tabela.
+Os valores (esperado e recebido) são inteiros em centavos, como nas abas tipadas por schema_utils.
+"""
+import numpy as np
+import pandas as pd
+import schema_utils
+from metrics_utils import medido
+
+COLUNAS_CHAVE = ['ID_Contrato', 'Mes_Referencia', 'Mes_Pagamento']
+COLUNAS_VALOR = ['Valor_Recebido', 'Qtd_Lancamentos']
+
+# A mesma agregação, para backends que executam SQL (datas gravadas como AAAA-MM-DD)
+CONSULTA_SQL = f"""
+    SELECT ID_Contrato, Mes_Referencia,
+           CASE WHEN Data_Pagamento GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*' THEN substr(Data_Pagamento, 1, 7)
+                ELSE 'NaT' END AS Mes_Pagamento,
+           SUM({schema_utils.sql_centavos('Valor_Total_Pago')}) AS Valor_Recebido,
+           COUNT(*) AS Qtd_Lancamentos
+    FROM "Lancamentos_Financeiros"
+    WHERE Status_Lancamento = 'Válido'
+    GROUP BY 1, 2, 3
+"""
+
+
+# --- MANUTENÇÃO INCREMENTAL ---
+def _agregar(lancamentos, sinal=1):
+    agregado = pd.DataFrame({
+        'ID_Contrato': lancamentos['ID_Contrato'].astype(str),
+        'Mes_Referencia': lancamentos['Mes_Referencia'].astype(str),
+        'Mes_Pagamento': lancamentos['Data_Pagamento'].dt.to_period('M').astype(str),
+        'Valor_Recebido': sinal * lancamentos['Valor_Total_Pago'].astype('int64'),
+        'Qtd_Lancamentos': sinal,
+    })
+    return agregado.groupby(COLUNAS_CHAVE, sort=False)[COLUNAS_VALOR].sum()
+
+
+def _aplicar_delta(tabela, delta):
+    delta = delta.groupby(level=COLUNAS_CHAVE, sort=False).sum()
+    existentes = delta.index.isin(tabela.index)
+    tabela = tabela.copy()
+    if existentes.any():
+        chaves = delta.index[existentes]
+        tabela.loc[chaves, COLUNAS_VALOR] = tabela.loc[chaves, COLUNAS_VALOR].to_numpy() + delta[existentes].to_numpy()
+    tabela = pd.concat([tabela, delta[~existentes]])
+    return tabela[tabela['Qtd_Lancamentos'] != 0]
+
+
+def _validos(df_financeiro):
+    return (df_financeiro['Status_Lancamento'] == 'Válido').to_numpy()
+
+
+def _ultimo_id(df_financeiro):
+    return df_financeiro['ID_Lancamento'].iloc[-1] if len(df_financeiro) else None
+
+
+@medido("calculo.construir")
+def construir(df_financeiro):
+    """Agrega do zero todos os lançamentos válidos por (ID_Contrato, Mes_Referencia, Mes_Pagamento)."""
+    validos = _validos(df_financeiro)
+    return {'tabela': _agregar(df_financeiro[validos]), 'validos': validos, 'ultimo_id': _ultimo_id(df_financeiro)}
+
+
+@medido("calculo.atualizar")
+def atualizar(estado, df_financeiro):
+    """
+    Atualiza a tabela materializada a partir do histórico atual. O histórico só cresce:
+    as linhas já conhecidas são comparadas apenas pelo status (cancelamentos/reativações)
+    e as linhas novas são somadas. Se o histórico encolheu ou foi reordenado, reconstrói do zero.
+    """
+    n = 0 if estado is None else len(estado['validos'])
+    if (estado is None or len(df_financeiro) < n
+            or (n and df_financeiro['ID_Lancamento'].iloc[n - 1] != estado['ultimo_id'])):
+        return construir(df_financeiro)
+
+    validos = _validos(df_financeiro)
+    entrou = validos.copy()
+    entrou[:n] = validos[:n] & ~estado['validos']
+    saiu = np.zeros(len(validos), dtype=bool)
+    saiu[:n] = estado['validos'] & ~validos[:n]
+    if not entrou.any() and not saiu.any():
+        return {**estado, 'validos': validos, 'ultimo_id': _ultimo_id(df_financeiro)}
+
+    delta = pd.concat([_agregar(df_financeiro[entrou]), _agregar(df_financeiro[saiu], sinal=-1)])
+    return {'tabela': _aplicar_delta(estado['tabela'], delta), 'validos': validos,
+            'ultimo_id': _ultimo_id(df_financeiro)}
+
+
+# --- CONSULTAS PARA O PAINEL ---
+def periodo(mes_referencia):
+    """Converte 'MM/AAAA' em pd.Period mensal."""
+    mes, ano = str(mes_referencia).split('/')
+    return pd.Period(year=int(ano), month=int(mes), freq='M')
+
+
+def meses_disponiveis(recebimentos, hoje):
+    """Meses de referência com recebimentos, mais o mês atual, do mais recente para o mais antigo."""
+    meses = set(recebimentos['Mes_Referencia'].unique()) | {hoje.strftime("%m/%Y")}
+    validos = [m for m in meses if pd.notna(pd.to_datetime(m, format="%m/%Y", errors='coerce'))]
+    return sorted(validos, key=periodo, reverse=True)
+
+
+def dimensoes(df_contratos, df_imoveis):
+    """Grupo e gestor de cada contrato."""
+    return pd.merge(df_contratos[['ID_Contrato', 'ID_Imovel', 'Gestor_Responsavel']],
+                    df_imoveis[['ID_Imovel', 'Grupo']], on='ID_Imovel', how='left')
+
+
+def esperado_no_mes(df_contratos, mes_referencia):
+    """
+    Contratos com aluguel esperado no mês: os ativos já iniciados e os encerrados/renovados
+    cujo término é posterior ao mês (eles ainda estavam vigentes naquele mês).
+    """
+    p = periodo(mes_referencia)
+    inicio = df_contratos['Data_Inicio'].dt.to_period('M')
+    fim = df_contratos['Data_Fim'].dt.to_period('M')
+    iniciado = inicio.isna() | (inicio <= p)
+    vigente = (df_contratos['Status_Contrato'] == 'Ativo') | (fim.notna() & (fim > p))
+    esperado = df_contratos.loc[iniciado & vigente, ['ID_Contrato', 'Valor_Aluguel_Base']]
+    return esperado.rename(columns={'Valor_Aluguel_Base': 'Esperado'})
+
+
+@medido("calculo.tabela_do_mes")
+def tabela_do_mes(recebimentos, df_contratos, df_imoveis, mes_referencia):
+    """Esperado x recebido por contrato no mês de referência, com grupo e gestor."""
+    recebido = (recebimentos[recebimentos['Mes_Referencia'] == mes_referencia]
+                .groupby('ID_Contrato', as_index=False)['Valor_Recebido'].sum())
+    tabela = pd.merge(esperado_no_mes(df_contratos, mes_referencia), recebido, on='ID_Contrato', how='outer')
+    tabela[['Esperado', 'Valor_Recebido']] = tabela[['Esperado', 'Valor_Recebido']].fillna(0).astype('int64')
+    return pd.merge(tabela, dimensoes(df_contratos, df_imoveis), on='ID_Contrato', how='left')
+
+
+@medido("calculo.receita_por_mes_pagamento")
+def receita_por_mes_pagamento(recebimentos, ate_mes_referencia, meses=12):
+    """Total recebido por mês de pagamento nos `meses` meses que terminam no mês informado."""
+    fim = periodo(ate_mes_referencia)
+    janela = {str(fim - i) for i in range(meses)}
+    receita = recebimentos[recebimentos['Mes_Pagamento'].isin(janela)]
+    return (receita.groupby('Mes_Pagamento', as_index=False)['Valor_Recebido'].sum()
+            .rename(columns={'Mes_Pagamento': 'AnoMes'}).sort_values('AnoMes'))
+
+
+@medido("calculo.receita_por_grupo")
+def receita_por_grupo(recebimentos, df_contratos, df_imoveis):
+    """Receita histórica total por grupo de imóveis."""
+    por_contrato = recebimentos.groupby('ID_Contrato', as_index=False)['Valor_Recebido'].sum()
+    por_contrato = pd.merge(por_contrato, dimensoes(df_contratos, df_imoveis), on='ID_Contrato', how='left')
+    return por_contrato.groupby('Grupo', as_index=False, observed=True)['Valor_Recebido'].sum()
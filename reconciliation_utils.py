@@ -0,0 +1,223 @@
+# reconciliation_utils.py
+"""
+Reconciliação entre imóveis, contratos e lançamentos: encontra os registros que se contradizem
+(com anti-joins vetorizados) e monta um relatório com a planilha, a linha e a ação sugerida.
+Usado pela página de Reconciliação e como rotina em lote:
+
+    python reconciliation_utils.py --saida relatorio.csv
+    python reconciliation_utils.py --sqlite .snapshot/dados.sqlite3
+    python reconciliation_utils.py --planilhas "Carteira 2024" "Carteira 2025"
+
+A rotina em lote lê a cópia local (snapshot da planilha, snapshots das planilhas de uma carteira
+fragmentada ou banco SQLite) e termina com código 1 quando encontra inconsistências.
+"""
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+import schema_utils
+import snapshot_utils
+import storage_utils
+from metrics_utils import medido
+
+COLUNAS_RELATORIO = ['Verificacao', 'Aba', 'Planilha', 'Linha', 'ID', 'Relacionados', 'Detalhe', 'Acao']
+# Coluna de ID de cada aba
+CHAVES = {"Imoveis": "ID_Imovel", "Contratos": "ID_Contrato", "Lancamentos_Financeiros": "ID_Lancamento"}
+
+# Verificações, na ordem do relatório: nome -> (aba dos registros, ação sugerida)
+VERIFICACOES = {
+    "Imóvel alugado sem contrato ativo": (
+        "Imoveis", "Cadastrar o contrato do imóvel ou mudar o status do imóvel para Vago."),
+    "Contrato ativo em imóvel não alugado": (
+        "Contratos", "Marcar o imóvel como Alugado ou encerrar o contrato."),
+    "Contrato ativo em imóvel inexistente": (
+        "Contratos", "Corrigir o ID_Imovel do contrato ou cadastrar o imóvel."),
+    "Imóvel com mais de um contrato ativo": (
+        "Imoveis", "Encerrar ou marcar como Renovado os contratos substituídos."),
+    "Lançamento de contrato inexistente": (
+        "Lancamentos_Financeiros", "Corrigir o ID_Contrato do lançamento ou cancelá-lo."),
+    "ID duplicado": (
+        None, "Renumerar um dos registros (as páginas de edição alteram apenas a primeira linha)."),
+}
+
+
+def _linha(df):
+    """Número da linha na aba unificada (o cabeçalho é a linha 1)."""
+    return df.index.to_series() + 2
+
+
+def _localizar(linhas, fragmentos):
+    """
+    (planilha, linha na planilha) de cada linha da aba unificada, a partir das partes da aba
+    [(planilha, quantidade de linhas)] na ordem do DataFrame. Linhas vazias ficam sem planilha.
+    """
+    linhas = pd.Series(linhas, dtype='Int64').reset_index(drop=True)
+    planilhas = pd.Series('', index=linhas.index, dtype=object)
+    if not fragmentos:
+        return planilhas, linhas
+    quantidades = np.array([quantidade for _, quantidade in fragmentos])
+    inicio = np.cumsum(quantidades) - quantidades
+    validas = linhas.notna().to_numpy()
+    parte = np.searchsorted(inicio, linhas[validas].to_numpy(dtype='int64') - 2, side='right') - 1
+    planilhas[validas] = np.array([planilha for planilha, _ in fragmentos], dtype=object)[parte]
+    linhas[validas] = linhas[validas] - inicio[parte]
+    return planilhas, linhas
+
+
+def _ativos(df_contratos):
+    return df_contratos[df_contratos['Status_Contrato'] == 'Ativo']
+
+
+def _anti_join(esquerda, direita, chave):
+    """Linhas de `esquerda` cuja chave não existe em `direita` (preserva o índice de `esquerda`)."""
+    return esquerda[~esquerda[chave].isin(direita[chave])]
+
+
+# --- VERIFICAÇÕES ---
+def imoveis_alugados_sem_contrato(df_imoveis, df_contratos):
+    alugados = df_imoveis[df_imoveis['Status'] == 'Alugado']
+    sem_contrato = _anti_join(alugados, _ativos(df_contratos), 'ID_Imovel')
+    return pd.DataFrame({'Linha': _linha(sem_contrato), 'ID': sem_contrato['ID_Imovel'],
+                         'Relacionados': '', 'Detalhe': "Status Alugado, nenhum contrato Ativo"})
+
+
+def contratos_ativos_inconsistentes(df_imoveis, df_contratos):
+    """Contratos ativos em imóveis com outro status (primeiro) e em imóveis que não existem (segundo)."""
+    ativos = _ativos(df_contratos)
+    status = ativos['ID_Imovel'].map(df_imoveis.drop_duplicates('ID_Imovel').set_index('ID_Imovel')['Status'])
+    nao_alugado = ativos[status.notna() & (status != 'Alugado')]
+    inexistente = ativos[status.isna()]
+    return (pd.DataFrame({'Linha': _linha(nao_alugado), 'ID': nao_alugado['ID_Contrato'],
+                          'Relacionados': nao_alugado['ID_Imovel'],
+                          'Detalhe': "Imóvel com status " + status[nao_alugado.index].astype(str)}),
+            pd.DataFrame({'Linha': _linha(inexistente), 'ID': inexistente['ID_Contrato'],
+                          'Relacionados': inexistente['ID_Imovel'], 'Detalhe': "Imóvel não cadastrado"}))
+
+
+def imoveis_com_varios_contratos_ativos(df_contratos):
+    ativos = _ativos(df_contratos)
+    repetidos = ativos[ativos['ID_Imovel'].duplicated(keep=False)]
+    por_imovel = repetidos.groupby('ID_Imovel', sort=False)['ID_Contrato'].agg([', '.join, 'size'])
+    return pd.DataFrame({'Linha': pd.NA, 'ID': por_imovel.index, 'Relacionados': por_imovel['join'].to_numpy(),
+                         'Detalhe': por_imovel['size'].astype(str).to_numpy() + " contratos ativos"})
+
+
+def lancamentos_sem_contrato(df_financeiro, df_contratos):
+    orfaos = _anti_join(df_financeiro, df_contratos, 'ID_Contrato')
+    return pd.DataFrame({'Linha': _linha(orfaos), 'ID': orfaos['ID_Lancamento'], 'Relacionados': orfaos['ID_Contrato'],
+                         'Detalhe': "Lançamento " + orfaos['Status_Lancamento'].astype(str) + " de "
+                                    + orfaos['Mes_Referencia'].astype(str)})
+
+
+def ids_duplicados(dados):
+    """IDs repetidos (ou vazios) em cada aba, com as linhas (e as planilhas) em que aparecem."""
+    partes = []
+    for aba, chave in CHAVES.items():
+        df = dados.get(aba)
+        if df is None or chave not in df.columns:
+            continue
+        repetidos = df.loc[df[chave].duplicated(keep=False) | (df[chave] == ''), [chave]]
+        if repetidos.empty:
+            continue
+        planilhas, numeros = _localizar(_linha(repetidos), df.attrs.get('fragmentos'))
+        rotulos = np.where(planilhas != '', planilhas + ":", '') + numeros.astype(str).to_numpy()
+        linhas = pd.Series(rotulos, index=repetidos.index).groupby(repetidos[chave], sort=False).agg(', '.join)
+        partes.append(pd.DataFrame({'Aba': aba, 'Linha': pd.NA, 'ID': linhas.index,
+                                    'Relacionados': "linhas " + linhas.to_numpy(),
+                                    'Detalhe': np.where(linhas.index == '', "ID vazio", "ID repetido")}))
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUNAS_RELATORIO)
+
+
+# --- RELATÓRIO ---
+@medido("calculo.reconciliar")
+def reconciliar(dados):
+    """
+    Executa todas as verificações sobre as abas tipadas ('Imoveis', 'Contratos', 'Lancamentos_Financeiros')
+    e retorna o relatório (uma linha por registro inconsistente), na ordem de VERIFICACOES.
+    Em uma carteira fragmentada, `attrs['fragmentos']` de cada aba localiza a planilha de cada linha.
+    """
+    df_imoveis, df_contratos = dados["Imoveis"], dados["Contratos"]
+    nao_alugado, inexistente = contratos_ativos_inconsistentes(df_imoveis, df_contratos)
+    resultados = {
+        "Imóvel alugado sem contrato ativo": imoveis_alugados_sem_contrato(df_imoveis, df_contratos),
+        "Contrato ativo em imóvel não alugado": nao_alugado,
+        "Contrato ativo em imóvel inexistente": inexistente,
+        "Imóvel com mais de um contrato ativo": imoveis_com_varios_contratos_ativos(df_contratos),
+        "Lançamento de contrato inexistente": lancamentos_sem_contrato(dados["Lancamentos_Financeiros"], df_contratos),
+        "ID duplicado": ids_duplicados(dados),
+    }
+    partes = []
+    for verificacao, encontrados in resultados.items():
+        if encontrados.empty:
+            continue
+        aba, acao = VERIFICACOES[verificacao]
+        encontrados = encontrados.assign(Verificacao=verificacao, Acao=acao)
+        if aba is not None:
+            encontrados['Aba'] = aba
+            planilhas, linhas = _localizar(encontrados['Linha'], dados[aba].attrs.get('fragmentos'))
+            encontrados['Planilha'], encontrados['Linha'] = planilhas.to_numpy(), linhas.to_numpy()
+        partes.append(encontrados.reindex(columns=COLUNAS_RELATORIO))
+    relatorio = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUNAS_RELATORIO)
+    relatorio['Planilha'] = relatorio['Planilha'].fillna('')
+    relatorio['Linha'] = relatorio['Linha'].astype('Int64')
+    return relatorio
+
+
+def resumo(relatorio):
+    """Quantidade de registros encontrados por verificação (inclusive as que não encontraram nada)."""
+    return relatorio['Verificacao'].value_counts().reindex(list(VERIFICACOES), fill_value=0)
+
+
+# --- ROTINA EM LOTE ---
+def planilhas_do_ambiente():
+    """Planilhas da carteira fragmentada em STORAGE_PLANILHAS (separadas por ";"), como no app."""
+    return [titulo.strip() for titulo in os.environ.get("STORAGE_PLANILHAS", "").split(";") if titulo.strip()]
+
+
+def _copia_local(caminho_sqlite=None, planilhas=()):
+    if caminho_sqlite:
+        return storage_utils.ArmazenamentoSQLite(caminho_sqlite)
+    if len(planilhas) > 1:
+        # Cada planilha da carteira tem o próprio snapshot local, como em data_utils.get_armazenamento
+        return storage_utils.ArmazenamentoFragmentado({
+            titulo: storage_utils.ArmazenamentoPlanilha(None, None, diretorio=snapshot_utils.diretorio_planilha(titulo))
+            for titulo in planilhas})
+    return storage_utils.ArmazenamentoPlanilha(None, None)
+
+
+def ler_copia_local(caminho_sqlite=None, planilhas=()):
+    """
+    Abas tipadas lidas da cópia local: o banco SQLite informado, os snapshots das planilhas de uma
+    carteira fragmentada (unidos na ordem das planilhas) ou o snapshot da planilha.
+    """
+    armazenamento = _copia_local(caminho_sqlite, planilhas)
+    dados = {}
+    for aba in CHAVES:
+        partes = armazenamento.ler_fragmentos(aba) if armazenamento.fragmentado else [("", armazenamento.ler(aba))]
+        df = storage_utils.unir([parte for _, parte in partes])
+        dados[aba] = schema_utils.tipar(aba, df.reindex(columns=schema_utils.colunas(aba), fill_value=""))
+        # Partes da aba em cada planilha, para localizar as linhas no relatório
+        dados[aba].attrs['fragmentos'] = [(planilha, len(parte)) for planilha, parte in partes]
+    return dados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconciliação entre imóveis, contratos e lançamentos.")
+    parser.add_argument('--sqlite', help="banco SQLite a verificar (padrão: snapshot local da planilha)")
+    parser.add_argument('--planilhas', nargs='+', default=planilhas_do_ambiente(),
+                        help="planilhas de uma carteira fragmentada, na ordem do app (padrão: STORAGE_PLANILHAS)")
+    parser.add_argument('--saida', help="arquivo CSV para gravar o relatório completo")
+    args = parser.parse_args()
+
+    relatorio = reconciliar(ler_copia_local(args.sqlite, args.planilhas))
+    for verificacao, quantidade in resumo(relatorio).items():
+        print(f"{quantidade:6d}  {verificacao}")
+    if args.saida:
+        relatorio.to_csv(args.saida, index=False, encoding='utf-8-sig')
+        print(f"Relatório gravado em {args.saida}")
+    return 1 if len(relatorio) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# schema_utils.py
+"""
+Esquema declarado de cada aba: a ordem das colunas na planilha e o tipo de cada uma.
+Cada coluna é convertida uma única vez, ao montar o DataFrame da aba:
+  id        - texto (object), usado em junções e no índice ID -> linha
+  texto     - texto livre (object)
+  categoria - poucos valores repetidos (grupo, status, gestor...): dtype category
+  data      - datetime64 (AAAA-MM-DD; outros formatos são interpretados com o dia primeiro)
+  inteiro   - inteiro pequeno (ex.: dia do vencimento)
+  centavos  - valores em dinheiro como inteiros em centavos (int64), com somas exatas
+"""
+import numpy as np
+import pandas as pd
+
+ESQUEMA = {
+    "Imoveis": {
+        'ID_Imovel': 'id', 'Grupo': 'categoria', 'Unidade': 'texto', 'Endereco_Completo': 'texto',
+        'Status': 'categoria', 'Valor_IPTU_Anual': 'centavos', 'Num_Medidor_Saneago': 'texto',
+        'Num_Medidor_Enel': 'texto',
+    },
+    "Contratos": {
+        'ID_Contrato': 'id', 'ID_Imovel': 'id', 'Gestor_Responsavel': 'categoria', 'Nome_Locatario': 'texto',
+        'CPF_Locatario': 'texto', 'Telefone_Locatario': 'texto', 'Email_Locatario': 'texto', 'Data_Inicio': 'data',
+        'Data_Fim': 'data', 'Valor_Aluguel_Base': 'centavos', 'Dia_Vencimento': 'inteiro',
+        'Tipo_Garantia': 'categoria', 'Valor_da_Garantia': 'centavos', 'Indice_Reajuste': 'categoria',
+        'Status_Contrato': 'categoria', 'Observacoes_do_Contrato': 'texto',
+    },
+    "Lancamentos_Financeiros": {
+        'ID_Lancamento': 'id', 'ID_Contrato': 'id', 'Mes_Referencia': 'texto', 'Data_Pagamento': 'data',
+        'Valor_Aluguel_Pago': 'centavos', 'Multa_Juros': 'centavos', 'Valor_Total_Pago': 'centavos',
+        'Forma_Pagamento': 'categoria', 'Status_Pagamento': 'categoria', 'Status_Lancamento': 'categoria',
+    },
+    "Gestores": {'Nome_Gestor': 'texto'},
+}
+
+FORMATO_DATA = '%Y-%m-%d'
+
+
+def colunas(aba):
+    """Colunas da aba, na ordem da planilha."""
+    return list(ESQUEMA[aba])
+
+
+def colunas_do_tipo(aba, tipo):
+    return [coluna for coluna, tipo_coluna in ESQUEMA.get(aba, {}).items() if tipo_coluna == tipo]
+
+
+# --- CONVERSÃO DE VALORES ---
+def centavos(serie):
+    """Converte textos como '1.234,56', 'R$ 1234.56' ou '1234' em centavos (int64); inválidos viram 0."""
+    texto = serie.astype(str).str.replace(r'[R$\s]', '', regex=True)
+    formato_br = texto.str.contains(',', regex=False)
+    texto = texto.where(~formato_br, texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    return (pd.to_numeric(texto, errors='coerce') * 100).round().fillna(0).astype('int64')
+
+
+def reais(valor_em_centavos):
+    """Centavos -> reais (float), para exibição e para gravar na planilha."""
+    if isinstance(valor_em_centavos, (pd.Series, pd.DataFrame, np.ndarray)):
+        return valor_em_centavos / 100
+    return float(valor_em_centavos) / 100
+
+
+def datas(serie):
+    """AAAA-MM-DD é convertido em uma única passada; só os demais textos passam pela inferência de formato."""
+    convertidas = pd.to_datetime(serie, format=FORMATO_DATA, errors='coerce')
+    restantes = convertidas.isna() & serie.astype(str).str.strip().ne('') & serie.notna()
+    if restantes.any():
+        convertidas[restantes] = pd.to_datetime(serie[restantes], format='mixed', dayfirst=True, errors='coerce')
+    return convertidas
+
+
+def _converter(serie, tipo):
+    if tipo in ('id', 'texto'):
+        return serie.fillna('').astype(str)
+    if tipo == 'categoria':
+        return serie.fillna('').astype(str).astype('category')
+    if tipo == 'data':
+        return datas(serie)
+    if tipo == 'inteiro':
+        return pd.to_numeric(serie, errors='coerce').fillna(0).astype('int8')
+    if tipo == 'centavos':
+        return centavos(serie)
+    raise ValueError(f"Tipo de coluna desconhecido: {tipo}")
+
+
+def tipar(aba, df):
+    """Converte as colunas de texto de uma aba conforme o esquema; colunas fora do esquema ficam como estão."""
+    tipos = ESQUEMA.get(aba, {})
+    return df.assign(**{coluna: _converter(df[coluna], tipos[coluna]) for coluna in df.columns if coluna in tipos})
+
+
+def concatenar(aba, df, novas):
+    """Concatena linhas já tipadas sem perder o dtype category (as categorias das duas partes são unidas)."""
+    df, novas = df.copy(), novas.copy()
+    for coluna in colunas_do_tipo(aba, 'categoria'):
+        if coluna in df.columns and coluna in novas.columns:
+            categorias = df[coluna].cat.categories.union(novas[coluna].cat.categories)
+            df[coluna] = df[coluna].cat.set_categories(categorias)
+            novas[coluna] = novas[coluna].cat.set_categories(categorias)
+    return pd.concat([df, novas], ignore_index=True)
+
+
+def para_exibicao(aba, df):
+    """Cópia do DataFrame com os valores em dinheiro em reais, para tabelas e gráficos."""
+    valores = [coluna for coluna in colunas_do_tipo(aba, 'centavos') if coluna in df.columns]
+    return df.assign(**{coluna: reais(df[coluna]) for coluna in valores})
+
+
+# --- SQL ---
+def sql_centavos(coluna):
+    """Expressão SQL (SQLite) equivalente a `centavos` para uma coluna de texto."""
+    texto = f"""REPLACE(REPLACE(REPLACE("{coluna}", 'R$', ''), ' ', ''), char(160), '')"""
+    numero = f"""CASE WHEN instr({texto}, ',') > 0 THEN REPLACE(REPLACE({texto}, '.', ''), ',', '.') ELSE {texto} END"""
+    return f"CAST(ROUND(CAST({numero} AS REAL) * 100) AS INTEGER)"
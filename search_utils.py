@@ -0,0 +1,132 @@
+# search_utils.py
+"""
+Busca de locatários, imóveis e contratos. Os textos pesquisáveis (nome e CPF do locatário,
+ID_Contrato, ID_Imovel, Unidade e Endereco_Completo) são normalizados e quebrados em termos uma
+única vez; o índice guarda o vocabulário ordenado e, para cada termo, as linhas em que aparece.
+Uma consulta procura cada palavra digitada como prefixo dos termos (busca binária no vocabulário)
+e, quando nenhum termo começa com ela, pelos termos parecidos (erros de digitação).
+As linhas precisam conter todas as palavras; o resultado são os IDs das melhores, em ordem.
+"""
+import re
+import difflib
+import numpy as np
+import pandas as pd
+from import_utils import normalizar_texto
+from metrics_utils import medido
+
+MAX_RESULTADOS = 20
+# Notas de cada palavra: termo igual, termo que começa com a palavra e termo parecido (x semelhança)
+NOTA_EXATA, NOTA_PREFIXO, NOTA_PARECIDA = 1.0, 0.8, 0.6
+SEMELHANCA_MINIMA = 0.75
+SEPARADOR = r'[^A-Z0-9]+'
+
+
+def _termos(texto):
+    return [termo for termo in re.split(SEPARADOR, texto) if termo]
+
+
+def _compacto(serie):
+    """'123.456.789-00' -> '12345678900' e 'CASA-2-20240105' -> 'CASA220240105': busca sem pontuação."""
+    return serie.astype(str).str.upper().str.replace(SEPARADOR, '', regex=True)
+
+
+# --- CONSTRUÇÃO ---
+def indexar(ids, rotulos, campos, compactos=()):
+    """
+    Índice invertido das linhas: `campos` são as colunas de texto pesquisáveis e `compactos`, as que
+    também são indexadas sem pontuação (IDs, CPF). IDs repetidos ficam só com a primeira linha.
+    """
+    unicos = ~pd.Series(ids).duplicated().to_numpy()
+    ids, rotulos, campos = np.asarray(ids)[unicos], np.asarray(rotulos)[unicos], campos[unicos].reset_index(drop=True)
+    texto = campos.iloc[:, 0].astype(str)
+    for coluna in campos.columns[1:]:
+        texto = texto + ' ' + campos[coluna].astype(str)
+    texto = normalizar_texto(texto)
+    for coluna in compactos:
+        texto = texto + ' ' + _compacto(campos[coluna])
+    termos = texto.str.split(SEPARADOR, regex=True).explode()
+    termos = pd.DataFrame({'linha': termos.index.to_numpy(), 'termo': termos.to_numpy()})
+    termos = termos[termos['termo'].notna() & (termos['termo'] != '')].drop_duplicates()
+
+    vocabulario, posicao = np.unique(termos['termo'].to_numpy(dtype=str), return_inverse=True)
+    ordem = np.argsort(posicao, kind='stable')
+    return {'ids': ids, 'rotulos': dict(zip(ids, rotulos)), 'ordem_rotulos': np.argsort(rotulos, kind='stable'),
+            'vocabulario': vocabulario, 'tamanhos': np.char.str_len(vocabulario),
+            'inicio': np.searchsorted(posicao[ordem], np.arange(len(vocabulario) + 1)),
+            'linhas': termos['linha'].to_numpy()[ordem]}
+
+
+@medido("calculo.construir_indices_busca")
+def construir_indices(df_contratos, df_imoveis):
+    """Índices de 'contratos' (locatário, CPF, IDs e dados do imóvel) e de 'imoveis' (com o locatário atual)."""
+    imoveis = df_imoveis.drop_duplicates('ID_Imovel')
+    contratos = df_contratos.merge(imoveis[['ID_Imovel', 'Unidade', 'Endereco_Completo']], on='ID_Imovel',
+                                   how='left').fillna({'Unidade': '', 'Endereco_Completo': ''})
+    rotulos_contratos = (contratos['Nome_Locatario'].astype(str) + " - " + contratos['ID_Contrato'].astype(str)
+                         + " (Imóvel " + contratos['ID_Imovel'].astype(str) + ", "
+                         + contratos['Status_Contrato'].astype(str) + ")")
+    campos = ['Nome_Locatario', 'CPF_Locatario', 'ID_Contrato', 'ID_Imovel', 'Unidade', 'Endereco_Completo']
+    indice_contratos = indexar(contratos['ID_Contrato'].to_numpy(), rotulos_contratos.to_numpy(), contratos[campos],
+                               compactos=['CPF_Locatario', 'ID_Contrato', 'ID_Imovel'])
+
+    ativos = df_contratos[df_contratos['Status_Contrato'] == 'Ativo'].drop_duplicates('ID_Imovel', keep='last')
+    locatarios = ativos.set_index('ID_Imovel')['Nome_Locatario']
+    imoveis = imoveis.assign(Locatario=imoveis['ID_Imovel'].map(locatarios).fillna(''))
+    rotulos_imoveis = (imoveis['Unidade'].astype(str) + " (" + imoveis['ID_Imovel'].astype(str) + ") - "
+                       + imoveis['Endereco_Completo'].astype(str))
+    indice_imoveis = indexar(imoveis['ID_Imovel'].to_numpy(), rotulos_imoveis.to_numpy(),
+                             imoveis[['ID_Imovel', 'Unidade', 'Endereco_Completo', 'Grupo', 'Locatario']],
+                             compactos=['ID_Imovel'])
+    return {'contratos': indice_contratos, 'imoveis': indice_imoveis}
+
+
+# --- CONSULTA ---
+def _notas_do_termo(indice, termo):
+    """Nota de cada linha para uma palavra da consulta (0 = a linha não contém a palavra)."""
+    vocabulario = indice['vocabulario']
+    inicio = np.searchsorted(vocabulario, termo, side='left')
+    fim = np.searchsorted(vocabulario, termo + '\uffff', side='left')
+    posicoes = np.arange(inicio, fim)
+    notas_termos = np.where(vocabulario[posicoes] == termo, NOTA_EXATA, NOTA_PREFIXO)
+    if not len(posicoes) and len(termo) >= 3:
+        # Nenhum termo começa com a palavra: procura termos parecidos de tamanho próximo
+        proximos = np.flatnonzero(np.abs(indice['tamanhos'] - len(termo)) <= 2)
+        parecidos = difflib.get_close_matches(termo, vocabulario[proximos].tolist(), n=10, cutoff=SEMELHANCA_MINIMA)
+        posicoes = np.searchsorted(vocabulario, parecidos)
+        notas_termos = np.array([NOTA_PARECIDA * difflib.SequenceMatcher(None, termo, parecido).ratio()
+                                 for parecido in parecidos])
+
+    notas = np.zeros(len(indice['ids']))
+    quantidades = indice['inicio'][posicoes + 1] - indice['inicio'][posicoes]
+    if quantidades.sum():
+        # Linhas de todos os termos encontrados, concatenadas sem laço em Python
+        deslocamentos = np.arange(quantidades.sum()) - np.repeat(np.cumsum(quantidades) - quantidades, quantidades)
+        linhas = indice['linhas'][np.repeat(indice['inicio'][posicoes], quantidades) + deslocamentos]
+        np.maximum.at(notas, linhas, np.repeat(notas_termos, quantidades))
+    return notas
+
+
+@medido("calculo.buscar")
+def buscar(indice, consulta, k=MAX_RESULTADOS, permitidos=None):
+    """
+    IDs das `k` linhas que melhor atendem à consulta (todas as palavras precisam ser encontradas),
+    da maior para a menor nota e, no empate, pelo rótulo. Sem consulta, retorna as primeiras pelo
+    rótulo. `permitidos` restringe a busca a esses IDs (ex.: filtros da página).
+    """
+    candidatas = np.ones(len(indice['ids']), dtype=bool)
+    if permitidos is not None:
+        candidatas &= pd.Series(indice['ids']).isin(list(permitidos)).to_numpy()
+    pontos = np.zeros(len(indice['ids']))
+    for termo in _termos(normalizar_texto(pd.Series([consulta or ''])).iloc[0]):
+        notas = _notas_do_termo(indice, termo)
+        candidatas &= notas > 0
+        pontos += notas
+    # Ordem estável pelo rótulo, depois pela nota (decrescente)
+    ordem = indice['ordem_rotulos'][candidatas[indice['ordem_rotulos']]]
+    ordem = ordem[np.argsort(-pontos[ordem], kind='stable')]
+    return indice['ids'][ordem[:k]].tolist()
+
+
+def rotulo(indice, id_registro):
+    """Texto exibido para o ID na lista de resultados."""
+    return indice['rotulos'].get(id_registro, str(id_registro))
@@ -0,0 +1,40 @@
+# sequence_utils.py
+import os
+import json
+from filelock import FileLock
+from snapshot_utils import SNAPSHOT_DIR
+
+ARQUIVO_SEQUENCIAS = os.path.join(SNAPSHOT_DIR, "sequencias.json")
+
+
+def _ler():
+    if not os.path.exists(ARQUIVO_SEQUENCIAS):
+        return {}
+    with open(ARQUIVO_SEQUENCIAS, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _gravar(estado):
+    tmp = f"{ARQUIVO_SEQUENCIAS}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(estado, f)
+    os.replace(tmp, ARQUIVO_SEQUENCIAS)
+
+
+def reservar_ids(nome_sequencia, quantidade=1, maior_existente=None):
+    """
+    Reserva `quantidade` IDs consecutivos e exclusivos da sequência, sem consultar a planilha.
+    O último valor entregue fica registrado em um arquivo local protegido por lock, o que
+    garante IDs distintos entre sessões, threads e processos do mesmo servidor.
+    `maior_existente` é chamado a cada reserva e retorna o maior ID já presente nos dados: a
+    sequência continua do maior entre ele e o último valor registrado, para não repetir IDs de
+    linhas incluídas fora dela (à mão na planilha ou por outro servidor).
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    with FileLock(f"{ARQUIVO_SEQUENCIAS}.lock"):
+        estado = _ler()
+        ultimo = max(estado.get(nome_sequencia, 0), int(maior_existente()) if maior_existente else 0)
+        primeiro = ultimo + 1
+        estado[nome_sequencia] = primeiro + quantidade - 1
+        _gravar(estado)
+    return list(range(primeiro, primeiro + quantidade))
@@ -0,0 +1,182 @@
+# snapshot_utils.py
+import os
+import re
+import json
+import time
+import pandas as pd
+from filelock import FileLock
+from gspread.utils import fill_gaps, rowcol_to_a1
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", ".snapshot")
+
+# Abas que só crescem: a cada sincronização são relidas apenas as linhas novas
+# e as colunas que ainda podem mudar depois do lançamento.
+ABAS_SO_APPEND = {"Lancamentos_Financeiros": ["Status_Lancamento"]}
+# Edições nas demais colunas de linhas antigas não aparecem na leitura incremental: de tempos em
+# tempos (segundos) a aba é relida inteira e comparada linha a linha pelo hash.
+VERIFICACAO_COMPLETA = 30 * 60
+
+COLUNA_HASH = "_hash"
+
+
+# --- ARQUIVOS DO SNAPSHOT ---
+# Cada planilha de uma carteira fragmentada tem o próprio diretório (padrão: SNAPSHOT_DIR)
+def _caminho(nome, extensao, diretorio=None):
+    return os.path.join(diretorio or SNAPSHOT_DIR, f"{nome}.{extensao}")
+
+
+def diretorio_planilha(titulo):
+    """Diretório do snapshot de uma planilha de carteira fragmentada."""
+    return os.path.join(SNAPSHOT_DIR, "planilhas", re.sub(r'[^\w-]+', '_', titulo))
+
+
+def _lock(nome, diretorio=None):
+    os.makedirs(diretorio or SNAPSHOT_DIR, exist_ok=True)
+    return FileLock(_caminho(nome, "lock", diretorio))
+
+
+def _coluna_a1(indice):
+    """Letra da coluna (1 -> A, 10 -> J)."""
+    return rowcol_to_a1(1, indice)[:-1]
+
+
+def _hash_linhas(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _montar(headers, linhas):
+    """Monta o DataFrame de strings de uma aba e calcula o hash de cada linha."""
+    linhas = [linha[:len(headers)] for linha in fill_gaps(linhas, cols=len(headers))]
+    df = pd.DataFrame(linhas, columns=headers, dtype=object)
+    df[COLUNA_HASH] = _hash_linhas(df) if not df.empty else pd.Series(dtype='uint64')
+    return df
+
+
+def _carregar(nome, diretorio=None):
+    if not all(os.path.exists(_caminho(nome, extensao, diretorio)) for extensao in ("parquet", "json")):
+        return None, None
+    with open(_caminho(nome, "json", diretorio), encoding="utf-8") as f:
+        meta = json.load(f)
+    return pd.read_parquet(_caminho(nome, "parquet", diretorio)), meta
+
+
+def _gravar_meta(nome, meta, diretorio=None):
+    tmp_json = _caminho(nome, "json.tmp", diretorio)
+    with open(tmp_json, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_json, _caminho(nome, "json", diretorio))
+
+
+def _salvar(nome, df, headers, diretorio=None, completo_em=None):
+    """
+    Grava o snapshot de forma atômica (arquivo temporário + os.replace).
+    `completo_em`: quando a aba foi lida inteira pela última vez (padrão: agora).
+    """
+    agora = time.time()
+    meta = {"headers": headers, "linhas": len(df), "sincronizado_em": agora,
+            "completo_em": agora if completo_em is None else completo_em}
+    tmp_parquet = _caminho(nome, "parquet.tmp", diretorio)
+    df.to_parquet(tmp_parquet, index=False)
+    os.replace(tmp_parquet, _caminho(nome, "parquet", diretorio))
+    _gravar_meta(nome, meta, diretorio)
+
+
+def existe(nome, diretorio=None):
+    return os.path.exists(_caminho(nome, "parquet", diretorio))
+
+
+def ler_snapshot(nome, diretorio=None):
+    """Retorna o conteúdo do snapshot local de uma aba (todas as colunas como texto)."""
+    df, _ = _carregar(nome, diretorio)
+    if df is None:
+        return pd.DataFrame()
+    return df.drop(columns=[COLUNA_HASH])
+
+
+def ler_coluna(nome, coluna, diretorio=None):
+    """Lê apenas uma coluna do snapshot local (Parquet é colunar, o resto do arquivo não é carregado)."""
+    if not existe(nome, diretorio):
+        return pd.Series(dtype=object)
+    return pd.read_parquet(_caminho(nome, "parquet", diretorio), columns=[coluna])[coluna]
+
+
+# --- SINCRONIZAÇÃO INCREMENTAL ---
+def planejar_sincronizacao(nome, diretorio=None):
+    """
+    Define quais ranges precisam ser lidos da planilha para atualizar o snapshot da aba.
+    Abas comuns são relidas inteiras; abas em ABAS_SO_APPEND leem só o cabeçalho,
+    as linhas a partir da última já conhecida e suas colunas mutáveis, e são relidas
+    inteiras a cada VERIFICACAO_COMPLETA segundos.
+    """
+    df, meta = _carregar(nome, diretorio)
+    if (df is None or df.empty or nome not in ABAS_SO_APPEND
+            or time.time() - meta.get("completo_em", 0) > VERIFICACAO_COMPLETA):
+        return {"modo": "completo", "ranges": [f"'{nome}'"]}
+    n = len(df)
+    ultima_coluna = _coluna_a1(len(meta["headers"]))
+    ranges = [f"'{nome}'!A1:{ultima_coluna}1", f"'{nome}'!A{n + 1}:{ultima_coluna}"]
+    for col in ABAS_SO_APPEND[nome]:
+        letra = _coluna_a1(meta["headers"].index(col) + 1)
+        ranges.append(f"'{nome}'!{letra}2:{letra}{n + 1}")
+    return {"modo": "incremental", "ranges": ranges, "linhas": n}
+
+
+def substituir_snapshot(nome, values, diretorio=None):
+    """Substitui o snapshot pela aba inteira. Retorna True se o conteúdo mudou."""
+    headers = values[0] if values else []
+    novo = _montar(headers, values[1:])
+    with _lock(nome, diretorio):
+        atual, meta = _carregar(nome, diretorio)
+        if (atual is not None and meta["headers"] == headers and len(atual) == len(novo)
+                and (atual[COLUNA_HASH].to_numpy() == novo[COLUNA_HASH].to_numpy()).all()):
+            agora = time.time()
+            _gravar_meta(nome, {**meta, "sincronizado_em": agora, "completo_em": agora}, diretorio)
+            return False
+        _salvar(nome, novo, headers, diretorio)
+    return True
+
+
+def aplicar_sincronizacao(nome, plano, valores, diretorio=None):
+    """
+    Aplica ao snapshot os valores lidos para os ranges do plano.
+    Retorna None se o snapshot divergiu da planilha (linhas removidas ou reordenadas,
+    cabeçalho alterado) e a aba precisa ser relida inteira; caso contrário, True/False
+    indicando se houve alteração.
+    """
+    if plano["modo"] == "completo":
+        return substituir_snapshot(nome, valores[0], diretorio)
+
+    cabecalho, cauda, *mutaveis = valores
+    with _lock(nome, diretorio):
+        df, meta = _carregar(nome, diretorio)
+        headers = meta["headers"] if meta else None
+        if df is None or len(df) != plano["linhas"] or not cabecalho or cabecalho[0] != headers or not cauda:
+            return None
+        cauda = _montar(headers, cauda)
+
+        # A primeira linha da cauda é a última já conhecida: se o hash não bate, a aba mudou de forma
+        if cauda[COLUNA_HASH].iloc[0] != df[COLUNA_HASH].iloc[-1]:
+            return None
+
+        alterado = False
+        n = len(df)
+        linhas_alteradas = pd.Series(False, index=df.index)
+        for col, valores_col in zip(ABAS_SO_APPEND[nome], mutaveis):
+            atuais = [linha[0] if linha else "" for linha in valores_col[:n]]
+            atuais += [""] * (n - len(atuais))
+            diferentes = df[col].to_numpy() != pd.Series(atuais, dtype=object).to_numpy()
+            if diferentes.any():
+                df.loc[diferentes, col] = [v for v, d in zip(atuais, diferentes) if d]
+                linhas_alteradas |= diferentes
+        if linhas_alteradas.any():
+            df.loc[linhas_alteradas, COLUNA_HASH] = _hash_linhas(df.loc[linhas_alteradas, headers])
+            alterado = True
+
+        novas = cauda.iloc[1:]
+        if not novas.empty:
+            df = pd.concat([df, novas], ignore_index=True)
+            alterado = True
+
+        if alterado:
+            _salvar(nome, df, headers, diretorio, completo_em=meta.get("completo_em", 0))
+    return alterado
@@ -0,0 +1,214 @@
+# statement_utils.py
+"""
+Extratos mensais por gestor e por grupo: para o mês de referência, cada contrato com o aluguel
+esperado, o recebido (lançamentos válidos), o pendente e o cancelado. Os contratos de cada extrato
+são escolhidos pelo mesmo filtro da página de Histórico Financeiro. Rotina em lote:
+
+    python statement_utils.py --mes 09/2025 --saida extratos
+    python statement_utils.py --mes 09/2025 --por gestor --formato pdf --sqlite .snapshot/dados.sqlite3
+    python statement_utils.py --mes 09/2025 --planilhas "Carteira 2024" "Carteira 2025"
+
+Os dados são lidos uma única vez da cópia local (snapshot da planilha, snapshots das planilhas de
+uma carteira fragmentada ou banco SQLite) e os extratos são calculados juntos; só a geração dos
+arquivos (XLSX/PDF) é dividida entre processos. Valores em centavos.
+"""
+import os
+import re
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from receivables_utils import esperado_no_mes, periodo
+from reconciliation_utils import ler_copia_local, planilhas_do_ambiente
+from schema_utils import reais
+from metrics_utils import medido
+
+COLUNAS_EXTRATO = ['ID_Contrato', 'Nome_Locatario', 'ID_Imovel', 'Esperado', 'Recebido', 'Pendente', 'Cancelado',
+                   'Lancamentos']
+COLUNAS_VALOR = ['Esperado', 'Recebido', 'Pendente', 'Cancelado']
+COLUNAS_LANCAMENTOS = ['ID_Lancamento', 'ID_Contrato', 'Data_Pagamento', 'Valor_Total_Pago', 'Forma_Pagamento',
+                       'Status_Lancamento']
+# Extratos por dimensão: opção da linha de comando -> coluna dos contratos
+DIMENSOES = {'gestor': 'Gestor_Responsavel', 'grupo': 'Grupo'}
+FORMATOS = ['xlsx', 'pdf']
+LINHAS_POR_PAGINA = 30
+
+
+# --- FILTROS (os mesmos do Histórico Financeiro) ---
+def contratos_filtrados(df_contratos, df_imoveis, gestor="Todos", grupo="Todos"):
+    """Contratos (com o Grupo do imóvel) do gestor e do grupo escolhidos; "Todos" não filtra."""
+    contratos = pd.merge(df_contratos, df_imoveis[['ID_Imovel', 'Grupo']], on='ID_Imovel', how='left')
+    if gestor != "Todos":
+        contratos = contratos[contratos['Gestor_Responsavel'] == gestor]
+    if grupo != "Todos":
+        contratos = contratos[contratos['Grupo'] == grupo]
+    return contratos
+
+
+def filtrar_lancamentos(df_financeiro, ids_contratos=None, data_inicial=None, data_final=None):
+    """Lançamentos dos contratos informados e, opcionalmente, com pagamento entre as datas."""
+    if ids_contratos is not None:
+        df_financeiro = df_financeiro[df_financeiro['ID_Contrato'].isin([str(i) for i in ids_contratos])]
+    if data_inicial is not None and data_final is not None:
+        df_financeiro = df_financeiro.dropna(subset=['Data_Pagamento'])
+        datas = df_financeiro['Data_Pagamento'].dt.date
+        df_financeiro = df_financeiro[(datas >= data_inicial) & (datas <= data_final)]
+    return df_financeiro
+
+
+# --- EXTRATOS ---
+@medido("calculo.extrato_do_mes")
+def extrato_do_mes(df_contratos, df_financeiro, mes_referencia):
+    """
+    Uma linha por contrato com aluguel esperado ou com lançamentos no mês de referência ('MM/AAAA'):
+    esperado, recebido (válidos), pendente (esperado menos recebido, nunca negativo), cancelado e
+    a quantidade de lançamentos. As colunas de df_contratos que não são do extrato são mantidas.
+    """
+    do_mes = df_financeiro[df_financeiro['Mes_Referencia'].astype(str) == mes_referencia]
+    valido = do_mes['Status_Lancamento'] == 'Válido'
+    valores = pd.DataFrame({'ID_Contrato': do_mes['ID_Contrato'].astype(str),
+                            'Recebido': do_mes['Valor_Total_Pago'].where(valido, 0),
+                            'Cancelado': do_mes['Valor_Total_Pago'].where(~valido, 0), 'Lancamentos': 1})
+    valores = valores.groupby('ID_Contrato', as_index=False).sum()
+    esperado = esperado_no_mes(df_contratos, mes_referencia).drop_duplicates('ID_Contrato')
+    extrato = pd.merge(esperado, valores, on='ID_Contrato', how='outer')
+    extrato = extrato.merge(df_contratos.drop(columns=['Valor_Aluguel_Base']).drop_duplicates('ID_Contrato'),
+                            on='ID_Contrato', how='inner')
+    numericas = ['Esperado', 'Recebido', 'Cancelado', 'Lancamentos']
+    extrato[numericas] = extrato[numericas].fillna(0).astype('int64')
+    extrato['Pendente'] = (extrato['Esperado'] - extrato['Recebido']).clip(lower=0)
+    return extrato.sort_values('ID_Contrato', ignore_index=True)
+
+
+def separar_extratos(extrato, df_financeiro, mes_referencia, dimensoes=tuple(DIMENSOES)):
+    """
+    Divide o extrato do mês em um extrato por gestor e por grupo. Retorna uma lista de dicionários
+    com a dimensão, o nome, o mês, a tabela dos contratos e os lançamentos do mês desses contratos.
+    """
+    do_mes = df_financeiro[df_financeiro['Mes_Referencia'].astype(str) == mes_referencia]
+    extratos = []
+    for dimensao in dimensoes:
+        coluna = DIMENSOES[dimensao]
+        nomes = extrato[coluna].astype(object).where(extrato[coluna].notna(), '(sem cadastro)')
+        for nome, contratos in extrato.groupby(nomes.astype(str), sort=True):
+            lancamentos = do_mes[do_mes['ID_Contrato'].isin(contratos['ID_Contrato'])]
+            extratos.append({'dimensao': dimensao, 'nome': nome, 'mes': mes_referencia,
+                             'contratos': contratos[COLUNAS_EXTRATO].reset_index(drop=True),
+                             'lancamentos': lancamentos[COLUNAS_LANCAMENTOS].sort_values('Data_Pagamento')})
+    return extratos
+
+
+def totais(contratos):
+    return contratos[COLUNAS_VALOR].sum()
+
+
+# --- ARQUIVOS ---
+def nome_arquivo(extrato, formato):
+    """extrato_gestor_Maria_Silva_2025-09.xlsx"""
+    nome = re.sub(r'[^\w-]+', '_', extrato['nome']).strip('_')
+    return f"extrato_{extrato['dimensao']}_{nome}_{periodo(extrato['mes']).strftime('%Y-%m')}.{formato}"
+
+
+def _em_reais(tabela, colunas):
+    return tabela.assign(**{coluna: reais(tabela[coluna]) for coluna in colunas})
+
+
+def _titulo(extrato):
+    return f"Extrato de {extrato['mes']} - {extrato['dimensao'].capitalize()}: {extrato['nome']}"
+
+
+def gravar_xlsx(extrato, caminho):
+    """Planilha com o resumo, os contratos e os lançamentos do mês (valores em reais)."""
+    soma = totais(extrato['contratos'])
+    resumo = pd.DataFrame({'Campo': ['Extrato', 'Contratos'] + [f"{coluna} (R$)" for coluna in COLUNAS_VALOR],
+                           'Valor': [_titulo(extrato), len(extrato['contratos'])] + list(reais(soma).round(2))})
+    with pd.ExcelWriter(caminho, engine='openpyxl') as arquivo:
+        resumo.to_excel(arquivo, sheet_name='Resumo', index=False)
+        _em_reais(extrato['contratos'], COLUNAS_VALOR).to_excel(arquivo, sheet_name='Contratos', index=False)
+        lancamentos = _em_reais(extrato['lancamentos'], ['Valor_Total_Pago'])
+        lancamentos.assign(Data_Pagamento=lancamentos['Data_Pagamento'].dt.date).to_excel(
+            arquivo, sheet_name='Lancamentos', index=False)
+
+
+def gravar_pdf(extrato, caminho):
+    """Tabela dos contratos, em páginas A4 deitadas, com os totais na última linha."""
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    tabela = extrato['contratos'].astype({coluna: object for coluna in COLUNAS_VALOR})
+    for coluna in COLUNAS_VALOR:
+        tabela[coluna] = [f"{valor:,.2f}" for valor in reais(extrato['contratos'][coluna])]
+    soma = reais(totais(extrato['contratos']))
+    linhas = tabela.astype(str).values.tolist()
+    linhas.append(['Total', '', ''] + [f"{soma[coluna]:,.2f}" for coluna in COLUNAS_VALOR]
+                  + [str(extrato['contratos']['Lancamentos'].sum())])
+    paginas = [linhas[inicio:inicio + LINHAS_POR_PAGINA] for inicio in range(0, len(linhas), LINHAS_POR_PAGINA)]
+    with PdfPages(caminho) as pdf:
+        for numero, pagina in enumerate(paginas, start=1):
+            figura, eixo = plt.subplots(figsize=(11.69, 8.27))
+            eixo.axis('off')
+            eixo.set_title(f"{_titulo(extrato)}   (página {numero}/{len(paginas)})", loc='left', fontsize=11)
+            cabecalho = [f"{coluna} (R$)" if coluna in COLUNAS_VALOR else coluna for coluna in COLUNAS_EXTRATO]
+            celulas = eixo.table(cellText=pagina, colLabels=cabecalho, loc='upper center', cellLoc='left')
+            celulas.auto_set_font_size(False)
+            celulas.set_fontsize(7)
+            pdf.savefig(figura)
+            plt.close(figura)
+
+
+GRAVADORES = {'xlsx': gravar_xlsx, 'pdf': gravar_pdf}
+
+
+def gerar_arquivos(extrato, formatos, diretorio):
+    """Grava o extrato em cada formato; executado nos processos auxiliares."""
+    caminhos = []
+    for formato in formatos:
+        caminho = os.path.join(diretorio, nome_arquivo(extrato, formato))
+        GRAVADORES[formato](extrato, caminho)
+        caminhos.append(caminho)
+    return caminhos
+
+
+# --- ROTINA EM LOTE ---
+def main():
+    parser = argparse.ArgumentParser(description="Extratos mensais por gestor e por grupo.")
+    parser.add_argument('--mes', default=pd.Timestamp.now().strftime('%m/%Y'),
+                        help="mês de referência no formato MM/AAAA (padrão: mês atual)")
+    parser.add_argument('--por', nargs='+', choices=list(DIMENSOES), default=list(DIMENSOES),
+                        help="extratos por gestor, por grupo ou ambos (padrão)")
+    parser.add_argument('--formato', nargs='+', choices=FORMATOS, default=['xlsx'], help="formatos dos arquivos")
+    parser.add_argument('--saida', default='extratos', help="diretório dos arquivos (padrão: extratos)")
+    parser.add_argument('--sqlite', help="banco SQLite a usar (padrão: snapshot local da planilha)")
+    parser.add_argument('--planilhas', nargs='+', default=planilhas_do_ambiente(),
+                        help="planilhas de uma carteira fragmentada, na ordem do app (padrão: STORAGE_PLANILHAS)")
+    parser.add_argument('--processos', type=int, default=None, help="processos para gerar os arquivos (padrão: CPUs)")
+    args = parser.parse_args()
+    try:
+        periodo(args.mes)
+    except ValueError:
+        parser.error(f"mês inválido: {args.mes} (use MM/AAAA)")
+
+    dados = ler_copia_local(args.sqlite, args.planilhas)
+    df_financeiro = dados["Lancamentos_Financeiros"]
+    extrato = extrato_do_mes(contratos_filtrados(dados["Contratos"], dados["Imoveis"]), df_financeiro, args.mes)
+    extratos = separar_extratos(extrato, df_financeiro, args.mes, args.por)
+    if not extratos:
+        print(f"Nenhum contrato com aluguel esperado ou lançamentos em {args.mes}.")
+        return 1
+
+    os.makedirs(args.saida, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=args.processos) as executor:
+        gerados = executor.map(gerar_arquivos, extratos, [args.formato] * len(extratos),
+                               [args.saida] * len(extratos))
+        for extrato_gerado, caminhos in zip(extratos, gerados):
+            soma = reais(totais(extrato_gerado['contratos']))
+            print(f"{len(extrato_gerado['contratos']):5d} contrato(s)  recebido R$ {soma['Recebido']:12,.2f}  "
+                  f"pendente R$ {soma['Pendente']:12,.2f}  {', '.join(caminhos)}")
+    print(f"{len(extratos)} extrato(s) gravado(s) em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+# storage_utils.py
+"""
+Armazenamento dos dados do app, com implementações da mesma interface e das mesmas quatro
+tabelas: a planilha do Google (lida através do snapshot local), uma carteira dividida em várias
+planilhas (lidas em paralelo) e um banco SQLite local.
+Todas as leituras devolvem as colunas como texto, na ordem da planilha; a tipagem fica com schema_utils.
+"""
+import os
+import sys
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+import pandas as pd
+from gspread.utils import a1_range_to_grid_range, rowcol_to_a1
+import schema_utils
+import snapshot_utils
+from metrics_utils import registrar_chamada_api, span
+
+# Colunas de cada tabela, na ordem das colunas da planilha (declaradas em schema_utils)
+ESQUEMA = {aba: schema_utils.colunas(aba) for aba in schema_utils.ESQUEMA}
+
+COLUNA_LINHA = "_linha"  # número da linha equivalente na planilha (o cabeçalho é a linha 1)
+MAX_CONEXOES = 4  # planilhas de uma carteira fragmentada lidas ao mesmo tempo
+MAX_RANGES_POR_LEITURA = 200  # ranges por `values_batch_get` ao conferir células (limite do tamanho da URL)
+
+
+def _texto(valor):
+    return "" if valor is None else str(valor)
+
+
+# --- GOOGLE SHEETS ---
+class ArmazenamentoPlanilha:
+    """Planilha do Google: leituras do snapshot local, sincronizado em lote; escritas via journal."""
+    nome = "sheets"
+    escrita_direta = False
+    suporta_sql = False
+    fragmentado = False
+
+    def __init__(self, abrir_planilha, abrir_aba, diretorio=None):
+        self._abrir_planilha = abrir_planilha
+        self._abrir_aba = abrir_aba
+        self.diretorio = diretorio  # diretório do snapshot (padrão: snapshot_utils.SNAPSHOT_DIR)
+
+    def sincronizar(self, nomes):
+        """
+        Atualiza os snapshots locais das abas com uma única chamada `values_batch_get`,
+        lendo apenas as linhas novas/alteradas das abas que só crescem.
+        """
+        sh = self._abrir_planilha()
+        planos = {nome: snapshot_utils.planejar_sincronizacao(nome, self.diretorio) for nome in nomes}
+        with span("sheets.values_batch_get"):
+            registrar_chamada_api('leitura')
+            resposta = sh.values_batch_get([r for nome in nomes for r in planos[nome]["ranges"]])
+        value_ranges = iter(resposta.get('valueRanges', []))
+
+        divergentes = []
+        for nome in nomes:
+            valores = [next(value_ranges, {}).get('values', []) for _ in planos[nome]["ranges"]]
+            if snapshot_utils.aplicar_sincronizacao(nome, planos[nome], valores, self.diretorio) is None:
+                divergentes.append(nome)
+
+        if divergentes:
+            # O snapshot não corresponde mais à planilha (linhas removidas ou reordenadas): relê as abas inteiras
+            with span("sheets.values_batch_get"):
+                registrar_chamada_api('leitura')
+                resposta = sh.values_batch_get([f"'{nome}'" for nome in divergentes])
+            for nome, vr in zip(divergentes, resposta.get('valueRanges', [])):
+                snapshot_utils.substituir_snapshot(nome, vr.get('values', []), self.diretorio)
+
+    def ler(self, nome):
+        return snapshot_utils.ler_snapshot(nome, self.diretorio)
+
+    def ler_coluna(self, nome, coluna):
+        return snapshot_utils.ler_coluna(nome, coluna, self.diretorio)
+
+    def ids_atuais(self, nome, coluna):
+        """Valores atuais de uma coluna lidos direto da planilha (sem passar pelo snapshot)."""
+        with span("sheets.col_values"):
+            registrar_chamada_api('leitura')
+            return self._abrir_aba(nome).col_values(ESQUEMA[nome].index(coluna) + 1)[1:]
+
+    def ids_por_linha(self, nome, coluna, linhas, planilha=""):
+        """
+        {número da linha: valor} da coluna nas linhas informadas, lidas direto da planilha (sem passar
+        pelo snapshot). Só essas células são lidas: linhas seguidas viram um único range e os ranges
+        vão em lote (`values_batch_get`). Linhas vazias ou além do fim da aba ficam com "".
+        """
+        indice = ESQUEMA[nome].index(coluna) + 1
+        trechos = []
+        for linha in sorted(set(linhas)):
+            if trechos and linha == trechos[-1][1] + 1:
+                trechos[-1][1] = linha
+            else:
+                trechos.append([linha, linha])
+        valores = {}
+        for inicio in range(0, len(trechos), MAX_RANGES_POR_LEITURA):
+            lote = trechos[inicio:inicio + MAX_RANGES_POR_LEITURA]
+            with span("sheets.values_batch_get"):
+                registrar_chamada_api('leitura')
+                resposta = self._abrir_planilha().values_batch_get(
+                    [f"'{nome}'!{rowcol_to_a1(primeira, indice)}:{rowcol_to_a1(ultima, indice)}"
+                     for primeira, ultima in lote])
+            for (primeira, ultima), vr in zip(lote, resposta.get('valueRanges', [])):
+                celulas = vr.get('values', [])
+                for deslocamento in range(ultima - primeira + 1):
+                    celula = celulas[deslocamento] if deslocamento < len(celulas) else []
+                    valores[primeira + deslocamento] = celula[0] if celula else ""
+        return valores
+
+    def ler_linha(self, nome, linha, planilha=""):
+        """
+        Valores atuais de uma linha lidos direto da planilha (sem passar pelo snapshot).
+        None se a linha não existe (ou está vazia).
+        """
+        with span("sheets.row_values"):
+            registrar_chamada_api('leitura')
+            return self._abrir_aba(nome).row_values(linha) or None
+
+    def escrever(self, aba, tipo, dados, planilha=""):
+        worksheet = self._abrir_aba(aba)
+        with span(f"sheets.{'append_rows' if tipo == 'append' else 'batch_update'}"):
+            registrar_chamada_api('escrita')
+            if tipo == 'append':
+                worksheet.append_rows(dados)
+            else:
+                worksheet.batch_update(dados)
+
+
+# --- CARTEIRA EM VÁRIAS PLANILHAS ---
+class SincronizacaoParcial(Exception):
+    """Algumas planilhas da carteira não foram lidas; `falhas` = {planilha: exceção}."""
+
+    def __init__(self, falhas):
+        self.falhas = falhas
+        super().__init__("; ".join(f"{planilha}: {erro}" for planilha, erro in falhas.items()))
+
+
+def unir(partes):
+    """Junta as partes de uma aba lidas de cada planilha (as ainda sem snapshot são ignoradas)."""
+    partes = [df for df in partes if not df.columns.empty]
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+
+class ArmazenamentoFragmentado:
+    """
+    Carteira dividida em várias planilhas do Google com as mesmas abas e colunas (ex.: uma por
+    grupo ou por ano), cada uma com o próprio snapshot local. A sincronização lê as planilhas em
+    paralelo e as leituras devolvem as abas unificadas, na ordem das planilhas. As escritas vão para
+    a planilha informada; sem planilha (linhas novas), para a última da lista.
+    """
+    nome = "sheets"
+    escrita_direta = False
+    suporta_sql = False
+    fragmentado = True
+
+    def __init__(self, fragmentos):
+        self.fragmentos = fragmentos  # {título da planilha: ArmazenamentoPlanilha}
+        self.principal = list(fragmentos)[-1]
+
+    def _em_paralelo(self, funcao):
+        """Executa `funcao(fragmento)` em todas as planilhas. Retorna ({planilha: resultado}, {planilha: exceção})."""
+        with ThreadPoolExecutor(max_workers=min(MAX_CONEXOES, len(self.fragmentos))) as executor:
+            futuros = {titulo: executor.submit(funcao, fragmento) for titulo, fragmento in self.fragmentos.items()}
+        resultados, falhas = {}, {}
+        for titulo, futuro in futuros.items():
+            try:
+                resultados[titulo] = futuro.result()
+            except Exception as e:
+                falhas[titulo] = e
+        return resultados, falhas
+
+    def sincronizar(self, nomes):
+        """
+        Sincroniza as abas em todas as planilhas ao mesmo tempo (uma `values_batch_get` por planilha).
+        As que falharem mantêm o último snapshot e são informadas em SincronizacaoParcial.
+        """
+        with span("sheets.sincronizar_planilhas"):
+            _, falhas = self._em_paralelo(lambda fragmento: fragmento.sincronizar(nomes))
+        if falhas:
+            raise SincronizacaoParcial(falhas)
+
+    def ler_fragmentos(self, nome):
+        """[(planilha, DataFrame da aba)], na ordem das planilhas."""
+        return [(titulo, fragmento.ler(nome)) for titulo, fragmento in self.fragmentos.items()]
+
+    def ler(self, nome):
+        return unir([df for _, df in self.ler_fragmentos(nome)])
+
+    def ler_coluna(self, nome, coluna):
+        return pd.concat([fragmento.ler_coluna(nome, coluna) for fragmento in self.fragmentos.values()],
+                         ignore_index=True)
+
+    def ids_atuais(self, nome, coluna):
+        resultados, falhas = self._em_paralelo(lambda fragmento: fragmento.ids_atuais(nome, coluna))
+        if falhas:
+            raise SincronizacaoParcial(falhas)
+        return [valor for titulo in self.fragmentos for valor in resultados[titulo]]
+
+    def ids_por_linha(self, nome, coluna, linhas, planilha=""):
+        return self.fragmentos[planilha or self.principal].ids_por_linha(nome, coluna, linhas)
+
+    def ler_linha(self, nome, linha, planilha=""):
+        return self.fragmentos[planilha or self.principal].ler_linha(nome, linha)
+
+    def escrever(self, aba, tipo, dados, planilha=""):
+        self.fragmentos[planilha or self.principal].escrever(aba, tipo, dados)
+
+
+# --- SQLITE LOCAL ---
+class ArmazenamentoSQLite:
+    """
+    Banco SQLite local com uma tabela por aba. A coluna `_linha` guarda o número da linha
+    equivalente na planilha, de modo que as escritas por range A1 funcionam nos dois backends.
+    Filtros e agregações podem ser enviados em SQL com `consultar`.
+    """
+    nome = "sqlite"
+    escrita_direta = True
+    suporta_sql = True
+    fragmentado = False
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with closing(self._conectar()) as conexao:
+            for nome, colunas in ESQUEMA.items():
+                definicao = ", ".join(f'"{coluna}" TEXT' for coluna in colunas)
+                conexao.execute(f'CREATE TABLE IF NOT EXISTS "{nome}" ({COLUNA_LINHA} INTEGER PRIMARY KEY, {definicao})')
+            conexao.execute('CREATE INDEX IF NOT EXISTS idx_lancamentos_contrato '
+                            'ON "Lancamentos_Financeiros" (ID_Contrato, Data_Pagamento)')
+
+    def _conectar(self):
+        conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        return conexao
+
+    def sincronizar(self, nomes):
+        # O banco local é a própria fonte dos dados: não há nada a sincronizar
+        return None
+
+    def consultar(self, sql, parametros=()):
+        """Executa uma consulta SQL e devolve o resultado como DataFrame."""
+        with span("sqlite.consultar"), closing(self._conectar()) as conexao:
+            return pd.read_sql_query(sql, conexao, params=parametros)
+
+    def ler(self, nome):
+        colunas = ", ".join(f'"{coluna}"' for coluna in ESQUEMA[nome])
+        return self.consultar(f'SELECT {colunas} FROM "{nome}" ORDER BY {COLUNA_LINHA}').fillna("")
+
+    def ler_coluna(self, nome, coluna):
+        return self.consultar(f'SELECT "{coluna}" FROM "{nome}" ORDER BY {COLUNA_LINHA}')[coluna]
+
+    def ids_atuais(self, nome, coluna):
+        return self.ler_coluna(nome, coluna).tolist()
+
+    def ids_por_linha(self, nome, coluna, linhas, planilha=""):
+        linhas = sorted(set(linhas))
+        valores = dict.fromkeys(linhas, "")
+        with closing(self._conectar()) as conexao:
+            # Em lotes, abaixo do limite de parâmetros do SQLite
+            for inicio in range(0, len(linhas), 500):
+                lote = linhas[inicio:inicio + 500]
+                valores.update((linha, _texto(valor)) for linha, valor in conexao.execute(
+                    f'SELECT {COLUNA_LINHA}, "{coluna}" FROM "{nome}" WHERE {COLUNA_LINHA} IN '
+                    f'({", ".join("?" * len(lote))})', lote))
+        return valores
+
+    def ler_linha(self, nome, linha, planilha=""):
+        colunas = ", ".join(f'"{coluna}"' for coluna in ESQUEMA[nome])
+        with closing(self._conectar()) as conexao:
+            valores = conexao.execute(f'SELECT {colunas} FROM "{nome}" WHERE {COLUNA_LINHA} = ?', (linha,)).fetchone()
+        return [_texto(valor) for valor in valores] if valores else None
+
+    def escrever(self, aba, tipo, dados, planilha=""):
+        colunas = ESQUEMA[aba]
+        with span("sqlite.escrever"), self._lock, closing(self._conectar()) as conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                if tipo == 'append':
+                    self._acrescentar(conexao, aba, colunas, dados)
+                else:
+                    self._atualizar(conexao, aba, colunas, dados)
+                conexao.execute("COMMIT")
+            except Exception:
+                conexao.execute("ROLLBACK")
+                raise
+
+    def _acrescentar(self, conexao, aba, colunas, linhas):
+        ultima = conexao.execute(f'SELECT COALESCE(MAX({COLUNA_LINHA}), 1) FROM "{aba}"').fetchone()[0]
+        nomes = ", ".join(f'"{coluna}"' for coluna in colunas)
+        marcadores = ", ".join("?" * (len(colunas) + 1))
+        conexao.executemany(
+            f'INSERT INTO "{aba}" ({COLUNA_LINHA}, {nomes}) VALUES ({marcadores})',
+            [(ultima + i + 1, *[_texto(v) for v in (list(linha) + [""] * len(colunas))[:len(colunas)]])
+             for i, linha in enumerate(linhas)])
+
+    def _atualizar(self, conexao, aba, colunas, atualizacoes):
+        for atualizacao in atualizacoes:
+            grade = a1_range_to_grid_range(atualizacao['range'])
+            primeira_linha = grade.get('startRowIndex', 0) + 1
+            primeira_coluna = grade.get('startColumnIndex', 0)
+            for i, valores in enumerate(atualizacao['values']):
+                alvo = colunas[primeira_coluna:primeira_coluna + len(valores)]
+                atribuicoes = ", ".join(f'"{coluna}" = ?' for coluna in alvo)
+                conexao.execute(f'UPDATE "{aba}" SET {atribuicoes} WHERE {COLUNA_LINHA} = ?',
+                                (*[_texto(v) for v in valores[:len(alvo)]], primeira_linha + i))
+
+    def substituir(self, nome, linhas):
+        """Substitui todo o conteúdo da tabela pelas linhas informadas (sem o cabeçalho)."""
+        with self._lock, closing(self._conectar()) as conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            conexao.execute(f'DELETE FROM "{nome}"')
+            self._acrescentar(conexao, nome, ESQUEMA[nome], linhas)
+            conexao.execute("COMMIT")
+
+
+def copiar_snapshot_para_sqlite(caminho):
+    """Cria (ou recria) o banco SQLite com o conteúdo atual dos snapshots locais da planilha."""
+    banco = ArmazenamentoSQLite(caminho)
+    for nome, colunas in ESQUEMA.items():
+        df = snapshot_utils.ler_snapshot(nome).reindex(columns=colunas, fill_value="")
+        banco.substituir(nome, df.fillna("").values.tolist())
+    return banco
+
+
+if __name__ == "__main__":
+    # Uso: python storage_utils.py caminho/do/banco.sqlite3
+    destino = sys.argv[1] if len(sys.argv) > 1 else os.path.join(snapshot_utils.SNAPSHOT_DIR, "dados.sqlite3")
+    copiar_snapshot_para_sqlite(destino)
+    print(f"Banco SQLite gerado em {destino}")
@@ -0,0 +1,253 @@
+# synthetic_utils.py
+"""
+Carteiras sintéticas para benchmarks e testes sem acesso à rede: gera as quatro abas
+(Imoveis, Contratos, Lancamentos_Financeiros, Gestores) em qualquer escala e oferece uma
+planilha falsa, em memória, com o subconjunto da API do gspread usado pelo app.
+"""
+import time
+import numpy as np
+import pandas as pd
+from gspread.cell import Cell
+from gspread.utils import a1_range_to_grid_range
+from storage_utils import ESQUEMA
+
+NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Fábio', 'Gabriela', 'Hugo', 'Isabela', 'João', 'Larissa',
+         'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Tiago', 'Vanessa', 'Wagner']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima',
+              'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes']
+TIPOS_GRUPO = ['Edifício', 'Residencial', 'Condomínio', 'Galeria']
+FORMAS_PAGAMENTO = ['PIX', 'Transferência', 'Boleto', 'Dinheiro']
+
+
+# --- GERAÇÃO DAS ABAS ---
+def _texto_data(datas):
+    return pd.DatetimeIndex(datas).strftime('%Y-%m-%d').to_numpy()
+
+
+def gerar_carteira(n_imoveis=100, meses_historico=24, hoje=None, imoveis_por_grupo=20, n_gestores=4, semente=0):
+    """
+    Gera uma carteira completa como DataFrames de texto (mesmas colunas da planilha).
+    Cerca de 85% dos imóveis têm contrato ativo; parte deles tem também um contrato anterior,
+    encerrado. Há um lançamento por mês de vigência até `hoje`, com atrasos, inadimplência,
+    multas e cancelamentos ocasionais. O histórico cresce com n_imoveis × meses_historico.
+    """
+    rng = np.random.default_rng(semente)
+    hoje = pd.Timestamp(hoje or pd.Timestamp.now()).normalize()
+    inicio_historico = (hoje - pd.DateOffset(months=meses_historico)).to_period('M').to_timestamp()
+
+    # Gestores
+    gestores = np.array([f"{NOMES[i % len(NOMES)]} {SOBRENOMES[(i * 7) % len(SOBRENOMES)]}" for i in range(n_gestores)])
+    df_gestores = pd.DataFrame({'Nome_Gestor': gestores})
+
+    # Imóveis
+    indices = np.arange(n_imoveis)
+    n_grupos = max(1, -(-n_imoveis // imoveis_por_grupo))
+    nomes_grupos = np.array([f"{TIPOS_GRUPO[g % len(TIPOS_GRUPO)]} {SOBRENOMES[g % len(SOBRENOMES)]} {g // len(SOBRENOMES) + 1}"
+                             for g in range(n_grupos)])
+    grupo = indices // imoveis_por_grupo
+    unidade = (indices % imoveis_por_grupo) + 101
+    ids_imoveis = np.char.add(np.char.add(np.char.zfill(grupo.astype(str), 4), '-'), unidade.astype(str))
+    alugado = rng.random(n_imoveis) < 0.85
+    df_imoveis = pd.DataFrame({
+        'ID_Imovel': ids_imoveis,
+        'Grupo': nomes_grupos[grupo],
+        'Unidade': np.char.add('Apto ', unidade.astype(str)),
+        'Endereco_Completo': np.char.add('Rua Sintética, ', (grupo + 1).astype(str)),
+        'Status': np.where(alugado, 'Alugado', 'Vago'),
+        'Valor_IPTU_Anual': (rng.integers(600, 4000, n_imoveis)).astype(str),
+        'Num_Medidor_Saneago': rng.integers(10 ** 7, 10 ** 8, n_imoveis).astype(str),
+        'Num_Medidor_Enel': rng.integers(10 ** 7, 10 ** 8, n_imoveis).astype(str),
+    })
+
+    # Contratos: um ativo por imóvel alugado e, para ~40% deles, um anterior já encerrado
+    ativos = np.flatnonzero(alugado)
+    anteriores = ativos[rng.random(len(ativos)) < 0.4]
+    dias_atras = rng.integers(30, max(31, meses_historico * 30), len(ativos))
+    inicio_ativo = hoje - pd.to_timedelta(dias_atras, unit='D')
+    fim_ativo = inicio_ativo + pd.DateOffset(months=30)
+    inicio_anterior = inicio_ativo[np.isin(ativos, anteriores)] - pd.DateOffset(months=30)
+    fim_anterior = inicio_ativo[np.isin(ativos, anteriores)] - pd.Timedelta(days=1)
+
+    imovel_contrato = np.concatenate([anteriores, ativos])
+    inicio = pd.DatetimeIndex(np.concatenate([inicio_anterior.to_numpy(), inicio_ativo.to_numpy()]))
+    fim = pd.DatetimeIndex(np.concatenate([fim_anterior.to_numpy(), pd.DatetimeIndex(fim_ativo).to_numpy()]))
+    n_contratos = len(imovel_contrato)
+    status = np.concatenate([np.where(rng.random(len(anteriores)) < 0.5, 'Encerrado', 'Renovado'),
+                             np.full(len(ativos), 'Ativo')])
+    valor = (rng.integers(60, 400, n_contratos) * 10).astype(float)
+    locatario = np.array([f"{NOMES[a]} {SOBRENOMES[b]} {SOBRENOMES[c]}" for a, b, c in zip(
+        rng.integers(0, len(NOMES), n_contratos), rng.integers(0, len(SOBRENOMES), n_contratos),
+        rng.integers(0, len(SOBRENOMES), n_contratos))])
+    ids_contratos = np.char.add(np.char.add(ids_imoveis[imovel_contrato], '-'), inicio.strftime('%Y%m%d').to_numpy())
+    dia_vencimento = rng.integers(1, 29, n_contratos)
+    df_contratos = pd.DataFrame({
+        'ID_Contrato': ids_contratos,
+        'ID_Imovel': ids_imoveis[imovel_contrato],
+        'Gestor_Responsavel': gestores[rng.integers(0, n_gestores, n_contratos)],
+        'Nome_Locatario': locatario,
+        'CPF_Locatario': rng.integers(10 ** 10, 10 ** 11, n_contratos).astype(str),
+        'Telefone_Locatario': np.char.add('62 9', rng.integers(10 ** 7, 10 ** 8, n_contratos).astype(str)),
+        'Email_Locatario': np.char.add(np.char.add('locatario', np.arange(n_contratos).astype(str)), '@exemplo.com'),
+        'Data_Inicio': _texto_data(inicio),
+        'Data_Fim': _texto_data(fim),
+        'Valor_Aluguel_Base': valor.astype(str),
+        'Dia_Vencimento': dia_vencimento.astype(str),
+        'Tipo_Garantia': rng.choice(['Caução', 'Fiador', 'Seguro Fiança'], n_contratos),
+        'Valor_da_Garantia': (valor * rng.choice([0, 2, 3], n_contratos)).astype(str),
+        'Indice_Reajuste': rng.choice(['IGP-M', 'IPCA'], n_contratos),
+        'Status_Contrato': status,
+        'Observacoes_do_Contrato': '',
+    })
+
+    # Lançamentos: um por mês de vigência dentro do histórico, até o mês atual
+    primeiro_mes = np.maximum(inicio.to_period('M').astype('int64'), inicio_historico.to_period('M').ordinal)
+    ultimo_mes = np.minimum(fim.to_period('M').astype('int64'), hoje.to_period('M').ordinal)
+    meses = np.maximum(ultimo_mes - primeiro_mes + 1, 0)
+    contrato = np.repeat(np.arange(n_contratos), meses)
+    deslocamento = np.arange(len(contrato)) - np.repeat(np.cumsum(meses) - meses, meses)
+    periodo = pd.PeriodIndex.from_ordinals(primeiro_mes[contrato] + deslocamento, freq='M')
+    atraso = np.where(rng.random(len(contrato)) < 0.15, rng.integers(1, 40, len(contrato)), rng.integers(-5, 1, len(contrato)))
+    pagamento = periodo.to_timestamp() + pd.to_timedelta(dia_vencimento[contrato] - 1 + atraso, unit='D')
+    pago = (rng.random(len(contrato)) > 0.04) & (pagamento <= hoje)
+    contrato, periodo, pagamento, atraso = contrato[pago], periodo[pago], pagamento[pago], atraso[pago]
+    n_lancamentos = len(contrato)
+    multa = np.where(atraso > 0, np.round(valor[contrato] * 0.02 + valor[contrato] * 0.00033 * atraso, 2), 0.0)
+    df_financeiro = pd.DataFrame({
+        'ID_Contrato': ids_contratos[contrato],
+        'Mes_Referencia': periodo.strftime('%m/%Y'),
+        'Data_Pagamento': _texto_data(pagamento),
+        'Valor_Aluguel_Pago': valor[contrato].astype(str),
+        'Multa_Juros': multa.astype(str),
+        'Valor_Total_Pago': (valor[contrato] + multa).astype(str),
+        'Forma_Pagamento': np.array(FORMAS_PAGAMENTO)[rng.integers(0, len(FORMAS_PAGAMENTO), n_lancamentos)],
+        'Status_Pagamento': 'Pago',
+        'Status_Lancamento': np.where(rng.random(n_lancamentos) < 0.03, 'Cancelado', 'Válido'),
+    })
+    # O histórico é gravado na ordem em que os pagamentos aconteceram, com IDs sequenciais
+    df_financeiro = df_financeiro.iloc[np.argsort(pagamento.to_numpy(), kind='stable')].reset_index(drop=True)
+    df_financeiro['ID_Lancamento'] = np.arange(1, n_lancamentos + 1).astype(str)
+
+    return {
+        "Imoveis": df_imoveis[ESQUEMA["Imoveis"]],
+        "Contratos": df_contratos[ESQUEMA["Contratos"]],
+        "Lancamentos_Financeiros": df_financeiro[ESQUEMA["Lancamentos_Financeiros"]],
+        "Gestores": df_gestores,
+    }
+
+
+def para_valores(carteira):
+    """Converte a carteira para o formato da API do Sheets: {aba: [cabeçalho, linha, ...]}."""
+    return {nome: [list(df.columns)] + df.astype(str).values.tolist() for nome, df in carteira.items()}
+
+
+# --- PLANILHA FALSA (SUBCONJUNTO DA API DO GSPREAD) ---
+class AbaFalsa:
+    """Aba em memória com os métodos de `gspread.Worksheet` usados pelo app."""
+
+    def __init__(self, planilha, title, valores):
+        self.planilha = planilha
+        self.title = title
+        self.valores = [list(linha) for linha in valores]
+
+    def _intervalo(self, range_a1):
+        if not range_a1:
+            return self.valores
+        grade = a1_range_to_grid_range(range_a1)
+        linhas = self.valores[grade.get('startRowIndex', 0):grade.get('endRowIndex', len(self.valores))]
+        inicio, fim = grade.get('startColumnIndex', 0), grade.get('endColumnIndex')
+        return [linha[inicio:fim] for linha in linhas]
+
+    def _gravar(self, linha, coluna, valor):
+        while len(self.valores) < linha:
+            self.valores.append([])
+        atual = self.valores[linha - 1]
+        atual.extend([""] * (coluna - len(atual)))
+        atual[coluna - 1] = valor
+
+    def get_all_values(self):
+        self.planilha._chamada()
+        return [list(linha) for linha in self.valores]
+
+    def get_all_records(self):
+        self.planilha._chamada()
+        cabecalho = self.valores[0] if self.valores else []
+        return [dict(zip(cabecalho, linha)) for linha in self.valores[1:]]
+
+    def row_values(self, row):
+        self.planilha._chamada()
+        return list(self.valores[row - 1]) if row <= len(self.valores) else []
+
+    def col_values(self, col):
+        self.planilha._chamada()
+        return [linha[col - 1] if len(linha) >= col else "" for linha in self.valores]
+
+    def find(self, query, in_row=None, in_column=None):
+        self.planilha._chamada()
+        for i, linha in enumerate(self.valores, start=1):
+            if in_row is not None and i != in_row:
+                continue
+            for j, valor in enumerate(linha, start=1):
+                if (in_column is None or j == in_column) and str(valor) == str(query):
+                    return Cell(i, j, valor)
+        return None
+
+    def append_row(self, values, **kwargs):
+        self.append_rows([values])
+
+    def append_rows(self, values, **kwargs):
+        self.planilha._chamada()
+        self.valores.extend(list(linha) for linha in values)
+
+    def update_cell(self, row, col, value):
+        self.planilha._chamada()
+        self._gravar(row, col, value)
+
+    def update(self, values=None, range_name=None, **kwargs):
+        # Aceita também a ordem antiga de argumentos (range, valores)
+        if isinstance(values, str):
+            values, range_name = range_name, values
+        self.batch_update([{'range': range_name or 'A1', 'values': values}])
+
+    def batch_update(self, data, **kwargs):
+        self.planilha._chamada()
+        for item in data:
+            grade = a1_range_to_grid_range(item['range'])
+            for i, linha in enumerate(item['values']):
+                for j, valor in enumerate(linha):
+                    self._gravar(grade.get('startRowIndex', 0) + i + 1, grade.get('startColumnIndex', 0) + j + 1, valor)
+
+
+class PlanilhaFalsa:
+    """
+    Planilha em memória com os métodos de `gspread.Spreadsheet` usados pelo app.
+    `latencia` (segundos) é somada a cada chamada, para simular a rede; `chamadas` conta as chamadas à API.
+    """
+
+    def __init__(self, valores_por_aba, latencia=0.0):
+        self.latencia = latencia
+        self.chamadas = 0
+        self._abas = {nome: AbaFalsa(self, nome, valores) for nome, valores in valores_por_aba.items()}
+
+    def _chamada(self):
+        self.chamadas += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def worksheet(self, title):
+        return self._abas[title]
+
+    def worksheets(self):
+        return list(self._abas.values())
+
+    def values_batch_get(self, ranges, params=None):
+        self._chamada()
+        resposta = []
+        for item in ranges:
+            nome, _, range_a1 = item.partition('!')
+            nome = nome.strip("'")
+            valores = self._abas[nome]._intervalo(range_a1)
+            while valores and not any(valores[-1]):
+                valores = valores[:-1]
+            resposta.append({'range': item, 'values': [list(linha) for linha in valores]})
+        return {'valueRanges': resposta}
+
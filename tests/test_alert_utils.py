@@ -0,0 +1,41 @@
+# tests/test_alert_utils.py
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from alert_utils import contratos_a_vencer, proximo_aniversario, proximos_reajustes
+from schema_utils import colunas, tipar
+
+HOJE = pd.Timestamp('2025-06-10')
+
+
+def _contratos(*linhas):
+    return tipar("Contratos", pd.DataFrame([{
+        'ID_Contrato': id_contrato, 'Data_Inicio': inicio, 'Data_Fim': fim, 'Status_Contrato': status}
+        for id_contrato, inicio, fim, status in linhas]).reindex(columns=colunas("Contratos"), fill_value=""))
+
+
+def test_contratos_a_vencer_no_limite_de_dias():
+    df = _contratos(('hoje', '2024-06-10', '2025-06-10', 'Ativo'),
+                    ('amanha', '2024-06-11', '2025-06-11', 'Ativo'),
+                    ('limite', '2024-08-09', '2025-08-09', 'Ativo'),
+                    ('depois', '2024-08-10', '2025-08-10', 'Ativo'),
+                    ('encerrado', '2024-06-11', '2025-06-11', 'Encerrado'))
+    a_vencer = contratos_a_vencer(df, HOJE).set_index('ID_Contrato')['Dias_Restantes']
+    assert a_vencer.to_dict() == {'amanha': 1, 'limite': 60}
+
+
+def test_proximos_reajustes_no_limite_de_dias():
+    df = _contratos(('hoje', '2023-06-10', '', 'Ativo'),
+                    ('amanha', '2023-06-11', '', 'Ativo'),
+                    ('limite', '2024-07-10', '', 'Ativo'),
+                    ('depois', '2024-07-11', '', 'Ativo'),
+                    ('sem_inicio', '', '', 'Ativo'))
+    reajustes = proximos_reajustes(df, HOJE).set_index('ID_Contrato')['Proximo_Reajuste']
+    assert reajustes.to_dict() == {'amanha': pd.Timestamp('2025-06-11'), 'limite': pd.Timestamp('2025-07-10')}
+
+
+def test_aniversario_de_29_de_fevereiro_e_de_contrato_ainda_nao_iniciado():
+    inicio = pd.Series(pd.to_datetime(['2024-02-29', '2025-09-01']))
+    assert proximo_aniversario(inicio, HOJE).tolist() == [pd.Timestamp('2026-02-28'), pd.Timestamp('2026-09-01')]
@@ -0,0 +1,64 @@
+# tests/test_arrears_utils.py
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from arrears_utils import cobrancas, cobrancas_em_aberto
+from schema_utils import tipar
+
+REAJUSTE = "[Reajuste 01/2025] IGPM 10.00%: R$ 1000.00 -> R$ 1100.00"
+
+
+def _contrato(valor="1100,00", observacoes=REAJUSTE):
+    return tipar("Contratos", pd.DataFrame([{
+        'ID_Contrato': 'C1', 'ID_Imovel': 'I1', 'Gestor_Responsavel': 'Ana', 'Nome_Locatario': 'Maria',
+        'CPF_Locatario': '', 'Telefone_Locatario': '', 'Email_Locatario': '', 'Data_Inicio': '2024-01-05',
+        'Data_Fim': '2026-01-04', 'Valor_Aluguel_Base': valor, 'Dia_Vencimento': '5', 'Tipo_Garantia': '',
+        'Valor_da_Garantia': '', 'Indice_Reajuste': 'IGP-M', 'Status_Contrato': 'Ativo',
+        'Observacoes_do_Contrato': observacoes}]))
+
+
+def _recebimentos(pagamentos):
+    return pd.DataFrame({'ID_Contrato': 'C1', 'Mes_Referencia': list(pagamentos),
+                         'Valor_Recebido': list(pagamentos.values())})
+
+
+def _pagos_em_dia(ate_mes=6):
+    pagamentos = {f"{mes:02d}/2024": 100000 for mes in range(1, 13)}
+    pagamentos.update({f"{mes:02d}/2025": 110000 for mes in range(1, ate_mes + 1)})
+    return pagamentos
+
+
+def test_meses_antes_do_reajuste_cobram_o_valor_anterior():
+    grade = cobrancas(_contrato(), pd.Timestamp('2025-06-10'))
+    esperado = grade.set_index('Mes')['Esperado']
+    assert (esperado[esperado.index < 2025 * 12] == 100000).all()
+    assert (esperado[esperado.index >= 2025 * 12] == 110000).all()
+
+
+def test_contrato_pago_em_dia_antes_e_depois_do_reajuste_nao_fica_em_aberto():
+    em_aberto = cobrancas_em_aberto(_contrato(), _recebimentos(_pagos_em_dia()), pd.Timestamp('2025-06-10'))
+    assert em_aberto.empty
+
+
+def test_saldo_em_aberto_usa_o_aluguel_vigente_no_mes():
+    pagamentos = _pagos_em_dia(ate_mes=5)
+    pagamentos['03/2024'] = 90000
+    em_aberto = cobrancas_em_aberto(_contrato(), _recebimentos(pagamentos), pd.Timestamp('2025-06-10'))
+    assert em_aberto[['Mes_Referencia', 'Em_Aberto']].values.tolist() == [['03/2024', 10000], ['06/2025', 110000]]
+    assert em_aberto.set_index('Mes_Referencia').loc['03/2024', 'Faixa'] == '90+'
+
+
+def test_varios_reajustes():
+    observacoes = f"[Reajuste 01/2024] IGPM 11.11%: R$ 900.00 -> R$ 1000.00 {REAJUSTE}"
+    contrato = _contrato(observacoes=observacoes).assign(Data_Inicio=pd.Timestamp('2023-01-05'))
+    esperado = cobrancas(contrato, pd.Timestamp('2025-02-10')).set_index('Mes')['Esperado']
+    assert esperado[2023 * 12] == 90000
+    assert esperado[2024 * 12] == 100000
+    assert esperado[2025 * 12 + 1] == 110000
+
+
+def test_sem_historico_usa_o_valor_atual():
+    grade = cobrancas(_contrato(observacoes=""), pd.Timestamp('2025-06-10'))
+    assert (grade['Esperado'] == 110000).all()
@@ -0,0 +1,60 @@
+# tests/test_import_utils.py
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from import_utils import conciliar, ler_extrato
+from schema_utils import colunas, tipar
+
+CSV = """Data;Histórico;Valor;Documento
+05/09/2025;PIX RECEBIDO JOAO SOUZA;1.000,00;D1
+06/09/2025;TED Ref. C2 setembro;800,00;D2
+07/09/2025;DEPOSITO;500,00;D3
+08/09/2025;PIX MARIA SILVA;1.234,56;D4
+08/09/2025;TARIFA;-12,00;D5
+"""
+
+
+def _ativos():
+    return tipar("Contratos", pd.DataFrame([
+        {'ID_Contrato': 'C1', 'Nome_Locatario': 'João Souza', 'Valor_Aluguel_Base': '1000,00'},
+        {'ID_Contrato': 'C2', 'Nome_Locatario': 'Ana Lima', 'Valor_Aluguel_Base': '800,00'},
+        {'ID_Contrato': 'C3', 'Nome_Locatario': 'Maria Silva', 'Valor_Aluguel_Base': '500,00'},
+        {'ID_Contrato': 'C4', 'Nome_Locatario': 'Maria Silva', 'Valor_Aluguel_Base': '700,00'},
+    ]).reindex(columns=colunas("Contratos"), fill_value=""))
+
+
+def _lancados(*pares):
+    return pd.DataFrame(pares, columns=['ID_Contrato', 'Mes_Referencia'])
+
+
+def _conciliar(lancados=_lancados()):
+    return conciliar(ler_extrato("extrato.csv", CSV.encode('utf-8')), _ativos(), lancados)
+
+
+def test_leitura_mantem_apenas_os_creditos():
+    extrato = ler_extrato("extrato.csv", CSV.encode('utf-8'))
+    assert extrato['Valor'].tolist() == [1000.0, 800.0, 500.0, 1234.56]
+    assert extrato['Referencia'].tolist() == ['D1', 'D2', 'D3', 'D4']
+
+
+def test_criterios_de_associacao_em_ordem_de_prioridade():
+    resultado = _conciliar()
+    assert resultado['ID_Contrato'].tolist() == ['C1', 'C2', 'C3', '']
+    assert resultado['Criterio'].tolist() == ['Nome', 'Referência', 'Valor', '']
+    # Nome repetido entre contratos não identifica nenhum deles
+    assert resultado['Status'].iloc[3] == 'Contrato não identificado'
+
+
+def test_credito_ja_lancado_no_mes_e_recusado():
+    resultado = _conciliar(_lancados(('C1', '09/2025')))
+    assert resultado['Status'].tolist()[:3] == ['Já lançado no mês', 'OK', 'OK']
+    assert resultado['Mes_Referencia'].iloc[0] == '09/2025'
+
+
+def test_segundo_credito_do_mesmo_contrato_no_mes_e_duplicado():
+    extrato = pd.DataFrame({'Data': pd.to_datetime(['2025-09-05', '2025-09-20']), 'Valor': [1000.0, 1000.0],
+                            'Descricao': ['JOAO SOUZA', 'JOAO SOUZA'], 'Referencia': ['', '']})
+    resultado = conciliar(extrato, _ativos(), _lancados())
+    assert resultado['Status'].tolist() == ['OK', 'Duplicado no extrato']
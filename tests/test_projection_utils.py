@@ -0,0 +1,51 @@
+# tests/test_projection_utils.py
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from projection_utils import projetar_fluxo
+from schema_utils import colunas, tipar
+
+HOJE = pd.Timestamp('2025-06-10')
+
+
+def _contratos(*linhas):
+    return tipar("Contratos", pd.DataFrame([{
+        'ID_Contrato': id_contrato, 'Data_Inicio': inicio, 'Data_Fim': fim, 'Valor_Aluguel_Base': '1000,00',
+        'Dia_Vencimento': dia, 'Indice_Reajuste': 'IGP-M', 'Status_Contrato': 'Ativo'}
+        for id_contrato, inicio, fim, dia in linhas]).reindex(columns=colunas("Contratos"), fill_value=""))
+
+
+def _vencimentos(fluxo, id_contrato):
+    return fluxo.loc[fluxo['ID_Contrato'] == id_contrato, 'Vencimento'].dt.strftime('%Y-%m-%d').tolist()
+
+
+def test_horizonte_comeca_no_mes_atual_sem_vencimentos_passados():
+    fluxo = projetar_fluxo(_contratos(('C5', '2024-01-05', '', '5'), ('C15', '2024-01-15', '', '15')), HOJE)
+    assert _vencimentos(fluxo, 'C15')[0] == '2025-06-15' and len(_vencimentos(fluxo, 'C15')) == 12
+    assert _vencimentos(fluxo, 'C5')[0] == '2025-07-05' and len(_vencimentos(fluxo, 'C5')) == 11
+    assert _vencimentos(fluxo, 'C15')[-1] == '2026-05-15'
+    assert len(projetar_fluxo(_contratos(('C15', '2024-01-15', '', '15')), HOJE, meses=24)) == 24
+
+
+def test_contrato_para_no_fim_a_nao_ser_com_renovacao():
+    contratos = _contratos(('C1', '2024-01-15', '2025-09-14', '15'))
+    assert _vencimentos(projetar_fluxo(contratos, HOJE), 'C1') == ['2025-06-15', '2025-07-15', '2025-08-15']
+    assert len(projetar_fluxo(contratos, HOJE, renovar=True)) == 12
+
+
+def test_contrato_que_ainda_nao_comecou_e_dia_31():
+    fluxo = projetar_fluxo(_contratos(('C1', '2025-12-01', '', '31')), HOJE)
+    assert _vencimentos(fluxo, 'C1')[:3] == ['2025-12-31', '2026-01-31', '2026-02-28']
+    assert len(fluxo) == 6
+
+
+def test_reajuste_no_aniversario_dentro_do_horizonte():
+    indices = pd.DataFrame({'Indice': 'IGPM', 'Mes': range(2024 * 12 + 5, 2025 * 12 + 5), 'Variacao': 1.0})
+    fluxo = projetar_fluxo(_contratos(('C1', '2024-09-15', '', '15')), HOJE, indices=indices)
+    valores = fluxo.set_index(fluxo['Vencimento'].dt.strftime('%Y-%m'))['Valor']
+    assert valores['2025-08'] == 100000
+    assert valores['2025-09'] == pytest.approx(100000 * 1.01 ** 12, abs=1)
+    assert fluxo['Reajustes'].tolist() == [0] * 3 + [1] * 9
@@ -0,0 +1,55 @@
+# tests/test_readjustment_utils.py
+import io
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from readjustment_utils import carregar_indices, fatores, fatores_recentes
+
+
+def _mes(texto):
+    data = pd.Timestamp(texto)
+    return data.year * 12 + data.month - 1
+
+
+def _indices(nome, inicio, variacoes):
+    return pd.DataFrame({'Indice': nome, 'Mes': range(_mes(inicio), _mes(inicio) + len(variacoes)),
+                         'Variacao': variacoes})
+
+
+def test_fator_acumulado_da_janela_de_12_meses():
+    indices = pd.concat([_indices('IGPM', '2024-01-01', [1.0] * 24),
+                         _indices('IPCA', '2024-01-01', [0.5] * 12 + [2.0] * 12)], ignore_index=True)
+    fator, completos = fatores(indices, ['IGPM', 'IPCA', 'IPCA'],
+                               np.array([_mes('2025-12-01'), _mes('2024-12-01'), _mes('2025-06-01')]))
+    assert completos.all()
+    assert fator == pytest.approx([1.01 ** 12, 1.005 ** 12, 1.005 ** 6 * 1.02 ** 6])
+
+
+def test_janela_no_inicio_da_serie_fecha_e_janela_com_mes_faltando_nao():
+    indices = _indices('IGPM', '2024-01-01', [1.0] * 12)
+    fator, completos = fatores(indices, ['IGPM', 'IGPM', 'INCC'],
+                               np.array([_mes('2024-12-01'), _mes('2025-01-01'), _mes('2024-12-01')]))
+    assert completos.tolist() == [True, False, False]
+    assert fator[0] == pytest.approx(1.01 ** 12)
+    assert np.isnan(fator[1:]).all()
+
+    lacuna = indices[indices['Mes'] != _mes('2024-06-01')]
+    fator, completos = fatores(lacuna, ['IGPM'], np.array([_mes('2024-12-01')]))
+    assert not completos[0] and np.isnan(fator[0])
+
+
+def test_fatores_recentes_usam_o_ultimo_mes_de_cada_indice():
+    indices = pd.concat([_indices('IGPM', '2024-01-01', [1.0] * 12 + [2.0] * 6),
+                         _indices('IPCA', '2025-01-01', [0.5] * 6)], ignore_index=True)
+    fator = fatores_recentes(indices, ['IGP-M', 'ipca', ''])
+    assert fator == pytest.approx([1.01 ** 6 * 1.02 ** 6, 1.0, 1.0])
+
+
+def test_arquivo_de_indices_com_virgula_decimal():
+    arquivo = io.StringIO("indice;mes;variacao\nIGP-M;01/2025;1,25%\nIPCA;02/2025;-0,10\nIPCA;02/2025;0,20\n")
+    indices = carregar_indices(arquivo)
+    assert indices.values.tolist() == [['IGPM', _mes('2025-01-01'), 1.25], ['IPCA', _mes('2025-02-01'), 0.2]]
@@ -0,0 +1,51 @@
+# tests/test_receivables_utils.py
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from receivables_utils import atualizar, construir
+from schema_utils import colunas, tipar
+
+
+def _lancamentos(*linhas):
+    return tipar("Lancamentos_Financeiros", pd.DataFrame([{
+        'ID_Lancamento': id_lancamento, 'ID_Contrato': id_contrato, 'Mes_Referencia': mes,
+        'Data_Pagamento': data, 'Valor_Total_Pago': valor, 'Status_Lancamento': status}
+        for id_lancamento, id_contrato, mes, data, valor, status in linhas]).reindex(
+        columns=colunas("Lancamentos_Financeiros"), fill_value=""))
+
+
+BASE = [('L1', 'C1', '08/2025', '2025-08-05', '1000,00', 'Válido'),
+        ('L2', 'C2', '08/2025', '2025-08-06', '800,00', 'Válido'),
+        ('L3', 'C1', '09/2025', '2025-09-05', '1000,00', 'Válido')]
+
+
+def _tabela(estado):
+    return estado['tabela'].sort_index()
+
+
+def test_atualizar_com_lancamentos_novos_soma_apenas_os_novos():
+    estado = construir(_lancamentos(*BASE))
+    novos = _lancamentos(*BASE, ('L4', 'C2', '09/2025', '2025-09-06', '800,00', 'Válido'),
+                         ('L5', 'C1', '09/2025', '2025-09-10', '50,00', 'Válido'))
+    atualizado = atualizar(estado, novos)
+    assert _tabela(atualizado).equals(_tabela(construir(novos)))
+    assert atualizado['tabela'].loc[('C1', '09/2025', '2025-09'), 'Valor_Recebido'] == 105000
+    assert atualizado['ultimo_id'] == 'L5'
+
+
+def test_atualizar_com_cancelamento_e_reativacao():
+    estado = construir(_lancamentos(*BASE))
+    cancelado = [*BASE[:2], BASE[2][:5] + ('Cancelado',)]
+    atualizado = atualizar(estado, _lancamentos(*cancelado))
+    assert ('C1', '09/2025', '2025-09') not in atualizado['tabela'].index
+    assert _tabela(atualizado).equals(_tabela(construir(_lancamentos(*cancelado))))
+    reativado = atualizar(atualizado, _lancamentos(*BASE))
+    assert _tabela(reativado).equals(_tabela(construir(_lancamentos(*BASE))))
+
+
+def test_historico_que_encolheu_e_reconstruido():
+    estado = construir(_lancamentos(*BASE))
+    menor = _lancamentos(*BASE[1:])
+    assert _tabela(atualizar(estado, menor)).equals(_tabela(construir(menor)))
@@ -0,0 +1,74 @@
+# tests/test_reconciliation_utils.py
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reconciliation_utils import VERIFICACOES, reconciliar, resumo
+from schema_utils import colunas, tipar
+
+
+def _aba(aba, *linhas):
+    """Linhas com as primeiras colunas da aba; as demais ficam vazias."""
+    df = pd.DataFrame(list(linhas), columns=colunas(aba)[:len(linhas[0])])
+    return tipar(aba, df.reindex(columns=colunas(aba), fill_value=""))
+
+
+def _dados():
+    return {
+        "Imoveis": _aba("Imoveis", ('I1', 'G', '', '', 'Alugado'), ('I2', 'G', '', '', 'Alugado'),
+                        ('I3', 'G', '', '', 'Vago'), ('I4', 'G', '', '', 'Alugado')),
+        "Contratos": _aba("Contratos", ('C1', 'I1'), ('C2', 'I3'), ('C3', 'I9'), ('C4', 'I4'), ('C5', 'I4'),
+                          ('C6', 'I2')),
+        "Lancamentos_Financeiros": _aba("Lancamentos_Financeiros", ('L1', 'C1', '09/2025'), ('L2', 'C7', '09/2025'),
+                                        ('L2', 'C1', '08/2025')),
+    }
+
+
+def _com_status(dados, status):
+    dados["Contratos"]['Status_Contrato'] = pd.Series(status, dtype='category')
+    dados["Lancamentos_Financeiros"]['Status_Lancamento'] = pd.Series(['Válido'] * 3, dtype='category')
+    return dados
+
+
+def _relatorio(fragmentos=None):
+    dados = _com_status(_dados(), ['Ativo', 'Ativo', 'Ativo', 'Ativo', 'Ativo', 'Encerrado'])
+    for aba, partes in (fragmentos or {}).items():
+        dados[aba].attrs['fragmentos'] = partes
+    return reconciliar(dados)
+
+
+def _encontrados(relatorio, verificacao):
+    return relatorio[relatorio['Verificacao'] == verificacao]
+
+
+def test_anti_joins_de_cada_verificacao():
+    relatorio = _relatorio()
+    assert _encontrados(relatorio, "Imóvel alugado sem contrato ativo")['ID'].tolist() == ['I2']
+    assert _encontrados(relatorio, "Contrato ativo em imóvel não alugado")['ID'].tolist() == ['C2']
+    assert _encontrados(relatorio, "Contrato ativo em imóvel inexistente")['ID'].tolist() == ['C3']
+    varios = _encontrados(relatorio, "Imóvel com mais de um contrato ativo")
+    assert varios[['ID', 'Relacionados']].values.tolist() == [['I4', 'C4, C5']]
+    assert _encontrados(relatorio, "Lançamento de contrato inexistente")[['ID', 'Relacionados']].values.tolist() \
+        == [['L2', 'C7']]
+    duplicados = _encontrados(relatorio, "ID duplicado")
+    assert duplicados[['Aba', 'ID', 'Relacionados']].values.tolist() == [['Lancamentos_Financeiros', 'L2',
+                                                                          'linhas 3, 4']]
+    assert resumo(relatorio).to_dict() == {verificacao: 1 for verificacao in VERIFICACOES}
+
+
+def test_linha_na_planilha_de_cada_registro():
+    relatorio = _relatorio()
+    assert _encontrados(relatorio, "Imóvel alugado sem contrato ativo")['Linha'].tolist() == [3]
+    assert _encontrados(relatorio, "Contrato ativo em imóvel inexistente")['Linha'].tolist() == [4]
+    assert (relatorio['Planilha'] == '').all()
+
+
+def test_carteira_fragmentada_informa_planilha_e_linha_dentro_dela():
+    relatorio = _relatorio({"Imoveis": [('P1', 1), ('P2', 3)], "Contratos": [('P1', 0), ('P2', 6)],
+                            "Lancamentos_Financeiros": [('P1', 3), ('P2', 0)]})
+    sem_contrato = _encontrados(relatorio, "Imóvel alugado sem contrato ativo")
+    assert sem_contrato[['Planilha', 'Linha']].values.tolist() == [['P2', 2]]
+    inexistente = _encontrados(relatorio, "Contrato ativo em imóvel inexistente")
+    assert inexistente[['Planilha', 'Linha']].values.tolist() == [['P2', 4]]
+    assert _encontrados(relatorio, "ID duplicado")['Relacionados'].tolist() == ['linhas P1:3, P1:4']
@@ -0,0 +1,39 @@
+# tests/test_schema_utils.py
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schema_utils import centavos, datas, reais, tipar
+
+
+def test_centavos_nos_formatos_da_planilha():
+    texto = pd.Series(['1.234,56', 'R$ 1234.56', '1234', '0,1', '-12,00', 'R$\xa0900,00'])
+    assert centavos(texto).tolist() == [123456, 123456, 123400, 10, -1200, 90000]
+
+
+def test_centavos_arredonda_em_vez_de_truncar():
+    # Em ponto flutuante, 0.29 * 100 = 28.999999999999996 e 4.35 * 100 = 434.99999999999994
+    assert centavos(pd.Series(['0,29', '4.35', '1.15', '19,99', '1.234,57'])).tolist() == [29, 435, 115, 1999, 123457]
+
+
+def test_centavos_invalidos_viram_zero():
+    assert centavos(pd.Series(['', 'abc', None, '12,3,4'])).tolist() == [0, 0, 0, 0]
+    assert centavos(pd.Series(['', 'abc'])).dtype == 'int64'
+
+
+def test_soma_em_centavos_e_exata():
+    valores = centavos(pd.Series(['0,10'] * 10 + ['0,20'] * 5))
+    assert valores.sum() == 200
+    assert reais(valores.sum()) == 2.0
+
+
+def test_tipar_datas_e_categorias():
+    df = tipar("Lancamentos_Financeiros", pd.DataFrame({
+        'Data_Pagamento': ['2025-09-05', '05/09/2025', ''], 'Status_Lancamento': ['Válido', 'Cancelado', 'Válido'],
+        'Valor_Total_Pago': ['1.000,00', '', '12.5']}))
+    assert df['Data_Pagamento'].tolist()[:2] == [pd.Timestamp('2025-09-05')] * 2
+    assert df['Data_Pagamento'].isna().iloc[2]
+    assert df['Status_Lancamento'].dtype == 'category'
+    assert df['Valor_Total_Pago'].tolist() == [100000, 0, 1250]
+    assert datas(pd.Series(['31/12/2024'])).iloc[0] == pd.Timestamp('2024-12-31')
@@ -0,0 +1,42 @@
+# tests/test_sequence_utils.py
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sequence_utils
+
+
+@pytest.fixture
+def sequencias(tmp_path, monkeypatch):
+    """Arquivo de sequências isolado em um diretório temporário."""
+    monkeypatch.setattr(sequence_utils, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(sequence_utils, "ARQUIVO_SEQUENCIAS", str(tmp_path / "sequencias.json"))
+
+
+def test_ids_nao_repetem_linhas_incluidas_fora_da_sequencia(sequencias):
+    planilha = [1, 2, 3]
+
+    def reservar(quantidade=1):
+        ids = sequence_utils.reservar_ids("ID_Lancamento", quantidade, maior_existente=lambda: max(planilha))
+        planilha.extend(ids)
+        return ids
+
+    assert reservar(2) == [4, 5]
+    # Linhas incluídas à mão na planilha (ou por outro servidor), sem passar pela sequência
+    planilha.extend([6, 7, 20])
+    novos = reservar(3)
+    assert novos == [21, 22, 23]
+    assert len(planilha) == len(set(planilha))
+
+
+def test_copia_local_desatualizada_nao_faz_a_sequencia_voltar(sequencias):
+    assert sequence_utils.reservar_ids("ID_Lancamento", 3, maior_existente=lambda: 10) == [11, 12, 13]
+    # A cópia local ainda não tem os IDs já entregues
+    assert sequence_utils.reservar_ids("ID_Lancamento", 1, maior_existente=lambda: 10) == [14]
+
+
+def test_sequencias_independentes(sequencias):
+    assert sequence_utils.reservar_ids("A", 2) == [1, 2]
+    assert sequence_utils.reservar_ids("B") == [1]
+    assert sequence_utils.reservar_ids("A") == [3]
@@ -0,0 +1,78 @@
+# tests/test_statement_utils.py
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from statement_utils import contratos_filtrados, extrato_do_mes, separar_extratos
+from schema_utils import colunas, tipar
+
+MES = "09/2025"
+
+
+def _contratos(*linhas):
+    return tipar("Contratos", pd.DataFrame([{
+        'ID_Contrato': id_contrato, 'ID_Imovel': id_imovel, 'Gestor_Responsavel': gestor,
+        'Nome_Locatario': f"Locatário {id_contrato}", 'Data_Inicio': '2025-01-05', 'Data_Fim': '2026-01-04',
+        'Valor_Aluguel_Base': valor, 'Dia_Vencimento': '5', 'Status_Contrato': status}
+        for id_contrato, id_imovel, gestor, valor, status in linhas]).reindex(columns=colunas("Contratos"),
+                                                                              fill_value=""))
+
+
+def _imoveis(*linhas):
+    return tipar("Imoveis", pd.DataFrame([{'ID_Imovel': id_imovel, 'Grupo': grupo, 'Status': 'Alugado'}
+                                          for id_imovel, grupo in linhas]).reindex(columns=colunas("Imoveis"),
+                                                                                   fill_value=""))
+
+
+def _lancamentos(*linhas):
+    return tipar("Lancamentos_Financeiros", pd.DataFrame([{
+        'ID_Lancamento': str(numero), 'ID_Contrato': id_contrato, 'Mes_Referencia': mes,
+        'Data_Pagamento': '2025-09-05', 'Valor_Total_Pago': valor, 'Forma_Pagamento': 'PIX',
+        'Status_Lancamento': status}
+        for numero, (id_contrato, mes, valor, status) in enumerate(linhas, start=1)]).reindex(
+        columns=colunas("Lancamentos_Financeiros"), fill_value=""))
+
+
+def _extrato(df_contratos, df_financeiro, df_imoveis=None):
+    df_imoveis = _imoveis(('I1', 'Centro'), ('I2', 'Centro'), ('I3', 'Sul')) if df_imoveis is None else df_imoveis
+    return extrato_do_mes(contratos_filtrados(df_contratos, df_imoveis), df_financeiro, MES).set_index('ID_Contrato')
+
+
+def test_pendente_nunca_fica_negativo():
+    extrato = _extrato(_contratos(('C1', 'I1', 'Ana', '1000,00', 'Ativo')),
+                       _lancamentos(('C1', MES, '1200,00', 'Válido')))
+    assert extrato.loc['C1', ['Esperado', 'Recebido', 'Pendente']].tolist() == [100000, 120000, 0]
+
+
+def test_lancamento_cancelado_nao_conta_como_recebido():
+    extrato = _extrato(_contratos(('C1', 'I1', 'Ana', '1000,00', 'Ativo')),
+                       _lancamentos(('C1', MES, '1000,00', 'Cancelado'), ('C1', MES, '400,00', 'Válido'),
+                                    ('C1', '08/2025', '1000,00', 'Válido')))
+    assert extrato.loc['C1', ['Recebido', 'Cancelado', 'Pendente', 'Lancamentos']].tolist() == [40000, 100000,
+                                                                                                60000, 2]
+
+
+def test_contrato_com_lancamentos_sem_aluguel_esperado_entra_no_extrato():
+    # Encerrado antes do mês: não há aluguel esperado, mas o pagamento atrasado aparece
+    df_contratos = _contratos(('C1', 'I1', 'Ana', '1000,00', 'Ativo'), ('C2', 'I2', 'Bia', '800,00', 'Encerrado'))
+    df_contratos.loc[df_contratos['ID_Contrato'] == 'C2', 'Data_Fim'] = pd.Timestamp('2025-06-30')
+    extrato = _extrato(df_contratos, _lancamentos(('C2', MES, '800,00', 'Válido')))
+    assert extrato.loc['C2', ['Esperado', 'Recebido', 'Pendente']].tolist() == [0, 80000, 0]
+    assert extrato.loc['C1', ['Esperado', 'Recebido', 'Pendente']].tolist() == [100000, 0, 100000]
+
+
+def test_extratos_separados_por_gestor_e_por_grupo():
+    df_contratos = _contratos(('C1', 'I1', 'Ana', '1000,00', 'Ativo'), ('C2', 'I2', 'Bia', '800,00', 'Ativo'),
+                              ('C3', 'I3', 'Ana', '500,00', 'Ativo'), ('C4', 'I9', 'Bia', '300,00', 'Ativo'))
+    df_financeiro = _lancamentos(('C1', MES, '1000,00', 'Válido'), ('C3', MES, '500,00', 'Válido'))
+    df_imoveis = _imoveis(('I1', 'Centro'), ('I2', 'Centro'), ('I3', 'Sul'))
+    extrato = extrato_do_mes(contratos_filtrados(df_contratos, df_imoveis), df_financeiro, MES)
+    extratos = {(e['dimensao'], e['nome']): e for e in separar_extratos(extrato, df_financeiro, MES)}
+    assert sorted(extratos) == [('gestor', 'Ana'), ('gestor', 'Bia'),
+                                ('grupo', '(sem cadastro)'), ('grupo', 'Centro'), ('grupo', 'Sul')]
+    assert extratos[('gestor', 'Ana')]['contratos']['ID_Contrato'].tolist() == ['C1', 'C3']
+    assert extratos[('gestor', 'Ana')]['lancamentos']['ID_Contrato'].tolist() == ['C1', 'C3']
+    assert extratos[('grupo', 'Centro')]['contratos']['ID_Contrato'].tolist() == ['C1', 'C2']
+    assert extratos[('grupo', '(sem cadastro)')]['contratos']['ID_Contrato'].tolist() == ['C4']
+    assert extratos[('gestor', 'Bia')]['lancamentos'].empty
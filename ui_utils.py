@@ -0,0 +1,160 @@
+# ui_utils.py
+import math
+import functools
+import pandas as pd
+import streamlit as st
+import journal_utils
+import metrics_utils
+import search_utils
+from metrics_utils import medido
+
+TAMANHOS_PAGINA = [25, 50, 100, 200]
+
+
+def _chave_ordenacao(coluna):
+    """Ordena colunas de texto numéricas (ex.: IDs) pelo valor, e não pela ordem alfabética."""
+    if coluna.dtype == object:
+        numerica = pd.to_numeric(coluna, errors='coerce')
+        if numerica.notna().all():
+            return numerica
+    return coluna
+
+
+def paginar(df, ordenar_por=None, crescente=True, tamanho_pagina=50, pagina=1):
+    """
+    Ordena o DataFrame no servidor e retorna apenas a janela da página solicitada.
+    Retorna (janela, total_de_paginas).
+    """
+    total_paginas = max(1, math.ceil(len(df) / tamanho_pagina))
+    pagina = min(max(1, int(pagina)), total_paginas)
+    if ordenar_por:
+        df = df.sort_values(ordenar_por, ascending=crescente, kind='stable', na_position='last',
+                            key=_chave_ordenacao)
+    inicio = (pagina - 1) * tamanho_pagina
+    return df.iloc[inicio:inicio + tamanho_pagina], total_paginas
+
+
+@medido("render.tabela_paginada")
+def tabela_paginada(df, key, colunas, ordenar_por_padrao=None, estilo=None):
+    """
+    Exibe `df` em páginas: apenas a janela visível é enviada ao navegador.
+    Ordenação e deslocamento são calculados no servidor. Retorna as linhas selecionadas
+    na página atual (seleção de linhas do st.dataframe).
+    """
+    col_ordem, col_sentido, col_tamanho, col_pagina = st.columns([3, 2, 2, 2])
+    ordenar_por = col_ordem.selectbox("Ordenar por", colunas,
+                                      index=colunas.index(ordenar_por_padrao) if ordenar_por_padrao in colunas else 0,
+                                      key=f"{key}_ordenar_por")
+    crescente = col_sentido.radio("Ordem", ["Decrescente", "Crescente"], horizontal=True,
+                                  key=f"{key}_sentido") == "Crescente"
+    tamanho_pagina = col_tamanho.selectbox("Linhas por página", TAMANHOS_PAGINA, index=1, key=f"{key}_tamanho")
+    total_paginas = max(1, math.ceil(len(df) / tamanho_pagina))
+    # A chave inclui o total de páginas para voltar à primeira página quando os filtros mudam
+    pagina = col_pagina.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1,
+                                     step=1, key=f"{key}_pagina_{total_paginas}")
+
+    janela, _ = paginar(df[colunas], ordenar_por, crescente, tamanho_pagina, pagina)
+    dados = janela.style.apply(estilo, axis=1) if estilo else janela
+    evento = st.dataframe(dados, use_container_width=True, hide_index=True, on_select="rerun",
+                          selection_mode="multi-row",
+                          key=f"{key}_tabela_{pagina}_{tamanho_pagina}_{ordenar_por}_{crescente}_{total_paginas}")
+
+    inicio = (pagina - 1) * tamanho_pagina
+    st.caption(f"Exibindo {inicio + 1 if len(janela) else 0}–{inicio + len(janela)} de {len(df)} registros.")
+    return janela.iloc[evento.selection.rows]
+
+
+def status_escritas():
+    """
+    Mostra na barra lateral as escritas que ainda não chegaram à planilha
+    (pendentes ou com falha) e permite reenviar ou descartar as que falharam.
+    """
+    from data_utils import iniciar_descarregador, invalidar_abas
+    descarregador = iniciar_descarregador()
+    contagem = journal_utils.resumo()
+    pendentes, falhas = contagem.get('pendente', 0), contagem.get('falhou', 0)
+    if not pendentes and not falhas:
+        return
+    with st.sidebar.expander(f"⏳ Escritas na planilha: {pendentes} pendente(s), {falhas} com falha",
+                             expanded=bool(falhas)):
+        for escrita in journal_utils.listar():
+            icone = "❌" if escrita['status'] == 'falhou' else "⏳"
+            st.caption(f"{icone} {escrita['descricao'] or escrita['aba']} ({escrita['tentativas']} tentativa(s))")
+            if escrita['erro']:
+                st.caption(f"Erro: {escrita['erro']}")
+        if not falhas:
+            return
+        retidas = [f"{aba} ({planilha})" if planilha else aba for aba, planilha in sorted(journal_utils.bloqueios())]
+        st.warning(f"As escritas seguintes em {', '.join(retidas)} aguardam as falhas serem reenviadas ou descartadas.")
+        if st.button("Reenviar escritas com falha", key="reenviar_escritas"):
+            journal_utils.reenviar_falhas()
+            descarregador.acordar.set()
+            st.rerun()
+        if st.button("Descartar escritas com falha", key="descartar_escritas",
+                     help="As escritas com falha não serão gravadas na planilha; as seguintes são liberadas."):
+            invalidar_abas(journal_utils.descartar_falhas())
+            descarregador.acordar.set()
+            st.rerun()
+
+
+def resultado_edicao(resultado, chave_base, registro="Registro"):
+    """
+    Mostra o resultado de `data_utils.update_record` e atualiza a versão do registro guardada na
+    sessão (`chave_base`): depois de um conflito, o formulário é reaberto com os valores atuais.
+    """
+    if resultado['status'] == 'gravado':
+        st.session_state[chave_base] = resultado['base']
+        st.success(f"{registro} atualizado com sucesso! Campo(s) alterado(s): {', '.join(resultado['colunas'])}.")
+        if resultado['preservadas']:
+            st.info("Alterações feitas por outra pessoa enquanto você editava foram mantidas: "
+                    f"{', '.join(resultado['preservadas'])}.")
+        st.balloons()
+    elif resultado['status'] == 'sem_alteracoes':
+        st.info("Nenhuma alteração para salvar.")
+    elif resultado['status'] == 'conflito':
+        st.session_state.pop(chave_base, None)
+        st.error(f"{registro} alterado por outra pessoa enquanto você editava; nada foi gravado.")
+        if resultado['conflitos']:
+            st.dataframe(pd.DataFrame([(coluna, str(digitado), str(atual)) for coluna, (digitado, atual)
+                                       in resultado['conflitos'].items()],
+                                      columns=['Campo', 'Valor digitado', 'Valor atual']),
+                         use_container_width=True, hide_index=True)
+        st.caption("Na próxima interação o formulário é reaberto com os valores atuais; refaça as alterações.")
+    else:
+        st.session_state.pop(chave_base, None)
+        st.error(f"{registro} não encontrado na planilha.")
+
+
+def seletor_busca(rotulo, indice, key, permitidos=None, placeholder="Selecione...",
+                  ajuda="Nome, CPF, ID, unidade ou endereço"):
+    """
+    Campo de busca com a lista dos melhores resultados (search_utils.buscar). Retorna o ID
+    escolhido, ou None enquanto nada for selecionado.
+    """
+    consulta = st.text_input(f"Buscar ({ajuda.lower()})", key=f"{key}_busca")
+    ids = search_utils.buscar(indice, consulta, permitidos=permitidos)
+    if consulta and not ids:
+        st.caption("Nenhum resultado; confira a grafia ou use menos palavras.")
+    return st.selectbox(rotulo, ids, index=None, placeholder=placeholder, key=f"{key}_selecao",
+                        format_func=lambda id_registro: search_utils.rotulo(indice, id_registro))
+
+
+def fragmento(nome):
+    """
+    Decorador: st.fragment cujas reexecuções isoladas (um clique em um widget do fragmento, sem o
+    restante da página) entram nas métricas como uma execução '<página>/<nome>'.
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if metrics_utils.execucao_atual() is not None:
+                # Executado junto com a página: os spans entram na execução dela
+                return funcao(*args, **kwargs)
+            pagina = (st.session_state.get('_execucao_metricas') or {}).get('pagina', '')
+            execucao = metrics_utils.iniciar_execucao(f"{pagina}/{nome}")
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                metrics_utils.finalizar_execucao(execucao)
+        return st.fragment(envolvida)
+    return decorador